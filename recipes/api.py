@@ -0,0 +1,327 @@
+"""
+Building blocks of the read-only JSON API.
+
+Each resource (recipes, comments, users) lists the fields a client may ask
+for with `?fields=a,b,c`. A field knows the columns and relations it reads,
+so a request only loads what it returns: `?fields=id,title` selects two
+columns and skips the tag prefetch entirely.
+
+Responses carry an `ETag` and answer a matching `If-None-Match` with 304
+Not Modified. Recipe listings derive it from the page's keys and the
+recipes' `modified_at`, so a 304 is sent without serializing the page;
+other responses hash their body. Signed-in users can instead stream a
+listing as newline-delimited JSON (`?format=ndjson`), one object per line,
+read from the database in chunks so exports of any size use constant memory.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import require_GET
+from recipes.pagination import CursorPaginator, InvalidCursor
+
+API_DEFAULT_LIMIT = 20
+API_MAX_LIMIT = 100
+NDJSON_CHUNK_SIZE = 500
+
+
+class ApiError(Exception):
+    """A client error, reported as a JSON body with `status`."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class Field:
+    """
+    A field of an API resource.
+
+    Attributes:
+        columns (tuple): Model field paths the value is read from, passed to
+            `QuerySet.only()`.
+        select_related (str): Relation to join, if any.
+        prefetch_related (str): Relation to prefetch, if any.
+        getter (callable): Computes the value from an object.
+    """
+
+    def __init__(self, *columns, select_related=None, prefetch_related=None, getter=None):
+        self.columns = columns
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+        self.getter = getter or (lambda obj: getattr(obj, columns[0]))
+
+
+class Resource:
+    """
+    The fields of a model exposed by the API.
+
+    Attributes:
+        fields (dict): Field name to `Field`.
+        default_fields (tuple): Fields returned when none are asked for.
+    """
+
+    def __init__(self, fields, default_fields):
+        self.fields = fields
+        self.default_fields = default_fields
+
+    def parse_fields(self, value, default=None):
+        """
+        Return the field names asked for by a `fields` parameter.
+
+        Args:
+            value (str): Comma separated field names, or None.
+            default (tuple): Fields returned if `value` is empty; defaults
+                to `default_fields`.
+
+        Raises:
+            ApiError: If an unknown field is asked for.
+        """
+        if not value:
+            return default or self.default_fields
+        names = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise ApiError(
+                f"Unknown fields: {', '.join(unknown) or value}. "
+                f"Available: {', '.join(self.fields)}"
+            )
+        return names
+
+    def restrict(self, queryset, names, extra_columns=()):
+        """
+        Load only what the fields `names` read.
+
+        Args:
+            queryset (QuerySet): The rows to return.
+            names (tuple): Field names, from `parse_fields()`.
+            extra_columns (iterable): More columns to load, such as the
+                pagination ordering.
+        """
+        columns = {'pk', *extra_columns}
+        for name in names:
+            field = self.fields[name]
+            columns.update(field.columns)
+            if field.select_related:
+                queryset = queryset.select_related(field.select_related)
+            if field.prefetch_related:
+                queryset = queryset.prefetch_related(field.prefetch_related)
+        return queryset.only(*(column for column in columns if column != 'pk'))
+
+    def serialize(self, obj, names):
+        """Return the fields `names` of `obj` as a dict."""
+        return {name: self.fields[name].getter(obj) for name in names}
+
+
+RECIPES = Resource(
+    {
+        'id': Field('id'),
+        'title': Field('title'),
+        'description': Field('description'),
+        'ingredients': Field('ingredients'),
+        'difficulty': Field('difficulty'),
+        'time_required': Field('time_required'),
+        'visibility': Field('visibility'),
+        'publication_date': Field('publication_date'),
+        'fav_count': Field('favourite_count'),
+        'comment_count': Field('comment_count'),
+        'author': Field(
+            'user__username', select_related='user',
+            getter=lambda recipe: recipe.user.username,
+        ),
+        'tags': Field(
+            prefetch_related='tags',
+            getter=lambda recipe: [tag.name for tag in recipe.tags.all()],
+        ),
+        'url': Field('id', getter=lambda recipe: reverse('view_recipe', args=[recipe.id])),
+    },
+    default_fields=('id', 'title', 'author', 'publication_date', 'fav_count', 'url'),
+)
+
+COMMENTS = Resource(
+    {
+        'id': Field('id'),
+        'text': Field('text'),
+        'created_at': Field('created_at'),
+        'recipe': Field('recipe', getter=lambda comment: comment.recipe_id),
+        'author': Field(
+            'user__username', select_related='user',
+            getter=lambda comment: comment.user.username,
+        ),
+    },
+    default_fields=('id', 'author', 'text', 'created_at'),
+)
+
+USERS = Resource(
+    {
+        'id': Field('id'),
+        'username': Field('username'),
+        'first_name': Field('first_name'),
+        'last_name': Field('last_name'),
+        'follower_count': Field('follower_count'),
+        'following_count': Field('following_count'),
+        'url': Field(
+            'username', getter=lambda user: reverse('user_profile', args=[user.username]),
+        ),
+    },
+    default_fields=('id', 'username', 'follower_count', 'url'),
+)
+
+
+def parse_limit(value):
+    """Return the requested page size, clamped to a sane range."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return API_DEFAULT_LIMIT
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def make_etag(value):
+    """Return a quoted ETag hashing the text `value`."""
+    return quote_etag(hashlib.md5(value.encode(), usedforsecurity=False).hexdigest())
+
+
+def not_modified_response(request, etag):
+    """Return 304 Not Modified if the client holds `etag`, else None."""
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response.headers['ETag'] = etag
+        return response
+    return None
+
+
+def json_response(request, payload, status=200, etag=None):
+    """
+    Return `payload` as JSON with an ETag, or 304 if the client has it.
+
+    Without `etag`, the ETag is a hash of the body, so it changes exactly
+    when the response does.
+    """
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+    etag = etag or make_etag(body)
+    response = not_modified_response(request, etag) if status == 200 else None
+    if response is None:
+        response = HttpResponse(body, content_type='application/json', status=status)
+        response.headers['ETag'] = etag
+    return response
+
+
+def page_etag(page, names, version_field):
+    """
+    Return an ETag of a page of a listing, from its keys rather than its body.
+
+    Args:
+        page (CursorPage): The page; its rows must have `version_field` loaded.
+        names (tuple): The fields returned, which change the body too.
+        version_field (str): A timestamp updated whenever anything the
+            rows are serialized with changes.
+    """
+    keys = [names, page.has_next(), page.has_previous()] + [
+        [obj.pk, getattr(obj, version_field)] for obj in page
+    ]
+    return make_etag(json.dumps(keys, cls=DjangoJSONEncoder))
+
+
+def ndjson_response(queryset, resource, names):
+    """Stream every row of `queryset` as one JSON object per line."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+    def lines():
+        for obj in queryset.iterator(chunk_size=NDJSON_CHUNK_SIZE):
+            yield encoder.encode(resource.serialize(obj, names)) + '\n'
+
+    return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+
+
+def list_response(request, queryset, resource, ordering, paginator=None, version_field=None):
+    """
+    Return a listing as one cursor-paginated JSON page or an NDJSON stream.
+
+    Streams are only sent to signed-in users, since they read every row.
+
+    Args:
+        request (HttpRequest): The request, read for `fields`, `format`,
+            `cursor` and `limit`.
+        queryset (QuerySet): The rows to list.
+        resource (Resource): The fields the rows are returned with.
+        ordering (tuple): The listing's order; its last field must be unique.
+        paginator (callable, optional): Called with the restricted queryset
+            and page size to build the paginator of a JSON page, in place
+            of a `CursorPaginator` over `ordering`.
+        version_field (str, optional): A column changing with everything
+            the rows are serialized with; if given, the ETag of a JSON page
+            is derived from its keys and this column (see `page_etag()`).
+
+    Raises:
+        ApiError: If a stream is asked for without signing in, or the
+            cursor is invalid.
+    """
+    names = resource.parse_fields(request.GET.get('fields'))
+    extra_columns = [field.lstrip('-') for field in ordering]
+    if version_field:
+        extra_columns.append(version_field)
+    queryset = resource.restrict(queryset, names, extra_columns=extra_columns)
+    if request.GET.get('format') == 'ndjson':
+        if not request.user.is_authenticated:
+            raise ApiError('Log in to export listings.', status=401)
+        return ndjson_response(queryset.order_by(*ordering), resource, names)
+
+    limit = parse_limit(request.GET.get('limit'))
+    if paginator is None:
+        paginator = CursorPaginator(queryset, ordering, limit)
+    else:
+        paginator = paginator(queryset, limit)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise ApiError('Invalid cursor.')
+    etag = None
+    if version_field:
+        etag = page_etag(page, names, version_field)
+        response = not_modified_response(request, etag)
+        if response is not None:
+            return response
+    return json_response(request, {
+        'results': [resource.serialize(obj, names) for obj in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }, etag=etag)
+
+
+def detail_response(request, obj, resource):
+    """Return one object as JSON, with every field unless `fields` is given."""
+    names = resource.parse_fields(request.GET.get('fields'), default=tuple(resource.fields))
+    return json_response(request, resource.serialize(obj, names))
+
+
+def error_response(error):
+    """Return an `ApiError` as a JSON response."""
+    return JsonResponse({'error': error.message}, status=error.status)
+
+
+def api_view(view_function):
+    """
+    Decorator for API views: GET only, with errors reported as JSON.
+
+    `ApiError` and `Http404` raised by the view become JSON error bodies
+    instead of HTML pages.
+    """
+
+    @require_GET
+    @wraps(view_function)
+    def modified_view_function(request, *args, **kwargs):
+        try:
+            return view_function(request, *args, **kwargs)
+        except ApiError as error:
+            return error_response(error)
+        except Http404:
+            return error_response(ApiError('Not found.', status=404))
+    return modified_view_function
@@ -0,0 +1,179 @@
+"""
+Filters and facet counts of the recipe browse page.
+
+The sidebar shows how many recipes each tag, difficulty and cooking time
+would match. Counting with a query per option would cost one query per tag;
+instead every count is a conditional `COUNT(DISTINCT ...)` in a single
+aggregate over the filtered recipes, so the whole sidebar costs one query.
+
+Facets are counted disjunctively: the counts of a facet ignore that facet's
+own selection (but apply every other filter), so choosing "Vegan" still
+shows how many recipes choosing "Vegetarian" as well would add.
+
+The counts are cached for `FACET_CACHE_TIMEOUT` seconds per normalized
+filter signature, so a popular filter combination is only counted once in
+that time. They may therefore lag just-published recipes slightly.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils.dateparse import parse_date
+from recipes.forms.recipe_form import TIME_CHOICES
+from recipes.models.recipes import Recipe
+from recipes.search import search_terms
+
+FACET_CACHE_TIMEOUT = 300
+DIFFICULTIES = [choice[0] for choice in Recipe.DIFFICULTY_CHOICES]
+TIMES = [choice[0] for choice in TIME_CHOICES]
+
+
+class BrowseFilters:
+    """
+    The filters of the browse page, parsed from its query string.
+
+    Values that cannot match anything (an unknown difficulty, a malformed
+    date or user id) are dropped rather than failing the request.
+
+    Attributes:
+        query (str): The search query.
+        user_id (int): Only show this user's recipes, if set.
+        date (date): Only show recipes published on this day, if set.
+        tags (list): Names of tags; recipes with any of them are shown.
+        difficulty (str): Only show recipes of this difficulty, if set.
+        time_required (str): Only show recipes taking this long, if set.
+    """
+
+    def __init__(self, query='', user_id=None, date=None, tags=(), difficulty=None,
+                 time_required=None):
+        self.query = query
+        self.user_id = user_id
+        self.date = date
+        self.tags = sorted(set(tags))
+        self.difficulty = difficulty
+        self.time_required = time_required
+
+    @classmethod
+    def from_query_dict(cls, params):
+        """Return the filters given by `params`, a `QueryDict` of the request."""
+        user_id = params.get('user', '')
+        difficulty = params.get('difficulty') or params.get('category')
+        time_required = params.get('time')
+        try:
+            day = parse_date(params.get('date', ''))
+        except ValueError:
+            day = None
+        return cls(
+            query=params.get('q', '').strip(),
+            user_id=int(user_id) if user_id.isdigit() else None,
+            date=day,
+            tags=[tag for tag in params.getlist('tag') if tag],
+            difficulty=difficulty if difficulty in DIFFICULTIES else None,
+            time_required=time_required if time_required in TIMES else None,
+        )
+
+    def base_queryset(self, viewer):
+        """Return the recipes `viewer` may see, restricted by all but the facet filters."""
+        recipes = Recipe.objects.visible_to(viewer)
+        if self.query:
+            recipes = recipes.search(self.query)
+        if self.user_id:
+            recipes = recipes.filter(user_id=self.user_id)
+        if self.date:
+            recipes = recipes.filter(publication_date__date=self.date)
+        return recipes
+
+    def facet_filters(self):
+        """Return the filter of each selected facet, keyed by facet name."""
+        filters = {}
+        if self.tags:
+            filters['tag'] = Q(Exists(Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'), tag__name__in=self.tags,
+            )))
+        if self.difficulty:
+            filters['difficulty'] = Q(difficulty=self.difficulty)
+        if self.time_required:
+            filters['time'] = Q(time_required=self.time_required)
+        return filters
+
+    def apply(self, queryset):
+        """Restrict `queryset`, from `base_queryset()`, by the selected facets."""
+        for condition in self.facet_filters().values():
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def signature(self):
+        """Return a string identifying these filters, the same for equivalent ones."""
+        return '|'.join([
+            ' '.join(search_terms(self.query)),
+            str(self.user_id or ''),
+            self.date.isoformat() if self.date else '',
+            ','.join(self.tags),
+            self.difficulty or '',
+            self.time_required or '',
+        ])
+
+
+def facet_cache_key(filters, viewer):
+    """
+    Return the cache key of the facet counts of `filters` seen by `viewer`.
+
+    Anonymous viewers all see the same recipes, so they share one entry.
+    """
+    viewer_id = viewer.pk if viewer is not None and viewer.is_authenticated else 'anonymous'
+    digest = hashlib.md5(filters.signature().encode(), usedforsecurity=False).hexdigest()
+    return f'browse_facets:{viewer_id}:{digest}'
+
+
+def count_facets(filters, viewer, tags):
+    """
+    Return how many recipes each facet option would match.
+
+    Every count applies the other facets' selections, and all of them are
+    taken in one aggregate query over the filtered recipes.
+
+    Args:
+        filters (BrowseFilters): The current filters.
+        viewer (User): The user browsing; only recipes they may see count.
+        tags (iterable): The tags to count, as listed in the sidebar.
+
+    Returns:
+        dict: Facet name ('tag', 'difficulty' or 'time') to a dict of
+        option to count. Tags are keyed by name.
+    """
+    key = facet_cache_key(filters, viewer)
+    counts = cache.get(key)
+    if counts is not None:
+        return counts
+
+    selected = filters.facet_filters()
+
+    def others(facet):
+        condition = Q()
+        for name, other in selected.items():
+            if name != facet:
+                condition &= other
+        return condition
+
+    options = {
+        'tag': {tag.name: Q(tags=tag.pk) for tag in tags},
+        'difficulty': {value: Q(difficulty=value) for value in DIFFICULTIES},
+        'time': {value: Q(time_required=value) for value in TIMES},
+    }
+    aggregates = {}
+    for facet, facet_options in options.items():
+        for index, (option, condition) in enumerate(facet_options.items()):
+            aggregates[f'{facet}_{index}'] = Count(
+                'pk', distinct=True, filter=condition & others(facet)
+            )
+    totals = filters.base_queryset(viewer).order_by().aggregate(**aggregates)
+
+    counts = {
+        facet: {
+            option: totals[f'{facet}_{index}']
+            for index, option in enumerate(facet_options)
+        }
+        for facet, facet_options in options.items()
+    }
+    cache.set(key, counts, FACET_CACHE_TIMEOUT)
+    return counts
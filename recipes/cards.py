@@ -0,0 +1,75 @@
+"""
+Recipe card bodies, cached until their recipe changes and read a page at a time.
+
+The part of a recipe card that looks the same to every viewer (title,
+badges, description, tags and date) is cached under the recipe's
+`cache_version`, so an edit renders it again and nothing has to be deleted.
+Search results show a query-specific snippet instead of the description,
+so their bodies are not cached.
+
+With the database cache every read is a query, so a listing loads the
+bodies of all its cards with one `get_many` before rendering them (the
+`load_card_bodies` tag), renders only the missing ones and writes those
+back with one `set_many`. A card whose body was not loaded that way reads
+it on its own.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def recipe_card_cache_key(recipe):
+    return f'recipe_card:{recipe.pk}:{recipe.cache_version}'
+
+
+def is_cacheable(recipe):
+    """Return whether the card body of `recipe` is the same for every listing."""
+    return not getattr(recipe, 'search_snippet', None)
+
+
+def render_card_body(recipe):
+    return render_to_string('recipes/recipe_card_body.html', {'recipe': recipe})
+
+
+def load_card_bodies(recipes):
+    """
+    Set `card_body` on each of `recipes`, with one cache read and at most one write.
+
+    Args:
+        recipes (iterable): The recipes of a page's listings, from
+            containers that yield the same instances when the listing
+            iterates them again (a list, page or evaluated queryset).
+    """
+    listed = defaultdict(list)
+    for recipe in recipes:
+        if is_cacheable(recipe):
+            listed[recipe_card_cache_key(recipe)].append(recipe)
+    if not listed:
+        return
+    found = cache.get_many(listed)
+    rendered = {}
+    for key, instances in listed.items():
+        body = found.get(key)
+        if body is None:
+            body = rendered[key] = render_card_body(instances[0])
+        for recipe in instances:
+            recipe.card_body = body
+    if rendered:
+        cache.set_many(rendered, CARD_CACHE_TIMEOUT)
+
+
+def get_card_body(recipe):
+    """Return the card body of `recipe`, as loaded by `load_card_bodies()` or read alone."""
+    if not is_cacheable(recipe):
+        return render_card_body(recipe)
+    body = recipe.__dict__.get('card_body')
+    if body is None:
+        key = recipe_card_cache_key(recipe)
+        body = cache.get(key)
+        if body is None:
+            body = render_card_body(recipe)
+            cache.set(key, body, CARD_CACHE_TIMEOUT)
+    return body
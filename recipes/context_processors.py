@@ -0,0 +1,17 @@
+from recipes.notifications import get_unread_count, recent_notifications
+
+
+def notifications(request):
+    """
+    Add the notification bell's data to every template context.
+
+    `recent_notifications` is a lazy queryset, so it only runs if the page
+    actually renders the notification menu.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'unread_count': 0, 'recent_notifications': ()}
+    return {
+        'unread_count': get_unread_count(user),
+        'recent_notifications': recent_notifications(user),
+    }
@@ -2,31 +2,44 @@
 from django.core.paginator import Paginator
 from recipes.models.follow import Follow
 from recipes.models.recipes import Recipe
+from recipes.models.user import User
+from recipes.pagination import CountedPaginator
+
+# Fields rendered by partials/users_page.html
+USER_CARD_FIELDS = ('id', 'username', 'email_hash')
 
 def get_following_count(user):
-    return Follow.objects.filter(follower=user).count()
+    return user.following_count
 
 def get_following_users(user):
-    followings = Follow.objects.filter(follower=user).select_related('followee')
-    return [following_user.followee for following_user in followings]
+    """Return a lazy queryset of the users `user` follows, oldest follow first."""
+    return (
+        User.objects.filter(followers__follower=user)
+        .only(*USER_CARD_FIELDS)
+        .order_by('followers__id')
+    )
 
 def get_follower_count(user):
-    return Follow.objects.filter(followee=user).count()
+    return user.follower_count
 
 def get_follower_users(user):
-    followers = Follow.objects.filter(followee=user).select_related('follower')
-    return [follower_user.follower for follower_user in followers]
+    """Return a lazy queryset of the users following `user`, oldest follow first."""
+    return (
+        User.objects.filter(following__followee=user)
+        .only(*USER_CARD_FIELDS)
+        .order_by('following__id')
+    )
 
 def paginate_following(request,user):
     followings = get_following_users(user)
-    following_paginate = Paginator(followings, 5)
+    following_paginate = CountedPaginator(followings, 5, count=user.following_count)
     page_number = request.GET.get('following_page')
     page_object = following_paginate.get_page(page_number)
     return page_object
     
 def paginate_followers(request,user):
     followers = get_follower_users(user)
-    follower_paginate = Paginator(followers, 5)
+    follower_paginate = CountedPaginator(followers, 5, count=user.follower_count)
     page_number = request.GET.get('follower_page')
     page_object = follower_paginate.get_page(page_number)
     return page_object
@@ -37,27 +50,35 @@ def user_is_following(viewer, profile_user):
         followee=profile_user
     ).exists()
 
-def paginate_favourite_recipes(request, user):
-    favourites_recipes = (
+def get_favourite_recipes(user):
+    """Return a lazy queryset of the recipes `user` favourited, newest favourite first."""
+    return (
         Recipe.objects
         .filter(favourite__user=user)
+        .visible_to(user)
+        .with_viewer_state(user)
+        .prefetch_related('tags')
         .order_by('-favourite__favourited_at')
     )
-    favourite_paginate = Paginator(favourites_recipes, 9)
+
+def paginate_favourite_recipes(request, user):
+    favourite_paginate = Paginator(get_favourite_recipes(user), 9)
     page_number = request.GET.get('page')
     return favourite_paginate.get_page(page_number)
 
 
+def get_user_recipes(viewer, profile_user):
+    """Return a lazy queryset of the recipes of `profile_user` that `viewer` may see, newest first."""
+    return (
+        Recipe.objects.filter(user=profile_user)
+        .visible_to(viewer)
+        .with_viewer_state(viewer)
+        .prefetch_related('tags')
+        .order_by('-publication_date')
+    )
+
+
 def paginate_recipes_user(request, viewer, profile_user):
-    if viewer == profile_user:
-        recipes = Recipe.objects.filter(user=profile_user)
-    else:
-        is_following = user_is_following(viewer, profile_user)
-        if is_following:
-            recipes = Recipe.objects.filter(user=profile_user)
-        else:
-            recipes = Recipe.objects.filter(user=profile_user, visibility="public")
-    recipes = recipes.order_by('-publication_date')
-    recipes_paginate = Paginator(recipes, 9)
+    recipes_paginate = Paginator(get_user_recipes(viewer, profile_user), 9)
     page_number = request.GET.get('page')
     return recipes_paginate.get_page(page_number)
@@ -0,0 +1,133 @@
+"""
+Parsing of free-text ingredient lists into indexed `Ingredient` rows.
+
+Recipes keep the ingredient list exactly as their author typed it, one
+ingredient per line ("Flour 2 cups"). Whenever a recipe is saved the lines
+are parsed and stored as `RecipeIngredient` rows pointing at shared,
+normalized `Ingredient` names, so "recipes containing X but not Y" can be
+answered from an index (see `RecipeQuerySet.with_ingredients()`).
+"""
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+
+ParsedIngredient = namedtuple('ParsedIngredient', ['name', 'quantity', 'unit'])
+
+UNITS = {
+    'g', 'gram', 'grams', 'kg', 'kilogram', 'kilograms', 'mg',
+    'ml', 'millilitre', 'millilitres', 'milliliter', 'milliliters',
+    'l', 'litre', 'litres', 'liter', 'liters',
+    'oz', 'ounce', 'ounces', 'lb', 'lbs', 'pound', 'pounds',
+    'tsp', 'teaspoon', 'teaspoons', 'tbsp', 'tablespoon', 'tablespoons',
+    'cup', 'cups', 'pinch', 'pinches', 'dash', 'clove', 'cloves',
+    'slice', 'slices', 'can', 'cans', 'piece', 'pieces', 'handful',
+}
+
+QUANTITY_PATTERN = re.compile(r'^\d{1,7}(?:[.,]\d+)?$|^\d{1,7}/\d{1,7}$')
+LIST_MARKERS = '-*•'
+
+
+def normalize_ingredient_name(name):
+    """Lower-case `name`, drop punctuation and collapse whitespace."""
+    words = re.findall(r"[^\W_]+(?:['-][^\W_]+)*", name.lower())
+    return ' '.join(words)
+
+
+def parse_quantity(token):
+    """Return `token` as a Decimal, or None if it is not a quantity."""
+    if not QUANTITY_PATTERN.match(token):
+        return None
+    try:
+        if '/' in token:
+            fraction = Fraction(token)
+            return Decimal(fraction.numerator) / Decimal(fraction.denominator)
+        return Decimal(token.replace(',', '.'))
+    except (InvalidOperation, ValueError, ZeroDivisionError):
+        return None
+
+
+def parse_ingredient_line(line):
+    """
+    Parse one ingredient line.
+
+    Accepts the documented "name quantity measurement" format as well as
+    the common "quantity measurement name" order, e.g. "Flour 2 cups" and
+    "2 cups flour" both give ('flour', Decimal('2'), 'cups'). Lines without
+    a quantity are taken to be just a name.
+
+    Returns:
+        ParsedIngredient: The parsed line, or None if it names nothing.
+    """
+    tokens = line.strip().lstrip(LIST_MARKERS).split()
+    quantities = [parse_quantity(token) for token in tokens]
+    position = next(
+        (index for index, quantity in enumerate(quantities) if quantity is not None),
+        None,
+    )
+
+    if position is None:
+        name_tokens, quantity, unit = tokens, None, ''
+    elif position > 0:
+        name_tokens, quantity = tokens[:position], quantities[position]
+        unit = ' '.join(tokens[position + 1:])
+    else:
+        quantity, rest = quantities[0], tokens[1:]
+        if rest and rest[0].lower().rstrip('.') in UNITS:
+            unit, name_tokens = rest[0], rest[1:]
+        else:
+            unit, name_tokens = '', rest
+
+    name = normalize_ingredient_name(' '.join(name_tokens))[:100]
+    if not name:
+        return None
+    return ParsedIngredient(name, quantity, unit[:30])
+
+
+def parse_ingredients(text):
+    """
+    Parse a recipe's ingredient text, one ingredient per line.
+
+    Repeated ingredients keep their first line only.
+
+    Returns:
+        list: `ParsedIngredient` tuples in the order they were written.
+    """
+    parsed = {}
+    for line in text.splitlines():
+        ingredient = parse_ingredient_line(line)
+        if ingredient is not None and ingredient.name not in parsed:
+            parsed[ingredient.name] = ingredient
+    return list(parsed.values())
+
+
+def index_recipe_ingredients(recipe):
+    """
+    Replace the `RecipeIngredient` rows of `recipe` with its parsed text.
+
+    Missing `Ingredient` names are created in bulk, so indexing a recipe
+    costs a fixed number of queries however long its list is.
+    """
+    from recipes.models.recipes import Ingredient, RecipeIngredient
+
+    parsed = parse_ingredients(recipe.ingredients or '')
+    names = [ingredient.name for ingredient in parsed]
+
+    Ingredient.objects.bulk_create(
+        [Ingredient(name=name) for name in names], ignore_conflicts=True
+    )
+    ingredient_ids = dict(
+        Ingredient.objects.filter(name__in=names).values_list('name', 'id')
+    )
+
+    RecipeIngredient.objects.filter(recipe=recipe).delete()
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient_id=ingredient_ids[ingredient.name],
+            quantity=ingredient.quantity,
+            unit=ingredient.unit,
+            position=position,
+        )
+        for position, ingredient in enumerate(parsed)
+    ])
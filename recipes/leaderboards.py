@@ -0,0 +1,154 @@
+"""
+Leaderboards of users: the most followed, the most favourited creators and
+the most active commenters.
+
+Each leaderboard ranks users by a counter column kept on `User` (see
+`recipes.models.counters`), so recomputing one is a `LIMIT` read of an index
+rather than an aggregate over every follow, favourite or comment. The top
+`LEADERBOARD_SIZE` entries are kept in the cache as a sorted list of
+`[user_id, username, score]`, and a page showing a leaderboard only loads
+those users by primary key.
+
+Counter changes are applied to the cached list as they happen (see
+`adjust_leaderboard()`). Entries are only known for the users on the list,
+so when a user on a full list drops to its bottom, someone off the list may
+now rank higher and the entry is dropped, to be recomputed when next read.
+Concurrent changes can race on the cached list; `rebuild_leaderboards()`
+(the `update_leaderboards` command) recomputes every list and should be run
+periodically.
+"""
+from django.core.cache import cache
+from recipes.models.user import User
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Leaderboard name to the `User` counter it ranks by.
+LEADERBOARDS = {
+    'followed': 'follower_count',
+    'favourited': 'favourited_count',
+    'commenters': 'comment_count',
+}
+
+
+def leaderboard_cache_key(name):
+    return f'leaderboard:{name}'
+
+
+def _rank(entry):
+    """Return the sort key of a leaderboard entry: highest score, then username."""
+    _, username, score = entry
+    return (-score, username)
+
+
+def leaderboard_queryset(name):
+    """Return the query of the top `LEADERBOARD_SIZE` entries of a leaderboard."""
+    field_name = LEADERBOARDS[name]
+    return (
+        User.objects.order_by(f'-{field_name}', 'username')
+        .values_list('id', 'username', field_name)[:LEADERBOARD_SIZE]
+    )
+
+
+def compute_leaderboard(name):
+    """
+    Read the top `LEADERBOARD_SIZE` users of a leaderboard from its index and cache them.
+
+    Returns:
+        list: The entries, as `[user_id, username, score]`, best first.
+    """
+    entries = [list(row) for row in leaderboard_queryset(name)]
+    cache.set(leaderboard_cache_key(name), entries, LEADERBOARD_CACHE_TIMEOUT)
+    return entries
+
+
+def get_leaderboards(names, limit=LEADERBOARD_SIZE):
+    """
+    Return the top users of each of the given leaderboards, best first.
+
+    The rankings come from the cache, computing any that are missing, and
+    the users of all of them are loaded with one primary key lookup.
+
+    Args:
+        names (iterable): Keys of `LEADERBOARDS`.
+        limit (int): Maximum number of users per leaderboard, at most
+            `LEADERBOARD_SIZE`.
+
+    Returns:
+        dict: Leaderboard name to its list of users.
+    """
+    keys = {name: leaderboard_cache_key(name) for name in names}
+    cached = cache.get_many(keys.values())
+    rankings = {}
+    for name, key in keys.items():
+        entries = cached.get(key)
+        if entries is None:
+            entries = compute_leaderboard(name)
+        rankings[name] = [user_id for user_id, _, _ in entries[:limit]]
+
+    users = User.objects.order_by().in_bulk(
+        {user_id for user_ids in rankings.values() for user_id in user_ids}
+    )
+    return {
+        name: [users[user_id] for user_id in user_ids if user_id in users]
+        for name, user_ids in rankings.items()
+    }
+
+
+def get_leaderboard(name, limit=LEADERBOARD_SIZE):
+    """Return the top users of a leaderboard, best first (see `get_leaderboards()`)."""
+    return get_leaderboards([name], limit)[name]
+
+
+def adjust_leaderboard(name, user_id, delta, user=None):
+    """
+    Apply a change of `delta` to a user's counter to the cached leaderboard.
+
+    Does nothing if the leaderboard is not cached. A user not on the list
+    whose counter grew has their new value read, unless `user` is given
+    with it up to date, to see whether they join the list.
+
+    Args:
+        name (str): A key of `LEADERBOARDS`.
+        user_id (int): The user whose counter changed.
+        delta (int): Amount the counter changed by.
+        user (User, optional): An in-memory copy of the user with the
+            counter already adjusted.
+    """
+    key = leaderboard_cache_key(name)
+    entries = cache.get(key)
+    if entries is None or not delta:
+        return
+
+    full = len(entries) >= LEADERBOARD_SIZE
+    current = next((entry for entry in entries if entry[0] == user_id), None)
+    if current is not None:
+        entries.remove(current)
+        entry = [user_id, current[1], max(current[2] + delta, 0)]
+        if delta < 0 and full and entries and _rank(entry) > _rank(entries[-1]):
+            # Someone off the list may now rank higher.
+            cache.delete(key)
+            return
+    elif delta < 0:
+        return
+    else:
+        field_name = LEADERBOARDS[name]
+        if user is not None:
+            entry = [user_id, user.username, getattr(user, field_name)]
+        else:
+            row = User.objects.filter(pk=user_id).values_list('username', field_name).first()
+            if row is None:
+                return
+            entry = [user_id, *row]
+        if full and _rank(entry) > _rank(entries[-1]):
+            return
+
+    entries.append(entry)
+    entries.sort(key=_rank)
+    cache.set(key, entries[:LEADERBOARD_SIZE], LEADERBOARD_CACHE_TIMEOUT)
+
+
+def rebuild_leaderboards():
+    """Recompute every leaderboard from its index and cache it."""
+    for name in LEADERBOARDS:
+        compute_leaderboard(name)
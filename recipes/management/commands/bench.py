@@ -0,0 +1,206 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+from faker import Faker
+from recipes.middleware import QueryRecorder
+from recipes.models import Follow, Recipe, User
+from recipes.models.comment import Comment
+
+
+def percentile(quantiles, percent):
+    """Return the `percent`th percentile from `statistics.quantiles(..., n=100)`."""
+    return quantiles[percent - 1]
+
+
+class Command(BaseCommand):
+    """
+    Management command benchmarking the busiest views.
+
+    Seeds a throwaway test database with `seed --scale` from a fixed random
+    seed, so every run sees the same data, then requests each view through
+    the test client and prints latency percentiles, query counts and peak
+    memory as JSON. Compare the output of two commits to spot regressions.
+
+    The test database follows the `TEST` settings of the default database;
+    for SQLite that means an in-memory database unless `TEST['NAME']` is
+    set, so absolute timings are best compared between runs on the same
+    machine and settings.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help bench`.
+    """
+
+    help = 'Benchmarks the main views on a seeded dataset and prints the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help='Number of users to seed (recipes, follows etc. scale with it).',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Timed requests per view.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Untimed requests per view first, to fill caches.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed of the generated dataset.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the test database, and reuse its data if already seeded.',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write the JSON results to (default: standard output).',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Seed the benchmark database, run every scenario and report.
+
+        Args:
+            *args: Positional arguments passed by Django (not used here).
+            **options: Keyword arguments holding the parsed options.
+
+        Returns:
+            None
+        """
+
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2 to compute percentiles.')
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            if not User.objects.exists():
+                self.stderr.write(f"Seeding {options['users']} users...")
+                random.seed(options['seed'])
+                Faker.seed(options['seed'])
+                # Seeding progress must not mix with the JSON report on stdout.
+                call_command('seed', scale=options['users'], stdout=self.stderr)
+            results = {
+                'environment': {
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                },
+                'dataset': self.describe_dataset(options['seed']),
+                'views': self.run_scenarios(options['requests'], options['warmup']),
+            }
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = json.dumps(results, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def describe_dataset(self, seed):
+        """Return the seed and row counts of the benchmark data."""
+        return {
+            'seed': seed,
+            'users': User.objects.count(),
+            'follows': Follow.objects.count(),
+            'recipes': Recipe.objects.count(),
+            'favourites': Recipe.favourites.through.objects.count(),
+            'comments': Comment.objects.count(),
+        }
+
+    def scenarios(self):
+        """
+        Return the requests to benchmark.
+
+        The viewer follows the most users, the profile shown is the most
+        followed one and the recipe shown is the most favourited public
+        one, so each page is measured at its heaviest.
+
+        Returns:
+            tuple: The viewer and a dict of scenario name to a
+            (method, url, data) tuple.
+        """
+        viewer = User.objects.order_by('-following_count', 'pk').first()
+        popular_user = User.objects.order_by('-follower_count', 'pk').first()
+        recipe = Recipe.objects.filter(visibility='public').order_by('-favourite_count', 'pk').first()
+        if viewer is None or recipe is None:
+            raise CommandError('The benchmark dataset has no users or public recipes.')
+
+        return viewer, {
+            'feed': ('get', reverse('feed'), None),
+            'feed (following)': ('get', reverse('feed') + '?scope=following', None),
+            'recipe_browse': ('get', reverse('recipe_browse') + '?q=chicken', None),
+            'dashboard': ('get', reverse('dashboard'), None),
+            'user_profile': ('get', reverse('user_profile', args=[popular_user.username]), None),
+            'recipe_full': ('get', reverse('view_recipe', args=[recipe.pk]), None),
+            'toggle_favourite': ('post', reverse('toggle_favourite'), {'recipe_id': recipe.pk}),
+        }
+
+    def run_scenarios(self, requests, warmup):
+        """
+        Time every scenario.
+
+        Returns:
+            dict: Scenario name to its latency percentiles (milliseconds),
+            query counts and peak memory (KiB).
+        """
+        viewer, scenarios = self.scenarios()
+        client = Client()
+        client.force_login(viewer)
+
+        results = {}
+        for name, (method, url, data) in scenarios.items():
+            send = getattr(client, method)
+            for _ in range(warmup):
+                self.check_response(name, send(url, data))
+
+            timings = []
+            query_counts = []
+            for _ in range(requests):
+                with QueryRecorder() as recorder:
+                    start = time.perf_counter()
+                    response = send(url, data)
+                    timings.append((time.perf_counter() - start) * 1000)
+                self.check_response(name, response)
+                query_counts.append(recorder.count)
+
+            tracemalloc.start()
+            self.check_response(name, send(url, data))
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+            results[name] = {
+                'requests': requests,
+                'p50_ms': round(percentile(quantiles, 50), 3),
+                'p95_ms': round(percentile(quantiles, 95), 3),
+                'p99_ms': round(percentile(quantiles, 99), 3),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'queries': max(query_counts),
+                'peak_memory_kib': round(peak_memory / 1024, 1),
+            }
+            self.stderr.write(
+                f"{name}: p50 {results[name]['p50_ms']}ms, {results[name]['queries']} queries"
+            )
+        return results
+
+    def check_response(self, name, response):
+        if response.status_code != 200:
+            raise CommandError(f'{name} responded with status {response.status_code}')
@@ -0,0 +1,171 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from recipes.browse import BrowseFilters
+from recipes.helpers import (
+    get_favourite_recipes, get_follower_users, get_following_users, get_user_recipes,
+)
+from recipes.leaderboards import leaderboard_queryset
+from recipes.models import Recipe, User
+from recipes.notifications import recent_notifications, unread_notifications
+from recipes.user_search import AUTOCOMPLETE_LIMIT, prefix_filter
+from recipes.views.dashboard_view import get_trending_recipes
+from recipes.views.feed_view import feed_paginator
+from recipes.views.recipe_browse_view import browse_paginator
+from recipes.views.recipe_full_view import comments_paginator
+from recipes.views.user_browse_view import ranked_users
+
+PAGE_SIZE = 9
+
+# A table, or one of its indexes, read from start to end rather than searched.
+# Full-text lookups appear as scans of the virtual table and are left out.
+SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! VIRTUAL TABLE)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+# Rows sorted after they are read, instead of being read in index order.
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (?:\w+ )*ORDER BY'),
+    'postgresql': re.compile(r'^\s*(?:->\s*)?(?:Incremental )?Sort\b(?! Key)', re.MULTILINE),
+}
+
+# Listings expected to walk an index from its start: the index holds their
+# order, and the walk stops once a page of rows passes their filter.
+INDEX_WALKS = {
+    'feed', 'feed (popular)', 'feed (trending)', 'dashboard (trending)', 'browse',
+    'top followed users', 'top favourited creators', 'top commenters',
+}
+
+# Listings ranked by relevance to a search, which no index holds, so their
+# matches are expected to be sorted.
+RANKED_LISTINGS = {'recipe search', 'user search', 'user search (short word)'}
+
+
+def listing_queries(viewer, recipe):
+    """
+    Return the queries behind the listing pages, as built by their views.
+
+    Args:
+        viewer (User): The user the pages are shown to.
+        recipe (Recipe): A recipe whose comments are listed.
+
+    Returns:
+        dict: Listing name to queryset.
+    """
+    timeline = feed_paginator(viewer, scope='following')
+    return {
+        'feed': feed_paginator(viewer).page_queryset(),
+        'feed (popular)': feed_paginator(viewer, sort='popular').page_queryset(),
+        'feed (trending)': feed_paginator(viewer, sort='trending').page_queryset(),
+        'feed (difficulty)': feed_paginator(viewer, difficulty='Beginner').page_queryset(),
+        'feed (following)': timeline.entry_keys_queryset(),
+        'feed (following, unfanned author)': timeline.author_keys_queryset(viewer.pk),
+        'browse': browse_paginator(BrowseFilters(), viewer).page_queryset(),
+        'browse (time)': browse_paginator(BrowseFilters(time_required='30'), viewer).page_queryset(),
+        'recipe search': browse_paginator(BrowseFilters(query='chicken'), viewer).page_queryset(),
+        'dashboard (trending)': get_trending_recipes(viewer),
+        'profile recipes': get_user_recipes(viewer, viewer)[:PAGE_SIZE],
+        'favourites': get_favourite_recipes(viewer)[:PAGE_SIZE],
+        'comments': comments_paginator(recipe).page_queryset(),
+        'notifications': recent_notifications(viewer),
+        'unread notifications': unread_notifications(viewer),
+        'following': get_following_users(viewer)[:5],
+        'followers': get_follower_users(viewer)[:5],
+        'top followed users': leaderboard_queryset('followed'),
+        'top favourited creators': leaderboard_queryset('favourited'),
+        'top commenters': leaderboard_queryset('commenters'),
+        'user autocomplete (username)': User.objects.filter(prefix_filter('username_key', 'jo'))
+            .order_by('username_key', 'id')[:AUTOCOMPLETE_LIMIT],
+        'user autocomplete (name)': User.objects.filter(prefix_filter('name_key', 'jo'))
+            .order_by('name_key', 'id')[:AUTOCOMPLETE_LIMIT],
+        'user search': ranked_users('doe')[:PAGE_SIZE],
+        'user search (short word)': ranked_users('jo')[:PAGE_SIZE],
+    }
+
+
+class Command(BaseCommand):
+    """
+    Management command checking the listing pages' queries use indexes.
+
+    Runs `EXPLAIN` (`EXPLAIN QUERY PLAN` on SQLite) for the query behind
+    each listing page, prints the plans, and fails if any of them scans a
+    table or index (other than the expected `INDEX_WALKS`) or sorts its
+    rows (other than the `RANKED_LISTINGS`). Run it against a database with
+    realistic data and up-to-date statistics (`seed` and `--analyze` run
+    `ANALYZE`): without them, SQLite sorts the visible recipes of the feeds
+    rather than walking their indexes, and planners may prefer a scan of
+    nearly empty tables.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help check_query_plans`.
+    """
+
+    help = 'Fails if a listing page query scans a table or sorts its rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Username of the viewer to plan the queries for (default: the first user).',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Gather table statistics with ANALYZE before planning.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Explain every listing query and report the scans and sorts.
+
+        Args:
+            *args: Positional arguments passed by Django (not used here).
+            **options: Keyword arguments; `user` picks the viewer and
+                `analyze` refreshes the planner's statistics first.
+
+        Returns:
+            None
+
+        Raises:
+            CommandError: If there is no data to plan with, or a query
+                scans or sorts where it should read an index range.
+        """
+
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+        viewer = users.first()
+        recipe = Recipe.objects.order_by('pk').first()
+        if viewer is None or recipe is None:
+            raise CommandError('Needs at least one user and one recipe to plan queries for.')
+
+        connection = connections['default']
+        vendor = connection.vendor
+        if vendor not in SCAN_PATTERNS:
+            raise CommandError(f"Cannot read {vendor} query plans.")
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        failures = []
+        for name, queryset in listing_queries(viewer, recipe).items():
+            plan = queryset.explain()
+            problems = []
+            scanned = SCAN_PATTERNS[vendor].findall(plan)
+            if scanned and name not in INDEX_WALKS:
+                problems.append(f"SCAN of {', '.join(scanned)}")
+            if SORT_PATTERNS[vendor].search(plan) and name not in RANKED_LISTINGS:
+                problems.append('SORT')
+            status = ', '.join(problems) if problems else 'ok'
+            self.stdout.write(f'{name}: {status}')
+            if options['verbosity'] > 1 or problems:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+            if problems:
+                failures.append(name)
+
+        if failures:
+            raise CommandError(f"Scans or sorts in: {', '.join(failures)}")
+        self.stdout.write('No scans or sorts')
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.ingredients import index_recipe_ingredients
+from recipes.models import Recipe
+from recipes.pantry import invalidate_pantry_index
+
+
+class Command(BaseCommand):
+    """
+    Management command to build the ingredient index of existing recipes.
+
+    Recipes are indexed when they are saved, so this is only needed once
+    for recipes written before the index existed, or after changing how
+    ingredient lines are parsed.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help index_ingredients`.
+    """
+
+    help = 'Parses the ingredient lists of all recipes into the ingredient index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of recipes indexed per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Index every recipe, committing once per batch.
+
+        Args:
+            *args: Positional arguments passed by Django (not used here).
+            **options: Keyword arguments; `batch_size` sets the batch size.
+
+        Returns:
+            None
+        """
+
+        batch_size = options['batch_size']
+        recipes = Recipe.objects.only('id', 'ingredients').order_by('id')
+        last_id = 0
+        indexed = 0
+        while True:
+            batch = list(recipes.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                for recipe in batch:
+                    index_recipe_ingredients(recipe)
+            last_id = batch[-1].id
+            indexed += len(batch)
+        invalidate_pantry_index()
+        self.stdout.write(f'Indexed ingredients of {indexed} recipes')
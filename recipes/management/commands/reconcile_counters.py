@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from recipes.leaderboards import rebuild_leaderboards
+from recipes.models.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """
+    Management command to repair drifted denormalized counters.
+
+    Recomputes `Recipe.favourite_count`, `Recipe.comment_count`,
+    `User.follower_count`, `User.following_count`, `User.favourited_count`
+    and `User.comment_count` from the rows they count, and rewrites only
+    the rows whose stored value is wrong. The leaderboards ranked by them
+    are then recomputed.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help reconcile_counters`.
+    """
+
+    help = 'Recounts stored favourite, comment and follow counters'
+
+    def handle(self, *args, **options):
+        """
+        Execute the reconciliation and report how many rows were corrected.
+
+        Args:
+            *args: Positional arguments passed by Django (not used here).
+            **options: Keyword arguments passed by Django (not used here).
+
+        Returns:
+            None
+        """
+
+        for counter, corrected in reconcile_counters().items():
+            self.stdout.write(f'{counter}: {corrected} corrected')
+        rebuild_leaderboards()
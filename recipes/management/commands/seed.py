@@ -5,16 +5,43 @@ This command creates a small set of named fixture users and then fills up
 to ``USER_COUNT`` total users using Faker-generated data. Existing records
 are left untouched—if a create fails (e.g., due to duplicates), the error
 is swallowed and generation continues.
+
+With ``--scale N`` it instead adds N users, with follows, recipes,
+favourites and comments in proportion, for load testing. Rows are built in
+memory and written with chunked ``bulk_create`` calls, one transaction per
+chunk, and every user shares one precomputed password hash. Since bulk
+inserts send no signals, the derived data (counters, ingredient index,
+timelines and notifications) is written by the command itself.
 """
 
 
 
+import re
+from array import array
+from datetime import timedelta
+from itertools import islice
+
 from faker import Faker
-from random import randint, random, sample, choice
+from random import paretovariate, randint, random, sample, choice
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from recipes.ingredients import normalize_ingredient_name, parse_ingredients
 from recipes.models import User, Follow, Recipe, Tag
 from recipes.models.comment import Comment, Notification
+from recipes.leaderboards import rebuild_leaderboards
+from recipes.models.counters import reconcile_counters
+from recipes.models.recipes import Ingredient, RecipeIngredient
+from recipes.models.timeline import TimelineEntry
+from recipes.notifications import NotificationQueue
 from recipes.models.favourite import Favourite
+from recipes.pantry import invalidate_pantry_index
+from recipes.timeline import (
+    TIMELINE_BACKFILL_SIZE, TIMELINE_FANOUT_LIMIT, TIMELINE_SIZE, cap_timeline,
+)
+from recipes.trending import rebuild_trending_scores
 
 
 user_fixtures = [
@@ -41,6 +68,17 @@ class Command(BaseCommand):
         NUMBER_OF_TAGS (tuple): Range of number of tags each recipe will have.
         help (str): Short description shown in ``manage.py help``.
         faker (Faker): Locale-specific Faker instance used for random data.
+        notifications (NotificationQueue): Buffer writing seeded notifications in bulk.
+        SCALE_FOLLOWS (int): Number of users each user follows with ``--scale``.
+        SCALE_FOLLOW_SKEW (float): How strongly ``--scale`` follows favour a
+            few popular users (1 is uniform).
+        SCALE_RECIPES (tuple): Range of number of recipes per user with ``--scale``.
+        SCALE_COMMENTS (tuple): Range of number of comments per recipe with ``--scale``.
+        SCALE_FAVOURITE_SHAPE (float): Pareto shape of the number of favourites
+            per recipe with ``--scale``; lower gives a longer tail.
+        SCALE_MAX_FAVOURITES (int): Cap on the favourites of one recipe with ``--scale``.
+        SCALE_HISTORY_DAYS (int): Recipes are published over this many past days.
+        SCALE_BATCH_SIZE (int): Default number of rows per ``bulk_create`` chunk.
     """
 
     USER_COUNT = 200
@@ -49,6 +87,14 @@ class Command(BaseCommand):
     NUMBER_OF_RECIPES = (0,5)
     NUMBER_OF_INGREDIENTS = (2,8)
     NUMBER_OF_TAGS = (0,4)
+    SCALE_FOLLOWS = 20
+    SCALE_FOLLOW_SKEW = 3.0
+    SCALE_RECIPES = (0, 8)
+    SCALE_COMMENTS = (0, 5)
+    SCALE_FAVOURITE_SHAPE = 1.2
+    SCALE_MAX_FAVOURITES = 5000
+    SCALE_HISTORY_DAYS = 365
+    SCALE_BATCH_SIZE = 5000
     help = 'Seeds the database with sample data'
 
     def __init__(self, *args, **kwargs):
@@ -186,34 +232,48 @@ class Command(BaseCommand):
             Tag.objects.get(name="Nut-Free"),
         ]
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, metavar='USERS',
+            help='Bulk-generate this many users and proportional data for load testing.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=self.SCALE_BATCH_SIZE,
+            help='Rows per bulk insert with --scale.',
+        )
+
     def handle(self, *args, **options):
         """
         Django entrypoint for the command.
 
-        Runs the full seeding workflow and stores ``self.users`` for any
-        post-processing or debugging (not required for operation).
+        Runs the full seeding workflow, or the bulk one with ``--scale``,
+        and stores ``self.users`` for any post-processing or debugging (not
+        required for operation).
         """
-        self.create_users()
+        if options.get('scale'):
+            if options['scale'] < 2:
+                raise CommandError('--scale needs at least 2 users.')
+            self.batch_size = options['batch_size']
+            self.seed_at_scale(options['scale'])
+        else:
+            self.create_users()
         self.users = User.objects.all()
+        with connection.cursor() as cursor:
+            # Planner statistics, so listings walk their indexes (see check_query_plans).
+            cursor.execute('ANALYZE')
 
     def create_comments(self, recipe, max_comments=5):
         num_comments = randint(0, max_comments)
-        users = list(User.objects.all())
-        
+        users = self.all_users
+
         for _ in range(num_comments):
             user = choice(users)
             Comment.objects.create(
                 recipe=recipe,
-                user=choice(users),  # random user
+                user=user,
                 text=choice(self.sample_comments)
             )
-
-            if user != recipe.user:
-                Notification.objects.create(
-                    user=recipe.user,
-                    text=f"{user.username} commented on your recipe '{recipe.title}'",
-                    link=f"/recipe/{recipe.id}/"
-                )
+            self.notifications.add(Notification.COMMENT, recipe, user)
 
     def create_favourites(self, recipe, max_favourites=10):
         """
@@ -223,19 +283,13 @@ class Command(BaseCommand):
             recipe (Recipe): Recipe instance.
             max_favourites (int): Max number of favourites to add.
         """
-        users = list(User.objects.all())
+        users = self.all_users
         num_favourites = randint(0, min(max_favourites, len(users)))
         selected_users = sample(users, num_favourites)
 
         for user in selected_users:
             Favourite.objects.get_or_create(user=user, recipe=recipe)
-
-            if user != recipe.user:
-                Notification.objects.create(
-                    user=recipe.user,
-                    text=f"{user.username} favourited your recipe '{recipe.title}'",
-                    link=f"/recipe/{recipe.id}/"
-                )
+            self.notifications.add(Notification.FAVOURITE, recipe, user)
             
     def create_users(self):
         """
@@ -316,8 +370,8 @@ class Command(BaseCommand):
         Args:
             follow_amount (int): How many users each user will attempt to follow.
         """
-        all_users = User.objects.all()
-        for user in all_users:
+        self.all_users = list(User.objects.all())
+        for user in self.all_users:
             print(f"Creating followers for {user.username}", end='\r')
             self.create_follow(user, follow_amount)
 
@@ -329,9 +383,9 @@ class Command(BaseCommand):
             user (User): the user that is doing the following.
             follow_amount (int): How many users the user will attempt to follow.
         """
-        all_users = User.objects.all().exclude(pk=user.pk)
+        other_users = [other for other in self.all_users if other.pk != user.pk]
         users_to_follow = sample(
-            list(all_users),
+            other_users,
             follow_amount
         )
         for followee in users_to_follow:
@@ -346,10 +400,11 @@ class Command(BaseCommand):
             ingredient_amount (tuple): the mimimum and maximum ingredients a recipe will have.
             tag_amount (tuple): the minimum and maximum tags a recipe will have.
         """
-        all_users = User.objects.all()
-        for user in all_users:
-            print(f"Creating recipes for {user.username}", end='\r')
-            self.create_recipe(user, recipe_amount, ingredient_amount, tag_amount)
+        self.all_users = list(User.objects.all())
+        with NotificationQueue() as self.notifications:
+            for user in self.all_users:
+                print(f"Creating recipes for {user.username}", end='\r')
+                self.create_recipe(user, recipe_amount, ingredient_amount, tag_amount)
 
     def create_recipe(self, user, recipe_amount, ingredient_amount, tag_amount):
         """
@@ -397,6 +452,268 @@ class Command(BaseCommand):
             ingredients.append(choice(self.ingredients))
         return "\n".join(ingredients)
 
+    def seed_at_scale(self, user_count):
+        """
+        Bulk-generate ``user_count`` users and data in proportion to them.
+
+        Args:
+            user_count (int): Number of users to add.
+        """
+        self.user_ids, self.usernames = self.bulk_create_users(user_count)
+        self.stdout.write(f"Created {len(self.user_ids)} users")
+        follows = self.bulk_create_follows()
+        self.stdout.write(f"Created {follows} follows")
+        recipes = self.bulk_create_recipes()
+        self.stdout.write(f"Created {recipes} recipes")
+
+        entries = self.bulk_fill_timelines()
+        self.stdout.write(f"Created {entries} timeline entries")
+        for counter, corrected in reconcile_counters().items():
+            self.stdout.write(f"Counted {counter} ({corrected} rows)")
+        for user_id in User.objects.filter(timeline_size__gt=TIMELINE_SIZE).values_list('id', flat=True):
+            cap_timeline(user_id)
+        active = rebuild_trending_scores()
+        self.stdout.write(f"Scored {active} trending recipes")
+        rebuild_leaderboards()
+        invalidate_pantry_index()
+
+    def bulk_insert(self, model, rows):
+        """
+        Insert ``rows`` of ``model`` in chunks of ``self.batch_size``.
+
+        Args:
+            model (Model): The model class.
+            rows (iterable): Unsaved instances, possibly a generator.
+
+        Returns:
+            int: Number of rows inserted.
+        """
+        inserted = 0
+        for batch in chunked(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            inserted += len(batch)
+        return inserted
+
+    def bulk_create_users(self, user_count):
+        """
+        Insert ``user_count`` users sharing one password hash.
+
+        Usernames and emails carry a sequence number above the current
+        highest user id, so repeated runs never collide.
+
+        Returns:
+            tuple: An ``array`` of the new user ids and a list of their usernames.
+        """
+        password = make_password(self.DEFAULT_PASSWORD)
+        start = User.objects.aggregate(Max('id'))['id__max'] or 0
+        user_ids = array('q')
+        usernames = []
+        for batch in chunked(range(start + 1, start + user_count + 1), self.batch_size):
+            users = []
+            for number in batch:
+                first_name = self.faker.first_name()
+                last_name = self.faker.last_name()
+                user = User(
+                    username=scale_username(first_name, last_name, number),
+                    email=scale_email(first_name, last_name, number),
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=password,
+                )
+                user.set_search_keys()
+                user.set_email_hash()
+                users.append(user)
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            user_ids.extend(user.pk for user in users)
+            usernames.extend(user.username for user in users)
+        return user_ids, usernames
+
+    def bulk_create_follows(self):
+        """
+        Make every new user follow ``SCALE_FOLLOWS`` others.
+
+        Followees are drawn with a skew towards the first users created, so
+        a few users gather most followers, as on a real social site.
+
+        Returns:
+            int: Number of follows created.
+        """
+        user_ids = self.user_ids
+        follow_amount = min(self.SCALE_FOLLOWS, len(user_ids) - 1)
+
+        def follows():
+            for index, follower_id in enumerate(user_ids):
+                followees = set()
+                while len(followees) < follow_amount:
+                    other = int(len(user_ids) * random() ** self.SCALE_FOLLOW_SKEW)
+                    if other != index:
+                        followees.add(other)
+                for other in followees:
+                    yield Follow(follower_id=follower_id, followee_id=user_ids[other])
+
+        return self.bulk_insert(Follow, follows())
+
+    def bulk_create_recipes(self):
+        """
+        Insert recipes for every new user, with their tags, ingredient
+        index rows, favourites, comments and notifications.
+
+        Each chunk of recipes is written with its related rows and then
+        dropped.
+
+        Returns:
+            int: Number of recipes created.
+        """
+        now = timezone.now()
+        history = self.SCALE_HISTORY_DAYS * 24 * 60 * 60
+        created = 0
+        ingredient_ids = self.bulk_create_ingredient_names()
+
+        def new_recipes():
+            for user_id in self.user_ids:
+                for _ in range(randint(*self.SCALE_RECIPES)):
+                    title = choice(self.dishes)
+                    yield Recipe(
+                        title=title,
+                        description=self.dish_descriptions.get(title, "A delicious recipe!"),
+                        ingredients=self.select_ingredients(self.NUMBER_OF_INGREDIENTS),
+                        user_id=user_id,
+                        visibility=choice(self.visibility),
+                        difficulty=choice(self.difficulty),
+                        time_required=choice(self.time),
+                        publication_date=now - timedelta(seconds=random() * history),
+                    )
+
+        with NotificationQueue(batch_size=self.batch_size) as self.notifications:
+            for batch in chunked(new_recipes(), self.batch_size):
+                with transaction.atomic():
+                    Recipe.objects.bulk_create(batch)
+                    self.bulk_create_recipe_rows(batch, ingredient_ids)
+                created += len(batch)
+                self.stdout.write(f"Seeding recipe {created}", ending='\r')
+        self.stdout.write("Recipe seeding complete.      ")
+        return created
+
+    def bulk_create_ingredient_names(self):
+        """Insert the ingredient vocabulary and return {name: id}."""
+        names = [normalize_ingredient_name(name) for name in self.ingredients]
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name) for name in names], ignore_conflicts=True
+        )
+        return dict(Ingredient.objects.filter(name__in=names).values_list('name', 'id'))
+
+    def bulk_create_recipe_rows(self, recipes, ingredient_ids):
+        """
+        Insert the rows hanging off a chunk of just-created recipes.
+
+        Args:
+            recipes (list): Saved ``Recipe`` instances.
+            ingredient_ids (dict): Normalized ingredient name to id.
+        """
+        tag_ids = [tag.pk for tag in self.default_tags]
+        user_count = len(self.user_ids)
+        tags, lines, favourites, comments = [], [], [], []
+        for recipe in recipes:
+            tags.extend(
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                for tag_id in sample(tag_ids, randint(*self.NUMBER_OF_TAGS))
+            )
+            lines.extend(
+                RecipeIngredient(
+                    recipe_id=recipe.pk,
+                    ingredient_id=ingredient_ids[ingredient.name],
+                    quantity=ingredient.quantity,
+                    unit=ingredient.unit,
+                    position=position,
+                )
+                for position, ingredient in enumerate(parse_ingredients(recipe.ingredients))
+            )
+
+            favourite_count = min(
+                int(paretovariate(self.SCALE_FAVOURITE_SHAPE)) - 1,
+                self.SCALE_MAX_FAVOURITES, user_count,
+            )
+            for index in sample(range(user_count), favourite_count):
+                favourites.append(Favourite(recipe_id=recipe.pk, user_id=self.user_ids[index]))
+                self.notifications.add(Notification.FAVOURITE, recipe, self.scale_user(index))
+
+            for _ in range(randint(*self.SCALE_COMMENTS)):
+                index = randint(0, user_count - 1)
+                comments.append(Comment(
+                    recipe_id=recipe.pk,
+                    user_id=self.user_ids[index],
+                    text=choice(self.sample_comments),
+                ))
+                self.notifications.add(Notification.COMMENT, recipe, self.scale_user(index))
+
+        Recipe.tags.through.objects.bulk_create(tags, batch_size=self.batch_size)
+        RecipeIngredient.objects.bulk_create(lines, batch_size=self.batch_size)
+        Favourite.objects.bulk_create(favourites, batch_size=self.batch_size)
+        Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+
+    def scale_user(self, index):
+        """Return an unsaved stand-in for the ``index``-th new user, for notifications."""
+        return User(pk=self.user_ids[index], username=self.usernames[index])
+
+    def bulk_fill_timelines(self):
+        """
+        Write the following timelines of the new users.
+
+        Mirrors ``recipes.timeline.backfill_timeline()``: every follower
+        gets the latest ``TIMELINE_BACKFILL_SIZE`` recipes of each author
+        they follow that they may see, except for authors with more than
+        ``TIMELINE_FANOUT_LIMIT`` followers, whose recipes are merged in
+        when the timeline is read.
+
+        Each chunk of followers is filled with one ``INSERT ... SELECT``
+        joining their follows to the followed authors' recipes, which a
+        window function numbers per (follower, author) newest first.
+
+        Returns:
+            int: Number of timeline entries created.
+        """
+        unfanned_ids = list(
+            Follow.objects.order_by().values('followee')
+            .annotate(followers=Count('pk'))
+            .filter(followers__gt=TIMELINE_FANOUT_LIMIT)
+            .values_list('followee', flat=True)
+        )
+        follow_table = Follow._meta.db_table
+        chunk_size = max(1, self.batch_size // self.SCALE_FOLLOWS)
+
+        inserted = 0
+        for follower_ids in chunked(self.user_ids, chunk_size):
+            followers = ', '.join(['%s'] * len(follower_ids))
+            unfanned = ''
+            if unfanned_ids:
+                unfanned = f"AND f.followee_id NOT IN ({', '.join(['%s'] * len(unfanned_ids))})"
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {TimelineEntry._meta.db_table} (user_id, recipe_id, published_at)
+                    SELECT user_id, recipe_id, published_at FROM (
+                        SELECT f.follower_id AS user_id, r.id AS recipe_id,
+                               r.publication_date AS published_at,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY f.follower_id, r.user_id
+                                   ORDER BY r.publication_date DESC, r.id DESC
+                               ) AS position
+                        FROM {follow_table} f
+                        JOIN {Recipe._meta.db_table} r ON r.user_id = f.followee_id
+                        WHERE f.follower_id IN ({followers}) {unfanned}
+                          AND (r.visibility = %s OR (r.visibility = %s AND EXISTS (
+                              SELECT 1 FROM {follow_table} b
+                              WHERE b.follower_id = f.followee_id AND b.followee_id = f.follower_id
+                          )))
+                    ) latest
+                    WHERE position <= %s
+                    """,
+                    [*follower_ids, *unfanned_ids, 'public', 'friends', TIMELINE_BACKFILL_SIZE],
+                )
+                inserted += cursor.rowcount
+        return inserted
 
 
 def create_username(first_name, last_name):
@@ -425,3 +742,44 @@ def create_email(first_name, last_name):
     """
     return first_name + '.' + last_name + '@example.org'
 
+def scale_username(first_name, last_name, number):
+    """
+    Construct a unique username for ``--scale`` users.
+
+    Args:
+        first_name (str): Given name.
+        last_name (str): Family name.
+        number (int): Sequence number making the username unique.
+
+    Returns:
+        str: ``@{firstname}{lastname}{number}``, without punctuation and
+        shortened to fit the username field.
+    """
+    suffix = str(number)
+    name = re.sub(r'\W', '', (first_name + last_name).lower())
+    return '@' + name[:29 - len(suffix)] + suffix
+
+def scale_email(first_name, last_name, number):
+    """
+    Construct a unique example email address for ``--scale`` users.
+
+    Returns:
+        str: An email in the form ``{firstname}.{lastname}{number}@example.org``.
+    """
+    local_part = re.sub(r'[^\w.]', '', f'{first_name}.{last_name}'.lower())
+    return f'{local_part}{number}@example.org'
+
+def chunked(iterable, size):
+    """
+    Split ``iterable`` into lists of at most ``size`` items.
+
+    Args:
+        iterable (iterable): Items to split, possibly a generator.
+        size (int): Largest chunk size.
+
+    Yields:
+        list: The next chunk.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
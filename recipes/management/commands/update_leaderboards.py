@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from recipes.leaderboards import LEADERBOARDS, rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute the cached user leaderboards.
+
+    Follows, favourites and comments move users on the cached leaderboards
+    as they happen, but concurrent changes can race and a user can drop off
+    a list that then needs recomputing. Run this periodically (e.g. every
+    few minutes from cron) to recompute every list from its index.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help update_leaderboards`.
+    """
+
+    help = 'Recomputes the cached leaderboards of users'
+
+    def handle(self, *args, **options):
+        """
+        Rebuild the leaderboards and report which were rebuilt.
+
+        Args:
+            *args: Positional arguments passed by Django (not used here).
+            **options: Keyword arguments passed by Django (not used here).
+
+        Returns:
+            None
+        """
+
+        rebuild_leaderboards()
+        self.stdout.write(f"Rebuilt leaderboards: {', '.join(LEADERBOARDS)}")
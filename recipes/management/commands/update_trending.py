@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from recipes.trending import rebuild_trending_scores
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the trending scores of recipes.
+
+    Favourites, comments and views raise a recipe's score as they happen,
+    but unfavourites and deleted comments do not lower it. Run this
+    periodically (e.g. hourly from cron) to recompute every score from the
+    recent favourites and comments that remain; view counts are kept.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help update_trending`.
+    """
+
+    help = 'Recomputes the trending scores of recipes from recent activity'
+
+    def handle(self, *args, **options):
+        """
+        Rebuild the scores and report how many recipes have recent activity.
+
+        Args:
+            *args: Positional arguments passed by Django (not used here).
+            **options: Keyword arguments passed by Django (not used here).
+
+        Returns:
+            None
+        """
+
+        active = rebuild_trending_scores()
+        self.stdout.write(f'Rebuilt trending scores ({active} recipes with recent activity)')
@@ -0,0 +1,133 @@
+"""
+Request middleware for the recipes app.
+
+`QueryCountMiddleware` records every SQL query a request makes, reports the
+count and time in a `Server-Timing` header and a log line, and warns about
+queries repeated with different parameters (the usual sign of an N+1
+pattern, e.g. a query per recipe card).
+
+`NotificationMiddleware` collects the notifications a request sends and
+writes them in one flush once the response is ready.
+"""
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from recipes.notifications import deferred_notifications
+
+logger = logging.getLogger('recipes.queries')
+
+DUPLICATE_QUERY_THRESHOLD = 3
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def query_fingerprint(sql):
+    """Return `sql` with variable-length IN lists collapsed, for grouping."""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording the queries run through it.
+
+    Use as a context manager to record the queries of every configured
+    database connection.
+
+    Attributes:
+        queries (list): (sql, duration in seconds) pairs, in order.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._wrappers = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __enter__(self):
+        for connection in connections.all():
+            wrapper = connection.execute_wrapper(self)
+            wrapper.__enter__()
+            self._wrappers.append(wrapper)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._wrappers:
+            self._wrappers.pop().__exit__(*exc_info)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        """Total time spent in the database, in seconds."""
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self, threshold=DUPLICATE_QUERY_THRESHOLD):
+        """Return {fingerprint: times run} for queries run `threshold` times or more."""
+        fingerprints = Counter(query_fingerprint(sql) for sql, _ in self.queries)
+        return {sql: count for sql, count in fingerprints.items() if count >= threshold}
+
+
+class QueryCountMiddleware:
+    """
+    Report the SQL queries made while handling each request.
+
+    Adds a `Server-Timing: db;dur=<ms>;desc="<n> queries"` header when
+    `RECIPES_SERVER_TIMING` is true (by default only with `DEBUG`, since it
+    tells any client how much database work a page takes) and logs one
+    line per request to
+    the `recipes.queries` logger, at WARNING level when a query fingerprint
+    repeats `DUPLICATE_QUERY_THRESHOLD` times or more.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        duration_ms = recorder.duration * 1000
+        if getattr(settings, 'RECIPES_SERVER_TIMING', settings.DEBUG):
+            response.headers['Server-Timing'] = (
+                f'db;dur={duration_ms:.1f};desc="{recorder.count} queries"'
+            )
+
+        duplicates = recorder.duplicates()
+        level = logging.WARNING if duplicates else logging.DEBUG
+        logger.log(
+            level,
+            '%s %s %s queries=%d db=%.1fms duplicates=%d',
+            request.method, request.path, response.status_code,
+            recorder.count, duration_ms, sum(duplicates.values()),
+        )
+        for sql, count in duplicates.items():
+            logger.log(level, '  repeated %d times: %s', count, sql)
+        return response
+
+
+class NotificationMiddleware:
+    """
+    Write the notifications sent while handling a request in one flush.
+
+    Views call `notify()` as usual; the events are queued (see
+    `recipes.notifications.deferred_notifications`) and flushed after the
+    view returns, outside any transaction the view opened.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with deferred_notifications():
+            return self.get_response(request)
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# (model, counter column, related model, foreign key on the related model)
+COUNTERS = (
+    ('Recipe', 'favourite_count', 'Favourite', 'recipe'),
+    ('Recipe', 'comment_count', 'Comment', 'recipe'),
+    ('User', 'follower_count', 'Follow', 'followee'),
+    ('User', 'following_count', 'Follow', 'follower'),
+)
+
+
+def backfill_counters(apps, schema_editor):
+    for model_name, field_name, related_name, foreign_key in COUNTERS:
+        model = apps.get_model('recipes', model_name)
+        related = apps.get_model('recipes', related_name)
+        total = (
+            related.objects.filter(**{foreign_key: OuterRef('pk')})
+            .order_by()
+            .values(foreign_key)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        model.objects.update(**{field_name: Coalesce(Subquery(total), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_populate_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favourite_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favourite_count', '-publication_date', '-id'], name='recipe_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('recipes', '0007_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['recipe', '-created_at'], name='comment_recipe_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favourite',
+            index=models.Index(fields=['user', '-favourited_at'], name='favourite_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='notification_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-publication_date', '-id'], name='recipe_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['visibility', '-publication_date', '-id'], name='recipe_visibility_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-publication_date', '-id'], name='recipe_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['difficulty', '-publication_date', '-id'], name='recipe_difficulty_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('time_required__isnull', False)), fields=['time_required', '-publication_date', '-id'], name='recipe_time_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-follower_count', 'username'], name='user_top_followed_idx'),
+        ),
+    ]
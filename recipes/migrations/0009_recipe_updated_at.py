@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:32
+
+from django.db import migrations, models
+
+
+def copy_publication_date(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(updated_at=models.F('publication_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_publication_date, migrations.RunPython.noop),
+    ]
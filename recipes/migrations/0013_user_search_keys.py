@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:20
+
+from django.db import migrations, models
+
+
+def fill_search_keys(apps, schema_editor):
+    User = apps.get_model('recipes', 'User')
+    users = []
+    for user in User.objects.only('id', 'username', 'first_name', 'last_name').iterator():
+        user.username_key = ' '.join(user.username.removeprefix('@').lower().split())
+        user.name_key = ' '.join(f'{user.first_name} {user.last_name}'.lower().split())
+        users.append(user)
+    User.objects.bulk_update(users, ['username_key', 'name_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='username_key',
+            field=models.CharField(default='', editable=False, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=101),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username_key'], name='user_username_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['name_key'], name='user_name_key_idx'),
+        ),
+    ]
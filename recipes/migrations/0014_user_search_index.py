@@ -0,0 +1,77 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE recipes_user_fts USING fts5(
+        username, first_name, last_name,
+        content='recipes_user', content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER recipes_user_fts_insert AFTER INSERT ON recipes_user BEGIN
+        INSERT INTO recipes_user_fts(rowid, username, first_name, last_name)
+        VALUES (new.id, new.username, new.first_name, new.last_name);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_user_fts_delete AFTER DELETE ON recipes_user BEGIN
+        INSERT INTO recipes_user_fts(recipes_user_fts, rowid, username, first_name, last_name)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_user_fts_update AFTER UPDATE OF username, first_name, last_name
+    ON recipes_user BEGIN
+        INSERT INTO recipes_user_fts(recipes_user_fts, rowid, username, first_name, last_name)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name);
+        INSERT INTO recipes_user_fts(rowid, username, first_name, last_name)
+        VALUES (new.id, new.username, new.first_name, new.last_name);
+    END
+    """,
+    "INSERT INTO recipes_user_fts(recipes_user_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS recipes_user_fts_update",
+    "DROP TRIGGER IF EXISTS recipes_user_fts_delete",
+    "DROP TRIGGER IF EXISTS recipes_user_fts_insert",
+    "DROP TABLE IF EXISTS recipes_user_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX recipes_user_username_trgm_idx ON recipes_user USING GIN (username gin_trgm_ops)",
+    "CREATE INDEX recipes_user_first_name_trgm_idx ON recipes_user USING GIN (first_name gin_trgm_ops)",
+    "CREATE INDEX recipes_user_last_name_trgm_idx ON recipes_user USING GIN (last_name gin_trgm_ops)",
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS recipes_user_last_name_trgm_idx",
+    "DROP INDEX IF EXISTS recipes_user_first_name_trgm_idx",
+    "DROP INDEX IF EXISTS recipes_user_username_trgm_idx",
+]
+
+
+def _run(statements_by_vendor, schema_editor):
+    for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_user_search_index(apps, schema_editor):
+    _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}, schema_editor)
+
+
+def drop_user_search_index(apps, schema_editor):
+    _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_user_search_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_user_search_index, drop_user_search_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# (counter column, related model, foreign key on the related model to the user)
+COUNTERS = (
+    ('favourited_count', 'Favourite', 'recipe__user'),
+    ('comment_count', 'Comment', 'user'),
+)
+
+
+def backfill_counters(apps, schema_editor):
+    User = apps.get_model('recipes', 'User')
+    for field_name, related_name, foreign_key in COUNTERS:
+        related = apps.get_model('recipes', related_name)
+        total = (
+            related.objects.filter(**{foreign_key: OuterRef('pk')})
+            .order_by()
+            .values(foreign_key)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        User.objects.update(**{field_name: Coalesce(Subquery(total), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('recipes', '0014_user_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='favourited_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-favourited_count', 'username'], name='user_top_favourited_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-comment_count', 'username'], name='user_top_commenters_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:28
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_email_hashes(apps, schema_editor):
+    User = apps.get_model('recipes', 'User')
+    users = []
+    for user in User.objects.only('id', 'email').iterator():
+        user.email_hash = hashlib.md5(
+            user.email.strip().lower().encode(), usedforsecurity=False
+        ).hexdigest()
+        users.append(user)
+    User.objects.bulk_update(users, ['email_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_user_leaderboard_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_hash',
+            field=models.CharField(default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_email_hashes, migrations.RunPython.noop),
+    ]
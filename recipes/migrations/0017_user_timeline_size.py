@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_timeline_entries(apps, schema_editor):
+    User = apps.get_model('recipes', 'User')
+    TimelineEntry = apps.get_model('recipes', 'TimelineEntry')
+    total = (
+        TimelineEntry.objects.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    User.objects.update(timeline_size=Coalesce(Subquery(total), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_user_email_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='timeline_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_timeline_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_latest_actors(apps, schema_editor):
+    # Only the latest actor of existing notifications is known.
+    Notification = apps.get_model('recipes', 'Notification')
+    NotificationActor = apps.get_model('recipes', 'NotificationActor')
+    NotificationActor.objects.bulk_create(
+        (
+            NotificationActor(notification_id=notification_id, user_id=actor_id)
+            for notification_id, actor_id in Notification.objects.filter(actor__isnull=False)
+            .values_list('id', 'actor_id').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_user_timeline_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actor_links', to='recipes.notification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('notification', 'user')},
+            },
+        ),
+        migrations.RunPython(record_latest_actors, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from .user import *
-from .recipes import Recipe, Tag
+from .recipes import Recipe, Tag, Ingredient, RecipeIngredient
 from .follow import *
 from .favourite import *
-from .comment import Comment, Notification
+from .comment import Comment, Notification, NotificationActor
+from .timeline import TimelineEntry
@@ -23,6 +23,9 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipe', '-created_at', '-id'], name='comment_recipe_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user} on {self.recipe}"
@@ -30,19 +33,77 @@ class Comment(models.Model):
 class Notification(models.Model):
     """
     Model representing receiving notifications from likes and comments by a user
-    
+
+    Notifications about the same recipe are coalesced: while one is unread,
+    further favourites or comments update it ("X and 41 others favourited
+    your recipe") instead of adding rows (see `recipes.notifications`).
+
     Attributes: 
         user (User): The user who is gave the notification
         text (str): The actual notification
         link (URL): The link to the recipe
         is_read (bool): Whether the notification has been read
         created_at (datetime): The time the notification was created
+        kind (str): The kind of event, e.g. 'favourite' or 'comment'
+        recipe (Recipe): The recipe the events happened on
+        actor (User): The user behind the latest event
+        actor_count (int): The number of distinct users behind the events
+            coalesced into the notification (see `NotificationActor`)
+        updated_at (datetime): The time of the latest event
     """
+    FAVOURITE = 'favourite'
+    COMMENT = 'comment'
+    KIND_CHOICES = [
+        (FAVOURITE, 'Favourite'),
+        (COMMENT, 'Comment'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
     text = models.CharField(max_length=255)
     link = models.URLField(blank=True, null=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, blank=True)
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, null=True, blank=True, related_name="notifications"
+    )
+    actor = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    actor_count = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-updated_at', '-id'], name='notification_recent_idx'),
+            models.Index(
+                fields=['user', 'recipe', 'kind'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Notification for {self.user.username}: {self.text}"
+
+
+class NotificationActor(models.Model):
+    """
+    Model representing a user behind the events coalesced into a notification.
+
+    Each user is recorded once per notification, so someone favouriting,
+    unfavouriting and favouriting again, or commenting twice, counts as
+    one actor.
+
+    Attributes:
+        notification (Notification): The coalesced notification
+        user (User): A user who acted on the notification's recipe
+    """
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="actor_links"
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        """Model options."""
+        unique_together = ('notification', 'user')
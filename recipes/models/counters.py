@@ -0,0 +1,111 @@
+from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+class CounterFieldsMixin(models.Model):
+    """
+    Mixin for models storing denormalized counts of related rows.
+
+    Counter columns, and other columns only ever changed with atomic `F()`
+    updates (see `adjust_counter()`), are left out of a regular `save()`
+    of an existing row. Otherwise saving an instance loaded before a concurrent
+    favourite or follow would write the stale count back.
+
+    Attributes:
+        counter_fields (tuple): Names of the atomically updated columns.
+    """
+
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """Save the instance without overwriting its counter columns."""
+
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+def adjust_counter(model, pk, field_name, delta, instance=None, **changes):
+    """
+    Atomically add `delta` to a counter column, never going below zero.
+
+    Args:
+        model (type): The model owning the counter.
+        pk: Primary key of the row to update.
+        field_name (str): Name of the counter column.
+        delta (int): Amount to add; negative to decrement.
+        instance (Model, optional): An in-memory copy of the row to keep
+            in step with the database.
+        **changes: Other columns to set in the same UPDATE, such as a
+            modification time.
+    """
+
+    model.objects.filter(pk=pk).update(
+        **{field_name: Greatest(F(field_name) + delta, 0)}, **changes
+    )
+    if instance is not None:
+        setattr(instance, field_name, max(getattr(instance, field_name) + delta, 0))
+        for name, value in changes.items():
+            if hasattr(value, 'resolve_expression'):
+                # Only the database knows the result; load it when next read.
+                instance.__dict__.pop(name, None)
+            else:
+                setattr(instance, name, value)
+
+
+# (model, counter column, related model, foreign key on the related model)
+COUNTERS = (
+    ('Recipe', 'favourite_count', 'Favourite', 'recipe'),
+    ('Recipe', 'comment_count', 'Comment', 'recipe'),
+    ('User', 'follower_count', 'Follow', 'followee'),
+    ('User', 'following_count', 'Follow', 'follower'),
+    ('User', 'favourited_count', 'Favourite', 'recipe__user'),
+    ('User', 'comment_count', 'Comment', 'user'),
+    ('User', 'timeline_size', 'TimelineEntry', 'user'),
+)
+
+
+def reconcile_counters():
+    """
+    Recount every counter column and fix the rows that have drifted.
+
+    Counters only drift when rows are changed behind the ORM's back (raw
+    SQL, `QuerySet.update()` on a foreign key, restored backups), so this
+    is a repair tool rather than part of normal operation.
+
+    Returns:
+        dict: Number of corrected rows keyed by `'<Model>.<counter>'`.
+    """
+
+    from django.apps import apps
+
+    corrected = {}
+    for model_name, field_name, related_name, foreign_key in COUNTERS:
+        model = apps.get_model('recipes', model_name)
+        related = apps.get_model('recipes', related_name)
+        actual = Coalesce(
+            Subquery(
+                related.objects.filter(**{foreign_key: OuterRef('pk')})
+                .order_by()
+                .values(foreign_key)
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+        drifted = (
+            model.objects.annotate(actual=actual)
+            .exclude(**{field_name: F('actual')})
+            .values('pk')
+        )
+        corrected[f'{model_name}.{field_name}'] = (
+            model.objects.filter(pk__in=drifted).update(**{field_name: actual})
+        )
+    return corrected
@@ -10,6 +10,9 @@ class Favourite(models.Model):
     class Meta:
         unique_together = ('user', 'recipe')
         ordering = ['-favourited_at']
+        indexes = [
+            models.Index(fields=['user', '-favourited_at'], name='favourite_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} favourited {self.recipe.title}"
@@ -1,15 +1,58 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Q, Value
 from django.utils import timezone
+from recipes.ingredients import normalize_ingredient_name
+from recipes.search import get_search_backend
+from .counters import CounterFieldsMixin
+from .favourite import Favourite
 from .user import User
 
 
 class Ingredient(models.Model):
+    """
+    Model representing an ingredient name shared between recipes.
+
+    Attributes:
+        name (str): The normalized (lower-case, punctuation free) name.
+    """
     name = models.CharField(max_length=100, unique=True)
 
     def __str__(self):
         return self.name
 
 
+class RecipeIngredient(models.Model):
+    """
+    Model linking a recipe to an ingredient parsed from its ingredient list.
+
+    Rows are rebuilt from `Recipe.ingredients` whenever the recipe is saved
+    (see `recipes.ingredients.index_recipe_ingredients()`).
+
+    Attributes:
+        recipe (Recipe): The recipe using the ingredient.
+        ingredient (Ingredient): The ingredient used.
+        quantity (Decimal): The amount used, if one was given.
+        unit (str): The measurement the quantity is in, if any.
+        position (int): The line the ingredient was written on.
+    """
+    recipe = models.ForeignKey(
+        'Recipe', on_delete=models.CASCADE, related_name='ingredient_lines')
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, related_name='recipe_lines')
+    quantity = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True)
+    unit = models.CharField(max_length=30, blank=True)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        """Model options."""
+        ordering = ['position']
+        unique_together = ('ingredient', 'recipe')
+
+    def __str__(self):
+        return f"{self.ingredient} in {self.recipe}"
+
+
 class Tag(models.Model):
     """
     Model representing a tag for the recipes created by a user.
@@ -23,7 +66,109 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    """Queryset methods shared by every recipe listing."""
+
+    def visible_to(self, viewer):
+        """
+        Restrict the queryset to recipes `viewer` is allowed to see.
+
+        Public recipes are visible to everyone, friends-only recipes to
+        their owner and users in a mutual follow with the owner, and
+        private recipes to their owner alone. The viewer's friends are
+        resolved once (see `User.get_friend_ids()`) and applied as a plain
+        IN filter, so no per-row subqueries are needed.
+
+        Args:
+            viewer (User): The user viewing the recipes. May be None or an
+                anonymous user, who only sees public recipes.
+        """
+        if viewer is None or not viewer.is_authenticated:
+            return self.filter(visibility='public')
+        return self.filter(
+            Q(visibility='public') |
+            Q(user=viewer) |
+            Q(visibility='friends', user_id__in=sorted(viewer.get_friend_ids()))
+        )
+
+    def search(self, query):
+        """
+        Restrict the queryset to recipes matching the words of `query`.
+
+        Uses the database's full-text index (see `recipes.search`) and
+        annotates each recipe with `search_rank` and `search_snippet`.
+        Results are not reordered; order by `search_rank` for relevance.
+        """
+        return get_search_backend(self.db).search(self, query)
+
+    def with_ingredients(self, include=(), exclude=()):
+        """
+        Restrict the queryset by the ingredients recipes use.
+
+        Each name is normalized like parsed ingredient lines and looked up
+        through the (ingredient, recipe) index on `RecipeIngredient`, so no
+        ingredient text is scanned.
+
+        Args:
+            include (iterable): Names of ingredients a recipe must all use.
+            exclude (iterable): Names of ingredients a recipe must not use.
+        """
+        queryset = self
+        for name in include:
+            queryset = queryset.filter(self._uses_ingredient(name))
+        for name in exclude:
+            queryset = queryset.filter(~self._uses_ingredient(name))
+        return queryset
+
+    @staticmethod
+    def _uses_ingredient(name):
+        return Exists(RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk'),
+            ingredient__name=normalize_ingredient_name(name),
+        ))
+
+    def trending(self):
+        """
+        Order the recipes by trending score, highest first.
+
+        The order is read from `recipe_trending_idx`, so the top recipes
+        cost an index range read; see `recipes.trending`.
+        """
+        return self.order_by('-trending_score', '-id')
+
+    def touch(self):
+        """Mark the recipes as changed, so their cached cards and pages are rendered again."""
+        now = timezone.now()
+        return self.update(updated_at=now, modified_at=now)
+
+    def with_viewer_state(self, viewer):
+        """
+        Annotate favourite information for rendering recipe cards.
+
+        Adds `viewer_has_favourited` (whether `viewer` favourited the
+        recipe) to every row using a correlated subquery, so a page of
+        cards costs one query instead of one per card.
+        `Recipe.is_favourited()` uses the annotation when present; the
+        favourite count itself is stored on the row.
+
+        Args:
+            viewer (User): The user viewing the page. May be None or an
+                anonymous user, in which case nothing is favourited.
+        """
+        if viewer is None or not viewer.is_authenticated:
+            return self.annotate(
+                favourite_viewer_id=Value(None, output_field=models.BigIntegerField()),
+                viewer_has_favourited=Value(False),
+            )
+        return self.annotate(
+            favourite_viewer_id=Value(viewer.pk, output_field=models.BigIntegerField()),
+            viewer_has_favourited=Exists(
+                Favourite.objects.filter(recipe=OuterRef('pk'), user=viewer)
+            ),
+        )
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     """
     Model representing a recipe created by a user.
 
@@ -33,6 +178,14 @@ class Recipe(models.Model):
         ingredients (str): Ingredients list stored as text (one per line).
         user (User): The user who created this recipe.
         publication_date (datetime): Timestamp when the recipe was published.
+        favourite_count (int): Number of users who favourited the recipe.
+        comment_count (int): Number of comments on the recipe.
+        updated_at (datetime): When the recipe or its tags last changed.
+        modified_at (datetime): When anything shown on the recipe's page
+            last changed: the recipe, its tags, comments or favourites.
+        trending_score (float): Time-decayed activity, in log space (see
+            `recipes.trending`).
+        view_score (float): The part of `trending_score` due to page views.
     """
     DIFFICULTY_CHOICES = [
         ('Beginner', 'Beginner'),
@@ -57,6 +210,12 @@ class Recipe(models.Model):
         User, on_delete=models.CASCADE, related_name='recipes')
     id = models.AutoField(primary_key=True)
     tags = models.ManyToManyField(Tag, blank=True)
+    indexed_ingredients = models.ManyToManyField(
+        Ingredient,
+        related_name="recipes",
+        through="RecipeIngredient",
+        blank=True
+    )
     time_required = models.CharField(
         max_length=10, 
         blank=True, 
@@ -79,19 +238,92 @@ class Recipe(models.Model):
         choices=DIFFICULTY_CHOICES,
         default='Beginner'
     )
+    favourite_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    modified_at = models.DateTimeField(auto_now=True)
+    trending_score = models.FloatField(default=0, editable=False)
+    view_score = models.FloatField(default=0, editable=False)
+
+    counter_fields = ('favourite_count', 'comment_count', 'trending_score', 'view_score')
+    # Columns deciding which timelines hold the recipe, and where.
+    timeline_fields = ('user_id', 'visibility', 'publication_date')
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         """Model options."""
         ordering = ['-publication_date']
         verbose_name = 'Recipe'
         verbose_name_plural = 'Recipes'
+        indexes = [
+            models.Index(
+                fields=['-favourite_count', '-publication_date', '-id'],
+                name='recipe_popularity_idx',
+            ),
+            models.Index(fields=['-publication_date', '-id'], name='recipe_recent_idx'),
+            models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+            models.Index(
+                fields=['visibility', '-publication_date', '-id'],
+                name='recipe_visibility_recent_idx',
+            ),
+            models.Index(
+                fields=['user', '-publication_date', '-id'],
+                name='recipe_user_recent_idx',
+            ),
+            models.Index(
+                fields=['difficulty', '-publication_date', '-id'],
+                name='recipe_difficulty_recent_idx',
+            ),
+            models.Index(
+                fields=['time_required', '-publication_date', '-id'],
+                condition=models.Q(time_required__isnull=False),
+                name='recipe_time_recent_idx',
+            ),
+        ]
 
     def __str__(self):
         """Return string representation of the recipe."""
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Load a recipe, remembering the stored values of its `timeline_fields`."""
+        recipe = super().from_db(db, field_names, values)
+        if set(cls.timeline_fields).issubset(field_names):
+            recipe._stored_timeline_values = recipe.timeline_values()
+        return recipe
+
+    def timeline_values(self):
+        """Return the values of the recipe's `timeline_fields`."""
+        return tuple(getattr(self, name) for name in self.timeline_fields)
+
+    def is_visible_to(self, viewer):
+        """Return whether `viewer` may see this recipe."""
+        if self.visibility == 'public':
+            return True
+        if viewer is None or not viewer.is_authenticated:
+            return False
+        if self.user_id == viewer.id:
+            return True
+        return self.visibility == 'friends' and self.user_id in viewer.get_friend_ids()
+
     def is_favourited(self, user):
+        """Return whether `user` has favourited this recipe."""
+        if hasattr(self, 'viewer_has_favourited') and self.favourite_viewer_id == user.id:
+            return self.viewer_has_favourited
         return self.favourites.filter(id=user.id).exists()
 
+    @property
+    def cache_version(self):
+        """Version stamp of the recipe's viewer-independent rendering."""
+        return int(self.updated_at.timestamp() * 1_000_000)
+
+    @property
+    def page_version(self):
+        """Version stamp of the recipe's page, comments and favourites included."""
+        return int(self.modified_at.timestamp() * 1_000_000)
+
     def get_favourite_count(self):
-        return self.favourites.count()
+        """Return the number of users who have favourited this recipe."""
+        return self.favourite_count
@@ -0,0 +1,37 @@
+from django.db import models
+from .user import User
+
+
+class TimelineEntry(models.Model):
+    """
+    Model representing a recipe delivered to a user's following timeline.
+
+    Entries are written when a followed user publishes a recipe (see
+    `recipes.timeline`), so the following feed is read from one user's
+    slice of this table instead of being assembled from every recipe.
+
+    Attributes:
+        user (User): The user whose timeline the entry belongs to.
+        recipe (Recipe): The delivered recipe.
+        published_at (datetime): The recipe's publication date, copied so
+            a timeline can be read in order from the index alone.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='timeline_entries')
+    recipe = models.ForeignKey(
+        'Recipe', on_delete=models.CASCADE, related_name='timeline_entries')
+    published_at = models.DateTimeField()
+
+    class Meta:
+        """Model options."""
+        ordering = ['-published_at', '-recipe']
+        unique_together = ('user', 'recipe')
+        indexes = [
+            models.Index(
+                fields=['user', '-published_at', '-recipe'],
+                name='timeline_user_recent_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe} in {self.user}'s timeline"
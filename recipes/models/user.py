@@ -1,12 +1,59 @@
+from django.core.cache import cache
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from libgravatar import Gravatar
+from django.urls import reverse
+from recipes.avatars import avatar_size, email_hash, gravatar_url
+from .counters import CounterFieldsMixin
 from .follow import Follow
 
-class User(AbstractUser, models.Model):
+FRIEND_IDS_CACHE_TIMEOUT = 60 * 60
+
+# Functions of a user id returning a cache key read on most of that user's
+# pages; `User.cached()` loads them all with one round trip.
+USER_CACHE_KEYS = []
+
+_MISSING = object()
+
+
+def user_cache_key(key_function):
+    """Register `key_function` in `USER_CACHE_KEYS` and return it."""
+
+    USER_CACHE_KEYS.append(key_function)
+    return key_function
+
+
+@user_cache_key
+def friend_ids_cache_key(user_id):
+    """Return the cache key holding the mutual-follow ids of a user."""
+
+    return f'friend_ids:{user_id}'
+
+
+def invalidate_friend_ids(*user_ids):
+    """
+    Forget the cached mutual-follow ids of the given users.
+
+    Called whenever a follow relation between two users is created or
+    removed, so the next visibility check recomputes the set.
+    """
+
+    cache.delete_many([friend_ids_cache_key(user_id) for user_id in user_ids])
+
+
+def search_key(text):
+    """Return the lower-case form of `text` that user prefix searches compare."""
+
+    return ' '.join(text.lower().split())
+
+
+class User(CounterFieldsMixin, AbstractUser):
     """Model used for user authentication, and team member related information."""
 
+    counter_fields = (
+        'follower_count', 'following_count', 'favourited_count', 'comment_count', 'timeline_size',
+    )
+
     username = models.CharField(
         max_length=30,
         unique=True,
@@ -18,36 +65,123 @@ class User(AbstractUser, models.Model):
     first_name = models.CharField(max_length=50, blank=False)
     last_name = models.CharField(max_length=50, blank=False)
     email = models.EmailField(unique=True, blank=False)
+    follower_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    favourited_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    timeline_size = models.PositiveIntegerField(default=0, editable=False)
+    username_key = models.CharField(max_length=30, default='', editable=False)
+    name_key = models.CharField(max_length=101, default='', editable=False)
+    email_hash = models.CharField(max_length=32, default='', editable=False)
 
 
     class Meta:
         """Model options."""
 
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['-follower_count', 'username'], name='user_top_followed_idx'),
+            models.Index(fields=['-favourited_count', 'username'], name='user_top_favourited_idx'),
+            models.Index(fields=['-comment_count', 'username'], name='user_top_commenters_idx'),
+            models.Index(fields=['username_key'], name='user_username_key_idx'),
+            models.Index(fields=['name_key'], name='user_name_key_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Load a user, remembering their stored username."""
+
+        user = super().from_db(db, field_names, values)
+        if 'username' in field_names:
+            user._stored_username = user.username
+        return user
 
     def full_name(self):
         """Return a string containing the user's full name."""
 
         return f'{self.first_name} {self.last_name}'
 
-    def gravatar(self, size=120):
+    def set_search_keys(self):
+        """
+        Fill in the lower-case keys searched by user autocompletion.
+
+        `username_key` is the username without its `@`, and `name_key` the
+        full name; both are indexed so prefix searches read an index range.
+        """
+
+        self.username_key = search_key(self.username.removeprefix('@'))
+        self.name_key = search_key(self.full_name())
+
+    def set_email_hash(self):
+        """Fill in the Gravatar hash of the user's email, used by avatar URLs."""
+
+        self.email_hash = email_hash(self.email)
+
+    def gravatar(self, size=120, default='mp'):
         """Return a URL to the user's gravatar."""
 
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        return gravatar_url(self.email_hash or email_hash(self.email), size, default)
 
     def mini_gravatar(self):
         """Return a URL to a miniature version of the user's gravatar."""
         
         return self.gravatar(size=60)
 
+    def avatar(self, size=120):
+        """Return a URL to the user's identicon, served by this site."""
+
+        return reverse('avatar', args=[self.email_hash or email_hash(self.email), avatar_size(size)])
+
     def get_followers(self):
         """Returns the number of users following this user."""
 
-        return Follow.objects.filter(followee=self).count()
+        return self.follower_count
 
     def get_following(self):
         """Returns the number of users this user is following."""
 
-        return Follow.objects.filter(follower=self).count()
\ No newline at end of file
+        return self.following_count
+
+    def cached(self, key, default=None):
+        """
+        Return the cache entry `key` about this user, or `default`.
+
+        The first call loads every key of `USER_CACHE_KEYS` for the user
+        with one `get_many`, so that the handful of entries a page reads
+        about its viewer cost one round trip to the shared cache (one query
+        with the database cache) rather than one each. A loaded entry is
+        used once; reading it again goes back to the cache.
+        """
+
+        if '_cached_entries' not in self.__dict__:
+            keys = [key_function(self.pk) for key_function in USER_CACHE_KEYS]
+            found = cache.get_many(keys)
+            self._cached_entries = {key: found.get(key, _MISSING) for key in keys}
+        value = self._cached_entries.pop(key, None)
+        if value is None:
+            return cache.get(key, default)
+        return default if value is _MISSING else value
+
+    def get_friend_ids(self):
+        """
+        Return the ids of users who follow this user and are followed back.
+
+        The set is computed with a single query, kept in the shared cache
+        until a follow involving this user changes (and read with the
+        user's other entries, see `cached()`), and memoised on the
+        instance so repeated checks within a request are free.
+        """
+
+        if '_friend_ids' not in self.__dict__:
+            key = friend_ids_cache_key(self.pk)
+            friend_ids = self.cached(key)
+            if friend_ids is None:
+                friend_ids = frozenset(
+                    Follow.objects.filter(
+                        follower=self,
+                        followee__following__followee=self,
+                    ).values_list('followee_id', flat=True)
+                )
+                cache.set(key, friend_ids, FRIEND_IDS_CACHE_TIMEOUT)
+            self._friend_ids = friend_ids
+        return self._friend_ids
\ No newline at end of file
@@ -0,0 +1,328 @@
+"""
+Notification delivery and cached per-user unread counts.
+
+A popular recipe can be favourited or commented on thousands of times, so
+events are not written as one row each. They go through a
+`NotificationQueue`, which coalesces them per (recipient, recipe, kind) and
+flushes them in bulk: events for a recipe whose notification is still
+unread and younger than `NOTIFICATION_COALESCE_WINDOW` update it in place
+("janedoe and 41 others favourited your recipe"), the rest become new rows
+created with `bulk_create`. The users behind a notification are recorded in
+`NotificationActor` rows, so "others" counts people rather than events.
+
+Requests send their events with `notify()`, which queues them until the
+request has been handled (see `NotificationMiddleware`), so a request
+raising several events writes them in one flush. A flush costs a fixed
+number of queries, so a request raising a single event pays for a whole
+flush: the queue saves rows and writes under load, not queries per event.
+
+The navbar shows the unread count on every page. Rather than counting rows
+on each request, the count is cached per user and kept up to date as
+notifications are created and read, so a warm badge costs no queries.
+Entries expire after `UNREAD_COUNT_CACHE_TIMEOUT` seconds, which bounds any
+drift from races between a recount and a concurrent update. Both per-user
+entries are read along with the user's other ones (see `User.cached()`).
+
+Each user also has a cached notifications version, a stamp replaced
+whenever one of their notifications is created, coalesced, read or
+deleted. Pages that show the notification menu put it in their ETag.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from threading import local
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from recipes.models.comment import Notification, NotificationActor
+from recipes.models.user import user_cache_key
+
+UNREAD_COUNT_CACHE_TIMEOUT = 3600
+NOTIFICATIONS_VERSION_CACHE_TIMEOUT = 60 * 60 * 24
+RECENT_NOTIFICATIONS_LIMIT = 50
+NOTIFICATION_COALESCE_WINDOW = timedelta(days=1)
+NOTIFICATION_BATCH_SIZE = 500
+
+_deferred = local()
+
+NOTIFICATION_VERBS = {
+    Notification.FAVOURITE: 'favourited',
+    Notification.COMMENT: 'commented on',
+}
+
+
+@user_cache_key
+def unread_count_cache_key(user_id):
+    return f'unread_notifications:{user_id}'
+
+
+def unread_notifications(user):
+    """Return the unread notifications of `user`."""
+    return Notification.objects.filter(user=user, is_read=False)
+
+
+def get_unread_count(user):
+    """Return the number of unread notifications of `user`."""
+    key = unread_count_cache_key(user.pk)
+    count = user.cached(key)
+    if count is None:
+        count = unread_notifications(user).count()
+        cache.add(key, count, UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Add `delta` to a cached unread count, if it is cached.
+
+    A count that is not cached is left alone; it will be counted from the
+    database the next time it is read.
+    """
+    key = unread_count_cache_key(user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        return
+    if count < 0:
+        cache.delete(key)
+
+
+@user_cache_key
+def notifications_version_cache_key(user_id):
+    return f'notifications_version:{user_id}'
+
+
+def get_notifications_version(user):
+    """
+    Return a stamp that changes whenever the notifications of `user` do.
+
+    A version that is not cached reads as 0. That differs from any stamp
+    handed out before, so an evicted entry can only cause a page to be
+    rendered again, never a stale one to be reused.
+    """
+    return user.cached(notifications_version_cache_key(user.pk), 0)
+
+
+def bump_notifications_version(user_ids):
+    """Give the users `user_ids` a new notifications version."""
+    stamp = time.time_ns()
+    cache.set_many(
+        {notifications_version_cache_key(user_id): stamp for user_id in user_ids},
+        NOTIFICATIONS_VERSION_CACHE_TIMEOUT,
+    )
+
+
+def mark_notification_read(notification):
+    """
+    Mark `notification` as read, updating the cached unread count.
+
+    The row is only updated if it is still unread, so reading the same
+    notification twice (e.g. from two tabs) decrements the count once.
+    """
+    updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+    notification.is_read = True
+    if updated:
+        adjust_unread_count(notification.user_id, -1)
+        bump_notifications_version([notification.user_id])
+
+
+def recent_notifications(user):
+    """Return a lazy queryset of the latest notifications of `user`."""
+    return user.notifications.order_by('-updated_at', '-id')[:RECENT_NOTIFICATIONS_LIMIT]
+
+
+def notification_text(kind, actor, actor_count, recipe):
+    """Return the message of a notification, e.g. "janedoe and 2 others favourited ..."."""
+    others = actor_count - 1
+    if others == 0:
+        who = actor.username
+    elif others == 1:
+        who = f"{actor.username} and 1 other"
+    else:
+        who = f"{actor.username} and {others} others"
+    text = f"{who} {NOTIFICATION_VERBS[kind]} your recipe '{recipe.title}'"
+    return text[:Notification._meta.get_field('text').max_length]
+
+
+class PendingNotification:
+    """
+    Events for one (recipient, recipe, kind) waiting in a `NotificationQueue`.
+
+    Attributes:
+        recipe (Recipe): The recipe the events happened on.
+        actor (User): The user behind the latest event.
+        actor_ids (set): The ids of the users behind the events.
+    """
+
+    def __init__(self, recipe, actor):
+        self.recipe = recipe
+        self.actor = actor
+        self.actor_ids = {actor.pk}
+
+
+class NotificationQueue:
+    """
+    Buffer of notification events, written in bulk.
+
+    Use as a context manager, which flushes on a clean exit, or call
+    `flush()` directly. The queue also flushes itself once it holds
+    `batch_size` distinct notifications.
+
+    Each user counts once per notification however many events they are
+    behind, so commenting twice does not read as "and 1 other".
+    """
+
+    def __init__(self, batch_size=NOTIFICATION_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, kind, recipe, actor):
+        """
+        Queue a notification to the author of `recipe` that `actor` acted on it.
+
+        Args:
+            kind (str): `Notification.FAVOURITE` or `Notification.COMMENT`.
+            recipe (Recipe): The recipe favourited or commented on.
+            actor (User): The user who did it. Authors are not notified of
+                their own actions.
+        """
+        if actor.pk == recipe.user_id:
+            return
+        key = (recipe.user_id, recipe.pk, kind)
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = PendingNotification(recipe, actor)
+        else:
+            pending.actor = actor
+            pending.actor_ids.add(actor.pk)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the queued events to the database and empty the queue.
+
+        Costs a fixed number of queries per batch: one to find the open
+        notifications to coalesce into, one bulk insert of new notifications
+        and one of their actors, and, when coalescing, one to count the
+        distinct actors and one bulk update.
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        now = timezone.now()
+        created = []
+        with transaction.atomic():
+            open_notifications = Notification.objects.select_for_update().filter(
+                user_id__in={user_id for user_id, _, _ in pending},
+                recipe_id__in={recipe_id for _, recipe_id, _ in pending},
+                kind__in={kind for _, _, kind in pending},
+                is_read=False,
+                created_at__gte=now - NOTIFICATION_COALESCE_WINDOW,
+            ).order_by('created_at', 'id')
+            existing = {
+                (notification.user_id, notification.recipe_id, notification.kind): notification
+                for notification in open_notifications
+            }
+
+            delivered, updated = [], []
+            for key, event in pending.items():
+                notification = existing.get(key)
+                if notification is None:
+                    notification = Notification(
+                        user_id=event.recipe.user_id,
+                        recipe=event.recipe,
+                        kind=key[2],
+                        link=f"/recipe/{event.recipe.pk}/",
+                        actor_count=len(event.actor_ids),
+                        text=notification_text(key[2], event.actor, len(event.actor_ids), event.recipe),
+                    )
+                    created.append(notification)
+                else:
+                    updated.append((notification, event))
+                notification.actor = event.actor
+                notification.updated_at = now
+                delivered.append((notification, event))
+            Notification.objects.bulk_create(created, batch_size=self.batch_size)
+
+            # Users already recorded on an open notification are skipped.
+            NotificationActor.objects.bulk_create(
+                [
+                    NotificationActor(notification=notification, user_id=actor_id)
+                    for notification, event in delivered
+                    for actor_id in event.actor_ids
+                ],
+                ignore_conflicts=True,
+                batch_size=self.batch_size,
+            )
+
+            if updated:
+                actor_counts = dict(
+                    NotificationActor.objects.filter(
+                        notification__in=[notification for notification, _ in updated]
+                    )
+                    .order_by()
+                    .values('notification')
+                    .annotate(total=Count('pk'))
+                    .values_list('notification', 'total')
+                )
+                for notification, event in updated:
+                    notification.actor_count = actor_counts[notification.pk]
+                    notification.text = notification_text(
+                        notification.kind, event.actor, notification.actor_count, event.recipe
+                    )
+                Notification.objects.bulk_update(
+                    [notification for notification, _ in updated],
+                    ['actor', 'actor_count', 'text', 'updated_at'],
+                    batch_size=self.batch_size,
+                )
+
+        # bulk_create() sends no post_save signals to keep the badge in step.
+        for user_id, count in Counter(notification.user_id for notification in created).items():
+            adjust_unread_count(user_id, count)
+        bump_notifications_version({user_id for user_id, _, _ in pending})
+
+
+@contextmanager
+def deferred_notifications():
+    """
+    Queue the events sent with `notify()` inside the block, and flush them once at its end.
+
+    The events are dropped if the block raises.
+    """
+    previous = getattr(_deferred, 'queue', None)
+    _deferred.queue = NotificationQueue()
+    try:
+        with _deferred.queue as queue:
+            yield queue
+    finally:
+        _deferred.queue = previous
+
+
+def notify(kind, recipe, actor):
+    """
+    Notify the author of `recipe` of one event.
+
+    Inside `deferred_notifications()` the event joins that block's queue;
+    otherwise it is written straight away.
+    """
+    queue = getattr(_deferred, 'queue', None)
+    if queue is not None:
+        queue.add(kind, recipe, actor)
+        return
+    with NotificationQueue() as queue:
+        queue.add(kind, recipe, actor)
@@ -0,0 +1,315 @@
+"""
+Pagination for querysets: keyset (cursor) pagination, and page-number
+paginators that are given their total or never need it.
+
+Offset pagination gets slower the deeper a user scrolls, because the database
+has to walk past every skipped row. Keyset pagination instead remembers the
+sort key of the last row shown and asks for the rows strictly after it, so
+every page costs the same index range read regardless of its depth.
+"""
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded for the paginator's ordering."""
+
+
+class CursorPage(Sequence):
+    """
+    A single page of results produced by `CursorPaginator`.
+
+    Behaves like Django's `Page`: it can be iterated, indexed and measured,
+    and exposes `has_next()` / `has_previous()`. Instead of page numbers it
+    carries opaque `next_cursor` and `previous_cursor` tokens.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        """Cursor for the page after this one, or None on the last page."""
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        """Cursor for the page before this one, or None on the first page."""
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], reverse=True)
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by the values of its sort key rather than by offset.
+
+    Attributes:
+        queryset (QuerySet): The rows to paginate.
+        ordering (tuple): Field or annotation names, optionally prefixed with
+            '-' for descending order. The last entry must be unique (usually
+            'id') so that every row has a distinct position.
+        per_page (int): Maximum number of rows on a page.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        """
+        Return the page for `cursor`, falling back to the first page.
+
+        Mirrors `Paginator.get_page()`: a missing, tampered or stale cursor
+        never raises, it simply shows the start of the list.
+        """
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor=None):
+        """
+        Return the page for `cursor`.
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded.
+        """
+        values, reverse = None, False
+        if cursor:
+            values, reverse = self.decode_cursor(cursor)
+
+        rows = list(self.page_queryset(values, reverse))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True, has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more, has_previous=values is not None)
+
+    def page_queryset(self, values=None, reverse=False):
+        """
+        Return the query reading the page after (or before) `values`.
+
+        It reads one row more than a page, to tell whether another follows.
+        Without `values` it reads the first page.
+        """
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+        ordering = self._reversed_ordering() if reverse else self.ordering
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def keyset_filter(self, values, reverse=False, ordering=None):
+        """
+        Build the filter selecting rows strictly after (or before) `values`.
+
+        For an ordering (a, b, id) this expands to
+        a < x OR (a = x AND b < y) OR (a = x AND b = y AND id < z), with the
+        comparison flipped for ascending fields or when paging backwards. A
+        redundant a <= x bound is added so the database can seek straight to
+        the cursor position on an index over the leading field.
+
+        `ordering` names the fields to compare, in place of the paginator's
+        own, for reading another table in the same order.
+        """
+        ordering = ordering or self.ordering
+        names = [self._field_name(field) for field in ordering]
+        lookups = [self._lookup(field, reverse) for field in ordering]
+
+        condition = Q()
+        for index, name in enumerate(names):
+            term = Q(**{f'{name}__{lookups[index]}': values[index]})
+            for previous_name, previous_value in zip(names[:index], values):
+                term &= Q(**{previous_name: previous_value})
+            condition |= term
+
+        inclusive = {'lt': 'lte', 'gt': 'gte'}[lookups[0]]
+        bound = Q(**{f'{names[0]}__{inclusive}': values[0]})
+        return bound & condition
+
+    def encode_cursor(self, obj, reverse=False):
+        """Return an opaque, URL-safe cursor pointing at `obj`."""
+        values = [
+            self._serialize(getattr(obj, self._field_name(field)))
+            for field in self.ordering
+        ]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """
+        Decode a cursor produced by `encode_cursor()`.
+
+        Returns:
+            tuple: The sort key values and whether to page backwards.
+
+        Raises:
+            InvalidCursor: If the cursor is malformed or does not hold one
+                non-null scalar value of the right type per field of this
+                paginator's ordering.
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = payload['v']
+            reverse = bool(payload['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        if not all(isinstance(value, (str, int, float)) for value in values):
+            raise InvalidCursor(cursor)
+
+        return [
+            self._deserialize(self._field_name(field), value)
+            for field, value in zip(self.ordering, values)
+        ], reverse
+
+    def _reversed_ordering(self, ordering=None):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in ordering or self.ordering
+        )
+
+    def _deserialize(self, name, value):
+        try:
+            model_field = self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        try:
+            value = model_field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor(value)
+        if value is None:
+            raise InvalidCursor(value)
+        return value
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _field_name(field):
+        return field.lstrip('-')
+
+    @staticmethod
+    def _lookup(field, reverse):
+        descending = field.startswith('-')
+        return 'lt' if descending != reverse else 'gt'
+
+
+class CountedPaginator(Paginator):
+    """
+    A `Paginator` told the total number of objects instead of counting them.
+
+    Useful when the total is already stored, such as a user's follower
+    count, so a page costs a single LIMIT/OFFSET query.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @property
+    def count(self):
+        return self._count
+
+
+class LookaheadPage(Page):
+    """A page of `LookaheadPaginator`, which knows whether a next page exists."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+class LookaheadPaginator(Paginator):
+    """
+    A `Paginator` that fetches one row past the page instead of counting.
+
+    The extra row shows whether there is a next page, so a page costs a
+    single LIMIT/OFFSET query and no `COUNT(*)`. The total, and so the
+    number of pages, is unknown; reading `count` or `num_pages` still
+    counts.
+    """
+
+    def validate_number(self, number):
+        """Return `number` as a page number, without checking it against the total."""
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        """
+        Return the page numbered `number`.
+
+        Raises:
+            PageNotAnInteger: If `number` is not a whole number.
+            EmptyPage: If the page is before the first or after the last.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return LookaheadPage(
+            rows[:self.per_page], number, self, has_next=len(rows) > self.per_page
+        )
+
+    def get_page(self, number):
+        """Return the page numbered `number`, falling back to the first page."""
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
@@ -0,0 +1,245 @@
+"""
+Ranking recipes by how much of a user's pantry they use.
+
+Scoring coverage in SQL means grouping every `RecipeIngredient` row of every
+candidate recipe per query. Instead each process keeps an in-memory inverted
+index: for every ingredient id, a sorted array of the ids of the recipes
+using it, plus the ingredients and visibility of every recipe. Scoring a
+pantry is then a merge over a handful of posting lists.
+
+Each process builds the index on its first query and then keeps it up to
+date one recipe at a time. A changed recipe is appended to a numbered change
+log in the shared cache (see `record_pantry_change()`); before each query a
+process re-reads just the recipes logged since it last looked. Bulk changes
+instead start a new generation of the log (see `invalidate_pantry_index()`),
+and a process falls back to a full rebuild when its generation is out of
+date or it has missed changes that have left the cache.
+"""
+import heapq
+import threading
+import uuid
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from recipes.models.recipes import Recipe, RecipeIngredient
+
+# Recipe fields the index is built from.
+PANTRY_FIELDS = frozenset({'ingredients', 'user', 'visibility'})
+PANTRY_INDEX_GENERATION_KEY = 'pantry_index_generation'
+PANTRY_CHANGE_TIMEOUT = 60 * 60 * 24
+# Beyond this many changes to catch up with, a rebuild is cheaper.
+PANTRY_CHANGE_LIMIT = 1000
+
+
+def pantry_change_count_key(generation):
+    return f'pantry_index_changes:{generation}'
+
+
+def pantry_change_key(generation, number):
+    return f'pantry_index_change:{generation}:{number}'
+
+
+def invalidate_pantry_index():
+    """Make every process rebuild its pantry index before the next query."""
+    cache.set(PANTRY_INDEX_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def _current_generation():
+    generation = cache.get(PANTRY_INDEX_GENERATION_KEY)
+    if generation is None:
+        cache.add(PANTRY_INDEX_GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(PANTRY_INDEX_GENERATION_KEY)
+    return generation
+
+
+def record_pantry_change(recipe_id):
+    """
+    Log that a recipe's ingredients, owner or visibility changed, or that it was deleted.
+
+    Every process re-reads the recipe before its next query. If the log
+    entry cannot be written, or another process claimed the same number
+    (the database cache's `incr()` is not atomic), every index is rebuilt
+    instead.
+    """
+    generation = _current_generation()
+    count_key = pantry_change_count_key(generation)
+    cache.add(count_key, 0, None)
+    try:
+        number = cache.incr(count_key)
+    except ValueError:
+        invalidate_pantry_index()
+        return
+    if not cache.add(pantry_change_key(generation, number), recipe_id, PANTRY_CHANGE_TIMEOUT):
+        invalidate_pantry_index()
+
+
+class PantryIndex:
+    """
+    Inverted index from ingredients to the recipes that use them.
+
+    Attributes:
+        postings (dict): Ingredient id to a sorted `array` of recipe ids.
+        recipe_ingredients (dict): Recipe id to a tuple of the ids of the
+            ingredients it uses, so an update finds the posting lists a
+            recipe is in without searching them all.
+        owners (dict): Recipe id to a (user id, visibility) pair.
+    """
+
+    def __init__(self, postings, recipe_ingredients, owners):
+        self.postings = postings
+        self.recipe_ingredients = recipe_ingredients
+        self.owners = owners
+
+    @classmethod
+    def build(cls):
+        """Build the index from the database with two queries."""
+        postings = defaultdict(lambda: array('q'))
+        recipe_ingredients = defaultdict(list)
+        rows = (
+            RecipeIngredient.objects.order_by('ingredient_id', 'recipe_id')
+            .values_list('ingredient_id', 'recipe_id')
+        )
+        for ingredient_id, recipe_id in rows.iterator(chunk_size=10000):
+            postings[ingredient_id].append(recipe_id)
+            recipe_ingredients[recipe_id].append(ingredient_id)
+
+        owners = {
+            recipe_id: (user_id, visibility)
+            for recipe_id, user_id, visibility in Recipe.objects.order_by()
+            .values_list('id', 'user_id', 'visibility').iterator(chunk_size=10000)
+        }
+        return cls(
+            dict(postings),
+            {recipe_id: tuple(ids) for recipe_id, ids in recipe_ingredients.items()},
+            owners,
+        )
+
+    def updated(self, recipe_ids):
+        """
+        Return a copy of the index with the given recipes re-read from the database.
+
+        Only the posting lists the recipes join or leave are copied, so the
+        index can be replaced while other threads are still ranking with it.
+        Recipes that no longer exist are dropped.
+        """
+        recipe_ids = set(recipe_ids)
+        added = defaultdict(list)
+        new_ingredients = defaultdict(list)
+        rows = (
+            RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+            .order_by().values_list('ingredient_id', 'recipe_id')
+        )
+        for ingredient_id, recipe_id in rows:
+            added[ingredient_id].append(recipe_id)
+            new_ingredients[recipe_id].append(ingredient_id)
+
+        recipe_ingredients = dict(self.recipe_ingredients)
+        changed = set(added)
+        for recipe_id in recipe_ids:
+            changed.update(recipe_ingredients.pop(recipe_id, ()))
+        recipe_ingredients.update(
+            (recipe_id, tuple(ids)) for recipe_id, ids in new_ingredients.items()
+        )
+
+        postings = dict(self.postings)
+        for ingredient_id in changed:
+            posting = array('q', (
+                recipe_id for recipe_id in self.postings.get(ingredient_id, ())
+                if recipe_id not in recipe_ids
+            ))
+            for recipe_id in added.get(ingredient_id, ()):
+                insort(posting, recipe_id)
+            if posting:
+                postings[ingredient_id] = posting
+            else:
+                postings.pop(ingredient_id, None)
+
+        owners = dict(self.owners)
+        for recipe_id in recipe_ids:
+            owners.pop(recipe_id, None)
+        owners.update(
+            (recipe_id, (user_id, visibility))
+            for recipe_id, user_id, visibility in Recipe.objects.filter(pk__in=recipe_ids)
+            .order_by().values_list('id', 'user_id', 'visibility')
+        )
+        return type(self)(postings, recipe_ingredients, owners)
+
+    def contains(self, ingredient_id, recipe_id):
+        """Return whether the recipe uses the ingredient."""
+        posting = self.postings.get(ingredient_id, ())
+        position = bisect_left(posting, recipe_id)
+        return position < len(posting) and posting[position] == recipe_id
+
+    def rank(self, ingredient_ids, viewer, limit):
+        """
+        Return the `limit` best covered recipes `viewer` may see.
+
+        Recipes are ranked by the share of their ingredients found in the
+        pantry, then by the number of pantry ingredients they use, then
+        newest (highest id) first.
+
+        Returns:
+            list: (recipe id, matched count, ingredient count) tuples.
+        """
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(self.postings.get(ingredient_id, ()))
+
+        is_visible = self._visibility_check(viewer)
+        candidates = (
+            (count / len(self.recipe_ingredients[recipe_id]), count, recipe_id)
+            for recipe_id, count in matched.items()
+            if is_visible(recipe_id)
+        )
+        return [
+            (recipe_id, count, len(self.recipe_ingredients[recipe_id]))
+            for coverage, count, recipe_id in heapq.nlargest(limit, candidates)
+        ]
+
+    def _visibility_check(self, viewer):
+        """Mirror `RecipeQuerySet.visible_to()` over the indexed owners."""
+        if viewer is None or not viewer.is_authenticated:
+            return lambda recipe_id: self.owners.get(recipe_id, (None, None))[1] == 'public'
+
+        friend_ids = viewer.get_friend_ids()
+
+        def is_visible(recipe_id):
+            user_id, visibility = self.owners.get(recipe_id, (None, None))
+            return (
+                visibility == 'public'
+                or user_id == viewer.id
+                or (visibility == 'friends' and user_id in friend_ids)
+            )
+        return is_visible
+
+
+_lock = threading.Lock()
+_loaded = {'generation': None, 'changes': 0, 'index': None}
+
+
+def _logged_changes(generation, applied, changes):
+    """Return the recipe ids logged after change `applied`, or None if some are gone."""
+    if changes - applied > PANTRY_CHANGE_LIMIT:
+        return None
+    keys = [pantry_change_key(generation, number) for number in range(applied + 1, changes + 1)]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        return None
+    return found.values()
+
+
+def get_pantry_index():
+    """Return this process's pantry index, first applying any changes logged since."""
+    generation = _current_generation()
+    changes = cache.get(pantry_change_count_key(generation), 0)
+    with _lock:
+        index = _loaded['index']
+        if index is None or _loaded['generation'] != generation:
+            index = PantryIndex.build()
+        elif changes > _loaded['changes']:
+            recipe_ids = _logged_changes(generation, _loaded['changes'], changes)
+            index = PantryIndex.build() if recipe_ids is None else index.updated(recipe_ids)
+        _loaded.update(generation=generation, changes=changes, index=index)
+        return index
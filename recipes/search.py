@@ -0,0 +1,229 @@
+"""
+Full-text search over recipe titles and descriptions.
+
+A substring filter over `description` has to read every recipe on every
+search. The backends here instead query an inverted index maintained by the
+database: an FTS5 virtual table on SQLite and a stored `tsvector` column with
+a GIN index on PostgreSQL (both created by migration 0004 and kept in step
+with `recipes_recipe` by the database itself). Other databases fall back to
+the old substring filter.
+
+Every backend returns the queryset filtered to matching recipes and
+annotated with `search_rank` (lower is better; a real annotation, so results
+can be filtered on it and paged by cursor) and `search_snippet`, a short
+excerpt with matched terms wrapped in `SNIPPET_START` / `SNIPPET_END`. The
+markers are control characters so the excerpt can be HTML-escaped before
+they are turned into `<mark>` tags (see the `highlight` template filter).
+
+The backend is chosen from the database vendor and can be overridden with
+the `RECIPES_SEARCH_BACKEND` setting (a dotted path to a backend class).
+
+SQLite cannot alter most columns in place, so Django migrations that change
+`recipes_recipe` rebuild the table, silently dropping its triggers.
+`restore_search_triggers()` runs after every migrate to put them back.
+"""
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+SNIPPET_START = '\x01'
+SNIPPET_END = '\x02'
+SNIPPET_TOKENS = 12
+
+FTS_TABLE = 'recipes_recipe_fts'
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON recipes_recipe
+        BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON recipes_recipe
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """,
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+        AFTER UPDATE OF title, description ON recipes_recipe
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+}
+
+
+def search_terms(query):
+    """Split a user's query into lower-cased word tokens."""
+    return re.findall(r'\w+', query.lower())
+
+
+def unranked(queryset):
+    """Annotate `queryset` with empty search ranks and snippets."""
+    return queryset.annotate(search_rank=Value(0.0), search_snippet=Value(''))
+
+
+class SearchBackend(ABC):
+    """
+    Base class of recipe search backends.
+
+    Subclasses implement `filter()` for a particular database.
+    """
+
+    def search(self, queryset, query):
+        """
+        Return recipes in `queryset` matching every word of `query`.
+
+        Each word also matches longer words it is a prefix of, so results
+        can be shown while the user is still typing.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return unranked(queryset.none())
+        return self.filter(queryset, terms)
+
+    @abstractmethod
+    def filter(self, queryset, terms):
+        """Return recipes in `queryset` matching every one of `terms`, ranked."""
+
+
+class SubstringSearchBackend(SearchBackend):
+    """Unindexed fallback matching words anywhere in the title or description."""
+
+    def filter(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(description__icontains=term)
+            )
+        return unranked(queryset)
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Search the `recipes_recipe_fts` FTS5 table.
+
+    Matches in the title weigh ten times as much as matches in the
+    description when ranking with bm25. Snippets are always taken from the
+    description, since the title is shown in full anyway.
+    """
+
+    def filter(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = recipes_recipe.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+            select={
+                'search_snippet': (
+                    f'snippet({FTS_TABLE}, 1, %s, %s, %s, {SNIPPET_TOKENS})'
+                ),
+            },
+            select_params=[SNIPPET_START, SNIPPET_END, '…'],
+        ).annotate(
+            search_rank=RawSQL(f'bm25({FTS_TABLE}, 10.0, 1.0)', [], output_field=FloatField()),
+        )
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    """
+    Search the GIN-indexed `recipes_recipe.search_vector` column.
+
+    `ts_rank` grows with relevance, so it is negated to keep lower ranks
+    first as with the other backends.
+    """
+
+    def filter(self, queryset, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.extra(
+            where=["recipes_recipe.search_vector @@ to_tsquery('english', %s)"],
+            params=[tsquery],
+            select={
+                'search_snippet': (
+                    "ts_headline('english', recipes_recipe.description, "
+                    "to_tsquery('english', %s), %s)"
+                ),
+            },
+            select_params=[
+                tsquery,
+                f'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, '
+                f'MaxWords={SNIPPET_TOKENS}, MinWords={SNIPPET_TOKENS // 2}',
+            ],
+        ).annotate(
+            search_rank=RawSQL(
+                "-ts_rank(recipes_recipe.search_vector, to_tsquery('english', %s))",
+                [tsquery], output_field=FloatField(),
+            ),
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def get_search_backend(using='default'):
+    """Return the search backend for the database alias `using`."""
+    backend_path = getattr(settings, 'RECIPES_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    vendor = connections[using].vendor
+    return BACKENDS.get(vendor, SubstringSearchBackend)()
+
+
+def restore_fts_triggers(connection, fts_table, content_table, triggers):
+    """
+    Recreate any missing triggers of an SQLite FTS5 table and rebuild it.
+
+    Does nothing on other databases or before the FTS5 table exists.
+
+    Args:
+        connection: The database connection.
+        fts_table (str): Name of the FTS5 table.
+        content_table (str): Name of the table it indexes.
+        triggers (dict): Trigger name to its `CREATE TRIGGER` statement.
+
+    Returns:
+        bool: Whether triggers were missing.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    if fts_table not in connection.introspection.table_names():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+            [content_table],
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = [name for name in triggers if name not in existing]
+        for name in missing:
+            cursor.execute(triggers[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    return bool(missing)
+
+
+def restore_search_triggers(connection):
+    """
+    Recreate any missing SQLite recipe search triggers and rebuild the index.
+
+    Returns:
+        bool: Whether triggers were missing.
+    """
+    return restore_fts_triggers(connection, FTS_TABLE, 'recipes_recipe', SQLITE_TRIGGERS)
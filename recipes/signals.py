@@ -0,0 +1,332 @@
+"""
+Signal handlers keeping derived data in step with the models it is built from.
+
+Handlers are connected in `RecipesConfig.ready()`.
+"""
+from django.db.models import Count, F, Subquery
+from django.db.models.functions import Greatest
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from recipes.models.comment import Comment, Notification
+from recipes.ingredients import index_recipe_ingredients
+from recipes.leaderboards import adjust_leaderboard
+from recipes.models.counters import adjust_counter
+from recipes.models.favourite import Favourite
+from recipes.models.follow import Follow
+from recipes.models.recipes import Recipe, Tag
+from recipes.models.user import User, friend_ids_cache_key, invalidate_friend_ids
+from recipes.notifications import adjust_unread_count, bump_notifications_version
+from recipes.pantry import PANTRY_FIELDS, record_pantry_change
+from recipes.search import restore_search_triggers
+from recipes.timeline import (
+    backfill_timeline, fan_out_recipe, move_in_timelines, remove_from_timelines, resume_fan_out,
+    trim_timeline,
+)
+from recipes.trending import trending_increment
+from recipes.user_search import restore_user_search_triggers
+
+
+def _cached_related(instance, field_name):
+    """Return the related object already loaded on `instance`, if any."""
+
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return field.get_cached_value(instance)
+    return None
+
+
+def _row_delta(signal, created):
+    """Return +1 for a created row, -1 for a deleted one and 0 for an update."""
+
+    if signal is post_delete:
+        return -1
+    return 1 if created else 0
+
+
+def _recipe_activity(kind, delta):
+    """
+    Return the recipe columns to update along with a counter.
+
+    Removed rows are left in the trending score until it is next rebuilt.
+    """
+
+    changes = {'modified_at': timezone.now()}
+    if delta > 0:
+        changes['trending_score'] = trending_increment(kind, count=delta)
+    return changes
+
+
+def _adjust_user_counter(leaderboard, field_name, user_id, delta, user=None):
+    """Add `delta` to a user's counter and move them on its leaderboard."""
+
+    adjust_counter(User, user_id, field_name, delta, user)
+    adjust_leaderboard(leaderboard, user_id, delta, user)
+
+
+def _count_favourited(recipe_id, delta, recipe=None):
+    """Add `delta` to the favourites received by the author of a recipe."""
+
+    if recipe is not None:
+        author_id, author = recipe.user_id, _cached_related(recipe, 'user')
+    else:
+        author_id = Recipe.objects.filter(pk=recipe_id).values_list('user_id', flat=True).first()
+        author = None
+    if author_id is not None:
+        _adjust_user_counter('favourited', 'favourited_count', author_id, delta, author)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def forget_friend_ids(sender, instance, **kwargs):
+    """Drop the cached friend sets of both users in a changed follow."""
+
+    invalidate_friend_ids(instance.follower_id, instance.followee_id)
+    for field_name in ('follower', 'followee'):
+        user = _cached_related(instance, field_name)
+        if user is not None:
+            user.__dict__.pop('_friend_ids', None)
+            user.__dict__.get('_cached_entries', {}).pop(friend_ids_cache_key(user.pk), None)
+
+
+@receiver(pre_save, sender=User)
+def update_user_derived_fields(sender, instance, **kwargs):
+    """Keep the autocompletion keys and email hash of a user in step with their details."""
+
+    instance.set_search_keys()
+    instance.set_email_hash()
+
+
+@receiver(post_save, sender=User)
+def touch_renamed_users_recipes(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Mark the recipes showing a renamed user's username as changed.
+
+    Recipe cards and pages show the username of the author, and pages those
+    of the commenters, so after a rename (compared with the username the
+    user was loaded with, see `User.from_db()`) the user's recipes and the
+    recipes they commented on are rendered again.
+    """
+
+    stored = getattr(instance, '_stored_username', None)
+    instance._stored_username = instance.username
+    if raw or created or stored == instance.username:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    Recipe.objects.filter(user=instance).touch()
+    Recipe.objects.filter(
+        pk__in=Subquery(Comment.objects.filter(user=instance).values('recipe_id'))
+    ).touch()
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def count_follow(sender, instance, signal, created=False, **kwargs):
+    """Keep `follower_count` and `following_count` in step with follows."""
+
+    delta = _row_delta(signal, created)
+    if not delta:
+        return
+    _adjust_user_counter('followed', 'follower_count', instance.followee_id, delta,
+                         _cached_related(instance, 'followee'))
+    adjust_counter(User, instance.follower_id, 'following_count', delta,
+                   _cached_related(instance, 'follower'))
+
+
+@receiver([post_save, post_delete], sender=Favourite)
+def count_favourite(sender, instance, signal, created=False, **kwargs):
+    """
+    Keep `Recipe.favourite_count`, the recipe's activity and its author's
+    `favourited_count` in step with favourites.
+    """
+
+    delta = _row_delta(signal, created)
+    if not delta:
+        return
+    recipe = _cached_related(instance, 'recipe')
+    adjust_counter(Recipe, instance.recipe_id, 'favourite_count', delta,
+                   recipe, **_recipe_activity('favourite', delta))
+    _count_favourited(instance.recipe_id, delta, recipe)
+
+
+@receiver(m2m_changed, sender=Recipe.favourites.through)
+def count_favourites_added(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Count favourites created through `Recipe.favourites.add()`.
+
+    Adding through the related manager bulk creates the `Favourite` rows
+    without sending `post_save`. Removal deletes the rows one by one, so it
+    is already counted by `count_favourite()`.
+    """
+
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        Recipe.objects.filter(pk__in=pk_set).update(
+            favourite_count=Greatest(F('favourite_count') + 1, 0),
+            **_recipe_activity('favourite', 1),
+        )
+        authors = (
+            Recipe.objects.filter(pk__in=pk_set).order_by()
+            .values_list('user_id').annotate(favourites=Count('pk'))
+        )
+        for author_id, favourites in authors:
+            _adjust_user_counter('favourited', 'favourited_count', author_id, favourites)
+    else:
+        adjust_counter(Recipe, instance.pk, 'favourite_count', len(pk_set), instance,
+                       **_recipe_activity('favourite', len(pk_set)))
+        _count_favourited(instance.pk, len(pk_set), instance)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_retagged_recipes(sender, instance, action, reverse, pk_set, **kwargs):
+    """Render the cards of recipes whose tags changed again."""
+
+    if reverse:
+        if action in ('post_add', 'post_remove'):
+            Recipe.objects.filter(pk__in=pk_set).touch()
+        elif action == 'pre_clear':
+            Recipe.objects.filter(tags=instance).touch()
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        Recipe.objects.filter(pk=instance.pk).touch()
+
+
+@receiver(post_save, sender=Tag)
+def touch_tagged_recipes(sender, instance, created, raw=False, **kwargs):
+    """Render the cards showing a renamed tag again."""
+
+    if not created and not raw:
+        Recipe.objects.filter(tags=instance).touch()
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def count_comment(sender, instance, signal, created=False, **kwargs):
+    """
+    Keep `Recipe.comment_count`, the recipe's activity and the commenter's
+    `comment_count` in step with comments.
+    """
+
+    delta = _row_delta(signal, created)
+    if not delta:
+        return
+    adjust_counter(Recipe, instance.recipe_id, 'comment_count', delta,
+                   _cached_related(instance, 'recipe'), **_recipe_activity('comment', delta))
+    _adjust_user_counter('commenters', 'comment_count', instance.user_id, delta,
+                         _cached_related(instance, 'user'))
+
+
+@receiver(post_save, sender=Recipe)
+def index_ingredients(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Rebuild the parsed ingredient rows of a saved recipe."""
+
+    if raw or (update_fields is not None and 'ingredients' not in update_fields):
+        return
+    index_recipe_ingredients(instance)
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using, **kwargs):
+    """Restore search triggers dropped by SQLite table rebuilds."""
+
+    if sender.name == 'recipes':
+        restore_search_triggers(connections[using])
+        restore_user_search_triggers(connections[using])
+
+
+@receiver(post_migrate)
+def create_cache_table(sender, using, **kwargs):
+    """Create the table of the database cache backend, if one is configured."""
+
+    if sender.name == 'recipes':
+        call_command('createcachetable', database=using, verbosity=0)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def reindex_pantry_recipe(sender, instance, update_fields=None, **kwargs):
+    """
+    Log a changed recipe so pantry indexes re-read it.
+
+    The change is logged once the transaction commits, so no process
+    re-reads the recipe before its new data is visible.
+    """
+
+    if update_fields is not None and not PANTRY_FIELDS.intersection(update_fields):
+        return
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: record_pantry_change(recipe_id))
+
+
+@receiver(post_save, sender=Recipe)
+def deliver_to_timelines(sender, instance, created, raw=False, **kwargs):
+    """
+    Write a saved recipe into its author's followers' timelines.
+
+    Entries of an edited recipe are only touched when its author,
+    visibility or publication date changed from the values it was loaded
+    with (see `Recipe.from_db()`).
+    """
+
+    if raw:
+        return
+    stored = getattr(instance, '_stored_timeline_values', None)
+    if created:
+        fan_out_recipe(instance)
+    elif stored is None or stored[:2] != instance.timeline_values()[:2]:
+        fan_out_recipe(instance, replace=True)
+    elif stored != instance.timeline_values():
+        move_in_timelines(instance)
+    instance._stored_timeline_values = instance.timeline_values()
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_deleted_recipe(sender, instance, **kwargs):
+    """Delete a recipe's timeline entries with it, keeping timeline sizes in step."""
+
+    remove_from_timelines(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timelines(sender, instance, created, raw=False, **kwargs):
+    """
+    Give a new follower the latest recipes of the user they followed.
+
+    If the follow makes the two users friends, the followed user also gets
+    the follower's friends-only recipes.
+    """
+
+    if raw or not created:
+        return
+    backfill_timeline(instance.follower, instance.followee)
+    if Follow.objects.filter(
+        follower_id=instance.followee_id, followee_id=instance.follower_id
+    ).exists():
+        backfill_timeline(instance.followee, instance.follower)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timelines(sender, instance, **kwargs):
+    """
+    Remove the unfollowed user's recipes and any friends-only recipes.
+
+    If the unfollowed user has dropped back to the fan-out limit, their
+    latest recipes are backfilled into their followers' timelines.
+    """
+
+    trim_timeline(instance.follower_id, instance.followee_id)
+    trim_timeline(instance.followee_id, instance.follower_id, friends_only=True)
+    resume_fan_out(instance.followee_id)
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def count_unread_notification(sender, instance, signal, created=False, **kwargs):
+    """Keep cached unread notification counts in step with new and deleted rows."""
+
+    bump_notifications_version([instance.user_id])
+    if instance.is_read:
+        return
+    delta = _row_delta(signal, created)
+    if delta:
+        adjust_unread_count(instance.user_id, delta)
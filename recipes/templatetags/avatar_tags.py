@@ -0,0 +1,17 @@
+from django import template
+
+register = template.Library()
+
+@register.inclusion_tag('partials/avatar.html')
+def avatar(user, size):
+    """
+    Render a user's avatar, `size` pixels wide.
+
+    The identicon served by this site is shown first, and replaced by the
+    user's Gravatar once it has loaded, if they have one.
+    """
+    return {
+        'src': user.avatar(size),
+        'gravatar': user.gravatar(size, default='404'),
+        'size': size,
+    }
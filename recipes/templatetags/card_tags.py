@@ -0,0 +1,18 @@
+from itertools import chain
+
+from django import template
+from django.utils.safestring import mark_safe
+from recipes import cards
+
+register = template.Library()
+
+@register.simple_tag
+def load_card_bodies(*listings):
+    """Read the cached card bodies of a page's listings together (see `recipes.cards`)."""
+    cards.load_card_bodies(chain.from_iterable(listings))
+    return ''
+
+@register.simple_tag
+def card_body(recipe):
+    """Render the viewer-independent part of a recipe card."""
+    return mark_safe(cards.get_card_body(recipe))
@@ -6,4 +6,4 @@ register = template.Library()
 def is_favourited(recipe, user):
     if not user.is_authenticated:
         return False
-    return recipe.favourites.filter(id=user.id).exists()
\ No newline at end of file
+    return recipe.is_favourited(user)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from recipes.search import SNIPPET_END, SNIPPET_START
+
+register = template.Library()
+
+@register.filter
+def highlight(snippet):
+    """Escape a search snippet and wrap its matched terms in <mark> tags."""
+    html = escape(snippet).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+    return mark_safe(html)
@@ -1,5 +1,12 @@
+import base64
+import json
+from contextlib import contextmanager
+from django.conf import settings
+from django.test.utils import override_settings
 from django.urls import reverse
 from with_asserts.mixin import AssertHTMLMixin
+from recipes.middleware import QueryRecorder
+from recipes.tests.runner import SHIPPED_CACHE_ALIAS
 
 def reverse_with_next(url_name, next_url):
     """Extended version of reverse to generate URLs with redirects"""
@@ -8,6 +15,12 @@ def reverse_with_next(url_name, next_url):
     return url
 
 
+def crafted_cursor(values, reverse=False):
+    """Encode `values` the way `CursorPaginator` encodes cursors, unchecked."""
+    payload = json.dumps({'v': values, 'r': int(reverse)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
 class LogInTester:
     """Class support login in tests."""
  
@@ -34,4 +47,44 @@ class MenuTesterMixin(AssertHTMLMixin):
         """Check that no menu is present."""
         
         for url in self.menu_urls:
-            self.assertNotHTML(response, f'a[href="{url}"]')
\ No newline at end of file
+            self.assertNotHTML(response, f'a[href="{url}"]')
+
+
+class QueryBudgetMixin:
+    """Class to extend tests with a maximum query count assertion."""
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        """
+        Fail if the enclosed block runs more than `budget` SQL queries.
+
+        The failure message lists the queries, and any repeated ones, so an
+        N+1 regression is easy to spot.
+        """
+
+        with QueryRecorder() as recorder:
+            yield recorder
+        if recorder.count > budget:
+            lines = [f'{recorder.count} queries run, budget is {budget}:']
+            lines += [f'  {sql}' for sql, _ in recorder.queries]
+            for sql, count in recorder.duplicates().items():
+                lines.append(f'repeated {count} times: {sql}')
+            self.fail('\n'.join(lines))
+
+
+class ShippedCacheMixin:
+    """
+    Class to run tests against the cache backend the app ships with.
+
+    The test runner swaps the shipped cache for an in-memory one, whose
+    reads cost no queries; query counts measured under this mixin include
+    the cache's own.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        caches = settings.CACHES
+        shipped = override_settings(CACHES={**caches, 'default': caches.get(SHIPPED_CACHE_ALIAS, caches['default'])})
+        shipped.enable()
+        cls.addClassCleanup(shipped.disable)
+        super().setUpClass()
@@ -0,0 +1,37 @@
+"""Tests of the bench management command."""
+from io import StringIO
+
+from django.core.management.base import CommandError
+from django.test import TestCase
+from recipes.management.commands.bench import Command
+from recipes.models import Follow, Recipe, User
+
+
+class BenchCommandTestCase(TestCase):
+    """Tests of the bench command's scenarios, run on fixture data."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        Recipe.objects.create(title='Chicken pie', description='Crisp', user=self.second_user)
+
+    def test_reports_every_scenario(self):
+        results = Command(stdout=StringIO(), stderr=StringIO()).run_scenarios(requests=3, warmup=1)
+        self.assertIn('feed', results)
+        self.assertIn('toggle_favourite', results)
+        for result in results.values():
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_memory_kib'], 0)
+
+    def test_needs_a_public_recipe(self):
+        Recipe.objects.all().delete()
+        with self.assertRaises(CommandError):
+            Command(stdout=StringIO(), stderr=StringIO()).run_scenarios(requests=3, warmup=0)
@@ -0,0 +1,53 @@
+"""Tests of the check_query_plans management command."""
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from recipes.models import Recipe, User
+from recipes.models.follow import Follow
+
+
+class CheckQueryPlansCommandTestCase(TestCase):
+    """Tests of the check_query_plans management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+        Recipe.objects.create(title='Pancakes', description='Fluffy', user=self.second_user)
+
+    def test_reports_unexpected_scans_and_sorts(self):
+        plan = '2 0 0 SCAN recipes_recipe USING INDEX recipe_recent_idx\n9 0 0 USE TEMP B-TREE FOR ORDER BY'
+        output = StringIO()
+        with patch('django.db.models.query.QuerySet.explain', return_value=plan):
+            with self.assertRaisesMessage(CommandError, 'Scans or sorts in: feed,'):
+                call_command('check_query_plans', stdout=output)
+        self.assertIn('feed: SORT', output.getvalue())
+        self.assertIn('feed (difficulty): SCAN of recipes_recipe, SORT', output.getvalue())
+        self.assertIn('top followed users: SORT', output.getvalue())
+        self.assertIn('user search: SCAN of recipes_recipe\n', output.getvalue())
+
+    def test_fails_without_data_to_plan_with(self):
+        Recipe.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('check_query_plans', stdout=StringIO())
+
+
+class SeededQueryPlansTestCase(TestCase):
+    """Tests of the check_query_plans management command on seeded data."""
+
+    def test_listing_queries_use_indexes(self):
+        call_command('seed', scale=200, stdout=StringIO(), stderr=StringIO())
+        output = StringIO()
+        call_command('check_query_plans', analyze=True, stdout=output)
+        self.assertIn('feed: ok', output.getvalue())
+        self.assertIn('browse (time): ok', output.getvalue())
+        self.assertIn('recipe search: ok', output.getvalue())
+        self.assertIn('No scans or sorts', output.getvalue())
@@ -0,0 +1,31 @@
+"""Tests of the index_ingredients management command."""
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Recipe, User, RecipeIngredient
+
+
+class IndexIngredientsCommandTestCase(TestCase):
+    """Tests of the index_ingredients management command."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        user = User.objects.get(username='@johndoe')
+        self.recipes = [
+            Recipe.objects.create(
+                title=f'Recipe {i}', description='test', user=user,
+                ingredients='Rice 1 cup\nSalt',
+            )
+            for i in range(3)
+        ]
+        RecipeIngredient.objects.all().delete()
+
+    def test_command_indexes_existing_recipes(self):
+        output = StringIO()
+        call_command('index_ingredients', batch_size=2, stdout=output)
+        self.assertEqual(RecipeIngredient.objects.count(), 6)
+        self.assertCountEqual(
+            Recipe.objects.with_ingredients(include=['rice', 'salt']), self.recipes
+        )
+        self.assertIn('Indexed ingredients of 3 recipes', output.getvalue())
@@ -0,0 +1,48 @@
+"""Tests of the reconcile_counters management command."""
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Recipe, User, Follow, Favourite
+from recipes.models.comment import Comment
+
+
+class ReconcileCountersCommandTestCase(TestCase):
+    """Tests of the reconcile_counters management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            title='Pancakes', description='Fluffy', user=self.user
+        )
+        Favourite.objects.create(user=self.second_user, recipe=self.recipe)
+        Comment.objects.create(recipe=self.recipe, user=self.second_user, text='Yum')
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+
+    def test_counters_match_after_normal_use(self):
+        output = StringIO()
+        call_command('reconcile_counters', stdout=output)
+        self.assertIn('Recipe.favourite_count: 0 corrected', output.getvalue())
+        self.assertIn('User.follower_count: 0 corrected', output.getvalue())
+
+    def test_drifted_counters_are_corrected(self):
+        Recipe.objects.filter(pk=self.recipe.pk).update(favourite_count=7, comment_count=0)
+        User.objects.filter(pk=self.user.pk).update(follower_count=0, favourited_count=2)
+        User.objects.filter(pk=self.second_user.pk).update(following_count=3, comment_count=0)
+        output = StringIO()
+        call_command('reconcile_counters', stdout=output)
+        self.recipe.refresh_from_db()
+        self.user.refresh_from_db()
+        self.second_user.refresh_from_db()
+        self.assertEqual(self.recipe.favourite_count, 1)
+        self.assertEqual(self.recipe.comment_count, 1)
+        self.assertEqual(self.user.follower_count, 1)
+        self.assertEqual(self.second_user.following_count, 1)
+        self.assertEqual(self.second_user.comment_count, 1)
+        self.assertEqual(self.user.favourited_count, 1)
+        self.assertIn('Recipe.favourite_count: 1 corrected', output.getvalue())
@@ -0,0 +1,58 @@
+"""Tests of the seed management command's --scale mode."""
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import authenticate
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+from recipes.models import Follow, Recipe, RecipeIngredient, User
+from recipes.models.timeline import TimelineEntry
+
+
+class SeedScaleCommandTestCase(TestCase):
+    """Tests of the seed command's bulk --scale mode."""
+
+    def seed(self, users=30):
+        call_command('seed', scale=users, batch_size=7, stdout=StringIO())
+
+    def test_creates_users_follows_and_recipes(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), 30 * 20)
+        self.assertTrue(Recipe.objects.exists())
+
+    def test_users_can_log_in_with_default_password(self):
+        self.seed()
+        user = User.objects.first()
+        self.assertEqual(authenticate(username=user.username, password='Password123'), user)
+
+    def test_derived_data_is_consistent(self):
+        self.seed()
+        output = StringIO()
+        call_command('reconcile_counters', stdout=output)
+        self.assertEqual(output.getvalue().count(': 0 corrected'), 7)
+        self.assertTrue(RecipeIngredient.objects.exists())
+
+    def test_timelines_hold_followed_public_recipes(self):
+        self.seed()
+        for entry in TimelineEntry.objects.select_related('recipe')[:50]:
+            self.assertTrue(
+                Follow.objects.filter(follower=entry.user_id, followee=entry.recipe.user_id).exists()
+            )
+            self.assertNotEqual(entry.recipe.visibility, 'me')
+
+    def test_timelines_leave_out_authors_too_popular_to_fan_out(self):
+        with patch('recipes.management.commands.seed.TIMELINE_FANOUT_LIMIT', 25):
+            self.seed()
+        popular_ids = list(
+            Follow.objects.values('followee').annotate(followers=Count('pk'))
+            .filter(followers__gt=25).values_list('followee', flat=True)
+        )
+        self.assertTrue(popular_ids)
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertFalse(TimelineEntry.objects.filter(recipe__user__in=popular_ids).exists())
+
+    def test_repeated_runs_add_more_users(self):
+        self.seed(users=5)
+        self.seed(users=5)
+        self.assertEqual(User.objects.count(), 10)
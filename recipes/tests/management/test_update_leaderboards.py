@@ -0,0 +1,27 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.leaderboards import leaderboard_cache_key
+from recipes.models import Follow, User
+
+
+class UpdateLeaderboardsCommandTestCase(TestCase):
+    """Tests of the update_leaderboards management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def test_rebuilds_leaderboards(self):
+        followee = User.objects.get(username='@petrapickles')
+        Follow.objects.create(follower=User.objects.get(username='@johndoe'), followee=followee)
+        cache.set(leaderboard_cache_key('followed'), [])
+
+        out = StringIO()
+        call_command('update_leaderboards', stdout=out)
+
+        self.assertIn('followed', out.getvalue())
+        entries = cache.get(leaderboard_cache_key('followed'))
+        self.assertEqual(entries[0], [followee.pk, '@petrapickles', 1])
@@ -0,0 +1,26 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Recipe, User, Favourite
+
+
+class UpdateTrendingCommandTestCase(TestCase):
+    """Tests of the update_trending management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def test_rebuilds_scores(self):
+        author = User.objects.get(username='@janedoe')
+        recipe = Recipe.objects.create(title='Soup', description='test', user=author)
+        Favourite.objects.create(user=User.objects.get(username='@johndoe'), recipe=recipe)
+        Recipe.objects.update(trending_score=0)
+
+        out = StringIO()
+        call_command('update_trending', stdout=out)
+
+        self.assertIn('1 recipes with recent activity', out.getvalue())
+        recipe.refresh_from_db()
+        self.assertGreater(recipe.trending_score, 0)
@@ -0,0 +1,83 @@
+"""Unit tests for the ingredient index of recipes."""
+from decimal import Decimal
+from django.test import TestCase
+from recipes.ingredients import parse_ingredient_line, parse_ingredients
+from recipes.models import Recipe, User, Ingredient, RecipeIngredient
+
+
+class IngredientParsingTestCase(TestCase):
+    """Unit tests for parsing ingredient lines."""
+
+    def test_parse_name_quantity_measurement(self):
+        parsed = parse_ingredient_line('Flour 2 cups')
+        self.assertEqual(parsed, ('flour', Decimal('2'), 'cups'))
+
+    def test_parse_quantity_measurement_name(self):
+        parsed = parse_ingredient_line('1/2 tsp Baking Soda')
+        self.assertEqual(parsed, ('baking soda', Decimal('0.5'), 'tsp'))
+
+    def test_parse_name_only(self):
+        parsed = parse_ingredient_line('- Parmesan cheese, grated')
+        self.assertEqual(parsed, ('parmesan cheese grated', None, ''))
+
+    def test_parse_quantity_without_measurement(self):
+        parsed = parse_ingredient_line('3 eggs')
+        self.assertEqual(parsed, ('eggs', Decimal('3'), ''))
+
+    def test_blank_lines_are_skipped(self):
+        self.assertIsNone(parse_ingredient_line('   '))
+        self.assertIsNone(parse_ingredient_line('2 cups'))
+
+    def test_repeated_ingredients_keep_first_line(self):
+        parsed = parse_ingredients('Salt 1 pinch\n\nsugar\nSALT 2 tsp')
+        self.assertEqual([ingredient.name for ingredient in parsed], ['salt', 'sugar'])
+        self.assertEqual(parsed[0].unit, 'pinch')
+
+
+class RecipeIngredientIndexTestCase(TestCase):
+    """Unit tests for the RecipeIngredient index."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.pancakes = Recipe.objects.create(
+            title='Pancakes', description='test', user=self.user,
+            ingredients='Flour 2 cups\nMilk 1 cup\nEggs 2',
+        )
+        self.omelette = Recipe.objects.create(
+            title='Omelette', description='test', user=self.user,
+            ingredients='Eggs 3\nCheese 50 g',
+        )
+
+    def test_saving_recipe_indexes_its_ingredients(self):
+        lines = list(self.pancakes.ingredient_lines.select_related('ingredient'))
+        self.assertEqual([line.ingredient.name for line in lines], ['flour', 'milk', 'eggs'])
+        self.assertEqual(lines[0].quantity, Decimal('2'))
+        self.assertEqual(lines[0].unit, 'cups')
+
+    def test_ingredients_are_shared_between_recipes(self):
+        self.assertEqual(Ingredient.objects.filter(name='eggs').count(), 1)
+
+    def test_editing_ingredients_rebuilds_the_index(self):
+        self.pancakes.ingredients = 'Flour 2 cups\nButter 20 g'
+        self.pancakes.save()
+        names = self.pancakes.indexed_ingredients.values_list('name', flat=True)
+        self.assertCountEqual(names, ['flour', 'butter'])
+
+    def test_deleting_recipe_deletes_its_index_rows(self):
+        self.pancakes.delete()
+        self.assertFalse(RecipeIngredient.objects.filter(ingredient__name='flour').exists())
+
+    def test_with_ingredients_includes_all_names(self):
+        recipes = Recipe.objects.with_ingredients(include=['Eggs'])
+        self.assertCountEqual(recipes, [self.pancakes, self.omelette])
+        recipes = Recipe.objects.with_ingredients(include=['eggs', 'flour'])
+        self.assertEqual(list(recipes), [self.pancakes])
+
+    def test_with_ingredients_excludes_names(self):
+        recipes = Recipe.objects.with_ingredients(include=['eggs'], exclude=['Milk'])
+        self.assertEqual(list(recipes), [self.omelette])
+
+    def test_with_unknown_ingredient_matches_nothing(self):
+        self.assertFalse(Recipe.objects.with_ingredients(include=['saffron']).exists())
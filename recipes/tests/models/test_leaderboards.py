@@ -0,0 +1,90 @@
+"""Unit tests for the cached user leaderboards."""
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase
+from recipes.leaderboards import (
+    adjust_leaderboard, get_leaderboard, leaderboard_cache_key, rebuild_leaderboards,
+)
+from recipes.models import Recipe, User, Favourite, Follow
+from recipes.models.comment import Comment
+
+
+class LeaderboardTestCase(TestCase):
+    """Unit tests for the cached user leaderboards."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.john = User.objects.get(username='@johndoe')
+        self.jane = User.objects.get(username='@janedoe')
+        self.petra = User.objects.get(username='@petrapickles')
+        self.peter = User.objects.get(username='@peterpickles')
+        self.recipe = Recipe.objects.create(title='Soup', description='test', user=self.jane)
+
+    def _cached(self, name):
+        return [user_id for user_id, _, _ in cache.get(leaderboard_cache_key(name))]
+
+    def test_favourites_are_counted_for_the_author(self):
+        favourite = Favourite.objects.create(user=self.john, recipe=self.recipe)
+        self.jane.refresh_from_db()
+        self.assertEqual(self.jane.favourited_count, 1)
+        favourite.delete()
+        self.jane.refresh_from_db()
+        self.assertEqual(self.jane.favourited_count, 0)
+
+    def test_favourites_added_through_the_relation_are_counted(self):
+        other = Recipe.objects.create(title='Stew', description='test', user=self.jane)
+        self.john.favourite_recipes.add(self.recipe, other)
+        self.recipe.favourites.add(self.petra)
+        self.jane.refresh_from_db()
+        self.assertEqual(self.jane.favourited_count, 3)
+
+    def test_comments_are_counted_for_the_commenter(self):
+        comment = Comment.objects.create(recipe=self.recipe, user=self.john, text='Yum')
+        self.john.refresh_from_db()
+        self.assertEqual(self.john.comment_count, 1)
+        comment.delete()
+        self.john.refresh_from_db()
+        self.assertEqual(self.john.comment_count, 0)
+
+    def test_leaderboard_ranks_by_counter_then_username(self):
+        Follow.objects.create(follower=self.john, followee=self.petra)
+        self.assertEqual(get_leaderboard('followed', 3), [self.petra, self.jane, self.john])
+
+    def test_leaderboard_is_read_from_the_cache(self):
+        get_leaderboard('commenters')
+        with self.assertNumQueries(1):
+            users = get_leaderboard('commenters', 2)
+        self.assertEqual(len(users), 2)
+
+    def test_changes_move_users_on_the_cached_leaderboard(self):
+        rebuild_leaderboards()
+        Comment.objects.create(recipe=self.recipe, user=self.peter, text='Yum')
+        Comment.objects.create(recipe=self.recipe, user=self.peter, text='Yum')
+        Comment.objects.create(recipe=self.recipe, user=self.john, text='Yum')
+        self.assertEqual(self._cached('commenters')[:2], [self.peter.pk, self.john.pk])
+        Comment.objects.filter(user=self.peter).delete()
+        self.assertEqual(self._cached('commenters')[0], self.john.pk)
+
+    @patch('recipes.leaderboards.LEADERBOARD_SIZE', 2)
+    def test_users_join_a_full_leaderboard_when_they_outrank_its_last(self):
+        Follow.objects.create(follower=self.john, followee=self.jane)
+        rebuild_leaderboards()
+        self.assertEqual(self._cached('followed'), [self.jane.pk, self.john.pk])
+        Follow.objects.create(follower=self.john, followee=self.petra)
+        self.assertEqual(self._cached('followed'), [self.jane.pk, self.petra.pk])
+        adjust_leaderboard('followed', self.peter.pk, 1)
+        self.assertEqual(self._cached('followed'), [self.jane.pk, self.petra.pk])
+
+    @patch('recipes.leaderboards.LEADERBOARD_SIZE', 2)
+    def test_full_leaderboard_is_recomputed_when_a_user_drops_to_its_bottom(self):
+        Follow.objects.create(follower=self.john, followee=self.jane)
+        Follow.objects.create(follower=self.peter, followee=self.jane)
+        Follow.objects.create(follower=self.john, followee=self.petra)
+        rebuild_leaderboards()
+        Follow.objects.filter(followee=self.jane).delete()
+        self.assertIsNone(cache.get(leaderboard_cache_key('followed')))
+        self.assertEqual(get_leaderboard('followed'), [self.petra, self.jane])
@@ -2,7 +2,8 @@
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.utils import timezone
-from recipes.models import Recipe, User, Tag
+from recipes.models import Recipe, User, Tag, Follow, Favourite
+from recipes.models.comment import Comment
 
 
 class RecipeModelTestCase(TestCase):
@@ -173,6 +174,99 @@ class RecipeModelTestCase(TestCase):
         self.recipe.favourites.add(third_user)
         self.assertEqual(self.recipe.get_favourite_count(), 2)
 
+    def test_favourite_count_is_stored_on_the_recipe(self):
+        self.recipe.favourites.add(self.user, self.second_user)
+        recipe = Recipe.objects.get(id=self.recipe.id)
+        self.assertEqual(recipe.favourite_count, 2)
+
+    def test_favourite_count_follows_favourites_added_from_the_user_side(self):
+        self.second_user.favourite_recipes.add(self.recipe)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favourite_count, 1)
+
+    def test_favourite_count_decreases_when_favourite_is_removed(self):
+        self.recipe.favourites.add(self.user, self.second_user)
+        self.recipe.favourites.remove(self.user)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favourite_count, 1)
+
+    def test_favourite_count_counts_favourite_rows(self):
+        Favourite.objects.create(user=self.second_user, recipe=self.recipe)
+        self.assertEqual(self.recipe.favourite_count, 1)
+        Favourite.objects.get(user=self.second_user, recipe=self.recipe).delete()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favourite_count, 0)
+
+    def test_saving_a_stale_recipe_keeps_its_counters(self):
+        stale = Recipe.objects.get(id=self.recipe.id)
+        self.recipe.favourites.add(self.second_user)
+        stale.title = 'Renamed'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.title, 'Renamed')
+        self.assertEqual(stale.favourite_count, 1)
+
+    def test_comment_count_follows_comments(self):
+        comment = Comment.objects.create(recipe=self.recipe, user=self.second_user, text='Nice')
+        self.assertEqual(self.recipe.comment_count, 1)
+        comment.delete()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.comment_count, 0)
+
+    def test_with_viewer_state_annotates_whether_viewer_favourited(self):
+        self.recipe.favourites.add(self.second_user)
+        favourited = Recipe.objects.with_viewer_state(self.second_user).get(id=self.recipe.id)
+        not_favourited = Recipe.objects.with_viewer_state(self.user).get(id=self.recipe.id)
+        self.assertTrue(favourited.viewer_has_favourited)
+        self.assertFalse(not_favourited.viewer_has_favourited)
+
+    def test_with_viewer_state_for_anonymous_viewer(self):
+        self.recipe.favourites.add(self.second_user)
+        recipe = Recipe.objects.with_viewer_state(None).get(id=self.recipe.id)
+        self.assertFalse(recipe.viewer_has_favourited)
+
+    def test_annotated_recipe_answers_favourite_methods_without_queries(self):
+        self.recipe.favourites.add(self.second_user)
+        recipe = Recipe.objects.with_viewer_state(self.second_user).get(id=self.recipe.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(recipe.is_favourited(self.second_user))
+            self.assertEqual(recipe.get_favourite_count(), 1)
+
+    def test_annotated_recipe_queries_for_a_different_user(self):
+        self.recipe.favourites.add(self.second_user)
+        recipe = Recipe.objects.with_viewer_state(self.second_user).get(id=self.recipe.id)
+        self.assertFalse(recipe.is_favourited(self.user))
+
+    def test_public_recipe_is_visible_to_everyone(self):
+        self.assertTrue(self.recipe.is_visible_to(None))
+        self.assertTrue(self.recipe.is_visible_to(self.second_user))
+        self.assertIn(self.recipe, Recipe.objects.visible_to(None))
+
+    def test_private_recipe_is_only_visible_to_owner(self):
+        self.recipe.visibility = 'me'
+        self.recipe.save()
+        self.assertTrue(self.recipe.is_visible_to(self.user))
+        self.assertFalse(self.recipe.is_visible_to(self.second_user))
+        self.assertIn(self.recipe, Recipe.objects.visible_to(self.user))
+        self.assertNotIn(self.recipe, Recipe.objects.visible_to(self.second_user))
+
+    def test_friends_recipe_requires_mutual_follow(self):
+        self.recipe.visibility = 'friends'
+        self.recipe.save()
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+        self.assertFalse(self.recipe.is_visible_to(self.second_user))
+        self.assertNotIn(self.recipe, Recipe.objects.visible_to(self.second_user))
+
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        self.assertTrue(self.recipe.is_visible_to(self.second_user))
+        self.assertIn(self.recipe, Recipe.objects.visible_to(self.second_user))
+
+    def test_friends_recipe_is_hidden_from_anonymous_users(self):
+        self.recipe.visibility = 'friends'
+        self.recipe.save()
+        self.assertFalse(self.recipe.is_visible_to(None))
+        self.assertNotIn(self.recipe, Recipe.objects.visible_to(None))
+
     def test_user_can_have_multiple_recipes(self):
         second_recipe = Recipe.objects.create(
             title='Second Recipe',
@@ -0,0 +1,183 @@
+"""Unit tests for materialized following timelines."""
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import Recipe, User, Follow, TimelineEntry
+from recipes.timeline import TimelinePaginator, fan_out_recipe, following_timeline
+
+
+class TimelineTestCase(TestCase):
+    """Unit tests for materialized following timelines."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.author = User.objects.get(username='@janedoe')
+        self.stranger = User.objects.get(username='@petrapickles')
+
+    def _create_recipe(self, visibility='public', user=None, days_ago=0):
+        return Recipe.objects.create(
+            title='Soup', description='test', user=user or self.author, visibility=visibility,
+            publication_date=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def _timeline(self, user):
+        return list(
+            TimelineEntry.objects.filter(user=user).values_list('recipe_id', flat=True)
+        )
+
+    def test_new_recipe_is_delivered_to_followers(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipe = self._create_recipe()
+        self.assertEqual(self._timeline(self.user), [recipe.id])
+        self.assertEqual(self._timeline(self.stranger), [])
+
+    def test_private_recipe_is_not_delivered(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        self._create_recipe(visibility='me')
+        self.assertEqual(self._timeline(self.user), [])
+
+    def test_friends_recipe_is_only_delivered_to_friends(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        Follow.objects.create(follower=self.stranger, followee=self.author)
+        Follow.objects.create(follower=self.author, followee=self.user)
+        recipe = self._create_recipe(visibility='friends')
+        self.assertEqual(self._timeline(self.user), [recipe.id])
+        self.assertEqual(self._timeline(self.stranger), [])
+
+    def test_editing_visibility_updates_timelines(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipe = self._create_recipe()
+        recipe.visibility = 'me'
+        recipe.save()
+        self.assertEqual(self._timeline(self.user), [])
+
+    def test_following_backfills_existing_recipes(self):
+        recipe = self._create_recipe()
+        self._create_recipe(visibility='me')
+        Follow.objects.create(follower=self.user, followee=self.author)
+        self.assertEqual(self._timeline(self.user), [recipe.id])
+
+    def test_becoming_friends_backfills_friends_recipes(self):
+        recipe = self._create_recipe(visibility='friends')
+        Follow.objects.create(follower=self.user, followee=self.author)
+        self.assertEqual(self._timeline(self.user), [])
+        Follow.objects.create(follower=self.author, followee=self.user)
+        self.assertEqual(self._timeline(self.user), [recipe.id])
+
+    def test_unfollowing_trims_timeline(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        self._create_recipe()
+        Follow.objects.filter(follower=self.user, followee=self.author).delete()
+        self.assertEqual(self._timeline(self.user), [])
+
+    def test_losing_friendship_trims_friends_recipes(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        Follow.objects.create(follower=self.author, followee=self.user)
+        public = self._create_recipe()
+        self._create_recipe(visibility='friends')
+        Follow.objects.filter(follower=self.author, followee=self.user).delete()
+        self.assertEqual(self._timeline(self.user), [public.id])
+
+    @mock.patch('recipes.timeline.TIMELINE_FANOUT_LIMIT', 0)
+    def test_popular_authors_are_merged_when_read(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipe = self._create_recipe()
+        self.assertEqual(self._timeline(self.user), [])
+        self.assertEqual(list(following_timeline(self.user)), [recipe])
+        self.assertEqual(list(following_timeline(self.stranger)), [])
+
+    def test_editing_other_fields_keeps_entries(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipe = Recipe.objects.get(pk=self._create_recipe().pk)
+        entry_id = TimelineEntry.objects.get(user=self.user).id
+        recipe.title = 'Stew'
+        recipe.save()
+        self.assertEqual(TimelineEntry.objects.get(user=self.user).id, entry_id)
+
+    def test_editing_publication_date_moves_entries(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipe = Recipe.objects.get(pk=self._create_recipe().pk)
+        entry_id = TimelineEntry.objects.get(user=self.user).id
+        recipe.publication_date -= timedelta(days=3)
+        recipe.save()
+        entry = TimelineEntry.objects.get(user=self.user)
+        self.assertEqual(entry.id, entry_id)
+        self.assertEqual(entry.published_at, recipe.publication_date)
+
+    @mock.patch('recipes.timeline.TIMELINE_TRIM_SLACK', 1)
+    @mock.patch('recipes.timeline.TIMELINE_SIZE', 2)
+    def test_timeline_is_capped(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipes = [self._create_recipe(days_ago=days_ago) for days_ago in (3, 2, 1, 0)]
+        self.assertEqual(self._timeline(self.user), [recipes[3].id, recipes[2].id])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.timeline_size, 2)
+
+    def test_timeline_size_follows_entries(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipe = self._create_recipe()
+        self._create_recipe()
+        recipe.delete()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.timeline_size, 1)
+        Follow.objects.filter(follower=self.user, followee=self.author).delete()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.timeline_size, 0)
+
+    def test_redelivery_does_not_grow_timeline_size(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        recipe = self._create_recipe()
+        fan_out_recipe(recipe)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.timeline_size, 1)
+
+    @mock.patch('recipes.timeline.TIMELINE_FANOUT_LIMIT', 1)
+    def test_author_back_under_the_limit_is_backfilled(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        Follow.objects.create(follower=self.stranger, followee=self.author)
+        recipe = self._create_recipe()
+        self.assertEqual(self._timeline(self.user), [])
+        Follow.objects.filter(follower=self.stranger, followee=self.author).delete()
+        self.assertEqual(self._timeline(self.user), [recipe.id])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.timeline_size, 1)
+
+    def test_paginator_merges_entries_with_unfanned_authors(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        Follow.objects.create(follower=self.user, followee=self.stranger)
+        Follow.objects.create(follower=self.author, followee=self.stranger)
+        with mock.patch('recipes.timeline.TIMELINE_FANOUT_LIMIT', 1):
+            recipes = [
+                self._create_recipe(
+                    user=self.author if days_ago % 2 else self.stranger, days_ago=days_ago
+                )
+                for days_ago in range(5)
+            ]
+            newest_first = [recipe.id for recipe in recipes]
+            self.assertEqual(len(self._timeline(self.user)), 2)
+            paginator = TimelinePaginator(Recipe.objects.all(), 2, self.user)
+            first = paginator.page()
+            second = paginator.page(first.next_cursor)
+            last = paginator.page(second.next_cursor)
+            self.assertEqual([recipe.id for recipe in first], newest_first[:2])
+            self.assertEqual([recipe.id for recipe in second], newest_first[2:4])
+            self.assertEqual([recipe.id for recipe in last], newest_first[4:])
+            self.assertFalse(last.has_next())
+            previous = paginator.page(last.previous_cursor)
+            self.assertEqual([recipe.id for recipe in previous], newest_first[2:4])
+
+    def test_paginator_applies_recipe_filters_before_cutting_pages(self):
+        Follow.objects.create(follower=self.user, followee=self.author)
+        advanced = self._create_recipe(days_ago=1)
+        advanced.difficulty = 'Advanced'
+        advanced.save()
+        self._create_recipe()
+        page = TimelinePaginator(Recipe.objects.all(), 1, self.user, difficulty='Advanced').page()
+        self.assertEqual(list(page), [advanced])
+        self.assertFalse(page.has_next())
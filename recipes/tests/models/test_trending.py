@@ -0,0 +1,111 @@
+"""Unit tests for time-decayed trending scores."""
+import math
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import Recipe, User, Favourite
+from recipes.models.comment import Comment
+from recipes.trending import (
+    TRENDING_HALF_LIFE, TRENDING_VIEW_BATCH, event_score, log_add,
+    rebuild_trending_scores, record_view,
+)
+
+
+class TrendingTestCase(TestCase):
+    """Unit tests for time-decayed trending scores."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.users = list(User.objects.order_by('pk'))
+        self.author = self.users[1]
+        self.recipe = self._create_recipe()
+        self.other_recipe = self._create_recipe()
+
+    def _create_recipe(self):
+        return Recipe.objects.create(title='Soup', description='test', user=self.author)
+
+    def _score(self, recipe):
+        recipe.refresh_from_db(fields=['trending_score'])
+        return recipe.trending_score
+
+    def test_log_add(self):
+        self.assertAlmostEqual(log_add(3, 3), 4)
+        self.assertAlmostEqual(log_add(10, 1), math.log2(2 ** 10 + 2))
+        self.assertEqual(log_add(1000, 0), 1000)
+
+    def test_event_weight_halves_every_half_life(self):
+        now = timezone.now()
+        self.assertAlmostEqual(
+            event_score('favourite', now) - event_score('favourite', now - TRENDING_HALF_LIFE), 1
+        )
+
+    def test_favourite_raises_score(self):
+        Favourite.objects.create(user=self.users[0], recipe=self.recipe)
+        self.assertGreater(self._score(self.recipe), self._score(self.other_recipe))
+        self.assertEqual(list(Recipe.objects.trending()[:1]), [self.recipe])
+
+    def test_favourites_added_through_the_relation_raise_score(self):
+        self.recipe.favourites.add(self.users[0], self.users[2])
+        self.users[3].favourite_recipes.add(self.other_recipe)
+        self.assertGreater(self._score(self.recipe), self._score(self.other_recipe))
+        self.assertGreater(self._score(self.other_recipe), 0)
+
+    def test_comment_raises_score(self):
+        Comment.objects.create(recipe=self.other_recipe, user=self.users[0], text='Nice')
+        self.assertEqual(list(Recipe.objects.trending()[:1]), [self.other_recipe])
+
+    def test_scores_add_up(self):
+        Favourite.objects.create(user=self.users[0], recipe=self.recipe)
+        one = self._score(self.recipe)
+        Favourite.objects.create(user=self.users[2], recipe=self.recipe)
+        self.assertAlmostEqual(self._score(self.recipe), one + 1, places=3)
+
+    def test_saving_recipe_keeps_score(self):
+        Favourite.objects.create(user=self.users[0], recipe=self.recipe)
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        score = recipe.trending_score
+        Favourite.objects.create(user=self.users[2], recipe=self.recipe)
+        recipe.title = 'Stew'
+        recipe.save()
+        self.assertGreater(self._score(self.recipe), score)
+
+    def test_views_are_written_in_batches(self):
+        for _ in range(TRENDING_VIEW_BATCH - 1):
+            record_view(self.recipe.pk)
+        self.assertEqual(self._score(self.recipe), 0)
+        with self.assertNumQueries(1):
+            record_view(self.recipe.pk)
+        self.assertGreater(self._score(self.recipe), 0)
+
+    def test_rebuild_forgets_removed_activity(self):
+        favourite = Favourite.objects.create(user=self.users[0], recipe=self.recipe)
+        favourite.delete()
+        self.assertGreater(self._score(self.recipe), 0)
+        self.assertEqual(rebuild_trending_scores(), 0)
+        self.assertEqual(self._score(self.recipe), 0)
+
+    def test_rebuild_keeps_views(self):
+        for _ in range(TRENDING_VIEW_BATCH):
+            record_view(self.recipe.pk)
+        score = self._score(self.recipe)
+        rebuild_trending_scores()
+        self.assertAlmostEqual(self._score(self.recipe), score)
+
+    def test_recent_activity_outranks_older_activity(self):
+        for user in self.users[:3]:
+            Favourite.objects.create(user=user, recipe=self.recipe)
+        Favourite.objects.filter(recipe=self.recipe).update(
+            favourited_at=timezone.now() - 4 * TRENDING_HALF_LIFE
+        )
+        Favourite.objects.create(user=self.users[0], recipe=self.other_recipe)
+        self.assertEqual(rebuild_trending_scores(), 2)
+        self.assertEqual(list(Recipe.objects.trending()[:2]), [self.other_recipe, self.recipe])
+
+    def test_rebuild_ignores_activity_outside_the_window(self):
+        Favourite.objects.create(user=self.users[0], recipe=self.recipe)
+        Favourite.objects.update(favourited_at=timezone.now() - timedelta(days=365))
+        self.assertEqual(rebuild_trending_scores(), 0)
@@ -1,8 +1,11 @@
 """Unit tests for the User model."""
+from unittest.mock import patch
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 from recipes.models import User
 from recipes.models import Follow
+from recipes.notifications import adjust_unread_count, get_notifications_version, get_unread_count
+from recipes.tests.helpers import ShippedCacheMixin
 
 
 class UserModelTestCase(TestCase):
@@ -155,6 +158,79 @@ class UserModelTestCase(TestCase):
         Follow.objects.create(follower=self.user, followee=self.second_user)
         self.assertEqual(self.user.get_following(), 1)
 
+    def test_follow_counters_are_stored(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        self.second_user.refresh_from_db()
+        self.assertEqual(self.second_user.follower_count, 1)
+        self.assertEqual(User.objects.get(pk=self.user.pk).following_count, 1)
+
+    def test_follow_counters_decrease_on_unfollow(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        Follow.objects.filter(follower=self.user, followee=self.second_user).delete()
+        self.user.refresh_from_db()
+        self.second_user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 0)
+        self.assertEqual(self.second_user.follower_count, 0)
+
+    def test_saving_a_stale_user_keeps_its_counters(self):
+        stale = User.objects.get(pk=self.user.pk)
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+        stale.first_name = 'Johnny'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.first_name, 'Johnny')
+        self.assertEqual(stale.follower_count, 1)
+
+    def test_get_friend_ids_with_no_follows(self):
+        self.assertEqual(self.user.get_friend_ids(), frozenset())
+
+    def test_get_friend_ids_ignores_one_way_follows(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        self.assertEqual(self.user.get_friend_ids(), frozenset())
+
+    def test_get_friend_ids_contains_mutual_follows(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+        self.assertEqual(self.user.get_friend_ids(), {self.second_user.id})
+        self.assertEqual(self.second_user.get_friend_ids(), {self.user.id})
+
+    def test_get_friend_ids_is_cached_between_instances(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+        self.user.get_friend_ids()
+        fresh_user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(fresh_user.get_friend_ids(), {self.second_user.id})
+
+    def test_get_friend_ids_is_invalidated_on_unfollow(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+        self.assertEqual(self.user.get_friend_ids(), {self.second_user.id})
+        Follow.objects.filter(follower=self.second_user, followee=self.user).delete()
+        fresh_user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(fresh_user.get_friend_ids(), frozenset())
+
+    def test_search_keys_are_set_when_saved(self):
+        self.assertEqual(self.user.username_key, 'johndoe')
+        self.assertEqual(self.user.name_key, 'john doe')
+        self.user.first_name = 'JOHNNY'
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name_key, 'johnny doe')
+
+    def test_email_hash_is_stored_and_follows_email_changes(self):
+        self.assertEqual(self.user.email_hash, UserModelTestCase.GRAVATAR_URL.rsplit('/', 1)[1])
+        self.user.email = ' Someone@Example.org '
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email_hash, 'a70eaed09677478b42b11fc7a04f4c87')
+
+    def test_gravatar_does_not_hash(self):
+        with patch('recipes.avatars.hashlib.md5') as md5:
+            self.user.gravatar()
+            self.user.avatar(30)
+        md5.assert_not_called()
+
     def _gravatar_url(self, size):
         gravatar_url = f"{UserModelTestCase.GRAVATAR_URL}?size={size}&default=mp"
         return gravatar_url
@@ -168,3 +244,25 @@ class UserModelTestCase(TestCase):
     def _assert_user_is_invalid(self):
         with self.assertRaises(ValidationError):
             self.user.full_clean()
+
+
+class UserCacheTestCase(ShippedCacheMixin, TestCase):
+    """Tests of reading a user's cache entries with the shipped cache backend."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def test_entries_about_a_user_are_read_together(self):
+        user = User.objects.get(username='@johndoe')
+        user.get_friend_ids()
+        get_unread_count(user)
+        user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.get_friend_ids(), frozenset())
+            self.assertEqual(get_unread_count(user), 0)
+            self.assertEqual(get_notifications_version(user), 0)
+
+    def test_entries_are_read_again_after_use(self):
+        user = User.objects.get(username='@johndoe')
+        get_unread_count(user)
+        adjust_unread_count(user.pk, 2)
+        self.assertEqual(get_unread_count(user), 2)
@@ -0,0 +1,63 @@
+import unittest
+from django.conf import settings
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Tests run in a single process, and a database cache would add queries to
+# every assertNumQueries budget. The shipped default cache stays configured as
+# `SHIPPED_CACHE_ALIAS` (which also gets its table created by migrate), for the
+# tests that measure it (see `ShippedCacheMixin`).
+SHIPPED_CACHE_ALIAS = 'shipped'
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipify-tests',
+    }
+}
+
+
+class CacheIsolatingResultMixin:
+    """Mixin for test results that starts every test with empty caches."""
+
+    def startTest(self, test):
+        for cache in caches.all():
+            cache.clear()
+        super().startTest(test)
+
+
+class CacheIsolatingTestResult(CacheIsolatingResultMixin, unittest.TextTestResult):
+    """Text test result that starts every test with empty caches."""
+
+
+class CacheIsolatingTestRunner(DiscoverRunner):
+    """
+    Test runner that clears every configured cache before each test.
+
+    Each test runs inside a transaction that is rolled back afterwards, so
+    primary keys are handed out again by the next test. Without clearing,
+    a cache entry written for one test's user 1 would leak into the next
+    test's, unrelated, user 1.
+
+    The shared cache of `settings.CACHES` is swapped for an in-memory one
+    for the duration of the run, and kept under `SHIPPED_CACHE_ALIAS`.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        self._cache_settings = override_settings(
+            CACHES={**TEST_CACHES, SHIPPED_CACHE_ALIAS: settings.CACHES['default']}
+        )
+        self._cache_settings.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self._cache_settings.disable()
+
+    def get_resultclass(self):
+        """Return the result class for the run, made to clear caches before each test."""
+        resultclass = super().get_resultclass()
+        if resultclass is None:
+            return CacheIsolatingTestResult
+        # --debug-sql and --pdb pick their own result class; keep its behaviour.
+        return type(f'CacheIsolating{resultclass.__name__}', (CacheIsolatingResultMixin, resultclass), {})
@@ -0,0 +1,166 @@
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe, Follow, Tag
+from recipes.models.comment import Comment
+from recipes.tests.helpers import crafted_cursor
+
+
+class ApiViewsTest(TestCase):
+    """Tests of the read-only JSON API."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.recipes = [
+            Recipe.objects.create(
+                title=f'Soup {i}', description='Warming lentils', user=self.second_user
+            )
+            for i in range(5)
+        ]
+        self.private = Recipe.objects.create(
+            title='Secret', description='Hidden', user=self.second_user, visibility='me'
+        )
+        self.recipes[0].tags.add(Tag.objects.get(name='Vegan'))
+        Comment.objects.create(recipe=self.recipes[0], user=self.user, text='Lovely')
+        self.client.login(username='@johndoe', password='Password123')
+
+    def test_recipe_list_urls(self):
+        self.assertEqual(reverse('api_recipes'), '/api/recipes/')
+        self.assertEqual(reverse('api_recipe', args=[1]), '/api/recipes/1/')
+
+    def test_lists_visible_recipes_newest_first(self):
+        data = self.client.get(reverse('api_recipes')).json()
+        titles = [recipe['title'] for recipe in data['results']]
+        self.assertEqual(titles, [f'Soup {i}' for i in reversed(range(5))])
+        self.assertEqual(data['results'][0]['author'], '@janedoe')
+
+    def test_fields_select_only_requested_columns(self):
+        response = self.client.get(reverse('api_recipes'), {'fields': 'id,fav_count'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'fav_count'})
+
+    def test_tags_are_prefetched_only_when_asked_for(self):
+        self.client.get(reverse('api_recipes'), {'fields': 'id'})
+        # Session, user, then the recipes; the tags take one more query.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('api_recipes'), {'fields': 'id'})
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api_recipes'), {'fields': 'id,tags'})
+        tags = {recipe['id']: recipe['tags'] for recipe in response.json()['results']}
+        self.assertEqual(tags[self.recipes[0].id], ['Vegan'])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('api_recipes'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_cursor_pagination(self):
+        first = self.client.get(reverse('api_recipes'), {'limit': 2}).json()
+        self.assertEqual(len(first['results']), 2)
+        second = self.client.get(
+            reverse('api_recipes'), {'limit': 2, 'cursor': first['next_cursor']}
+        ).json()
+        self.assertEqual([r['title'] for r in second['results']], ['Soup 2', 'Soup 1'])
+        response = self.client.get(reverse('api_recipes'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_crafted_cursor_is_rejected(self):
+        for values in [[None, None], [{}, 1], [[1], 1], [1, 2, 3], ['x', 1], [1]]:
+            with self.subTest(values=values):
+                response = self.client.get(reverse('api_recipes'), {'cursor': crafted_cursor(values)})
+                self.assertEqual(response.status_code, 400)
+
+    def test_etag_answers_not_modified(self):
+        response = self.client.get(reverse('api_recipes'))
+        etag = response.headers['ETag']
+        response = self.client.get(reverse('api_recipes'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Recipe.objects.create(title='New', description='Fresh', user=self.second_user)
+        response = self.client.get(reverse('api_recipes'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_etag_changes_with_the_recipes(self):
+        response = self.client.get(reverse('api_feed'))
+        etag = response.headers['ETag']
+        response = self.client.get(reverse('api_feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Recipe.objects.filter(pk=self.recipes[4].pk).touch()
+        response = self.client.get(reverse('api_feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        response = self.client.get(reverse('api_feed'), {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_ndjson_streams_every_visible_recipe(self):
+        response = self.client.get(reverse('api_recipes'), {'format': 'ndjson', 'fields': 'title'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0], '{"title":"Soup 4"}')
+
+    def test_search(self):
+        Recipe.objects.create(title='Pancakes', description='Fluffy', user=self.second_user)
+        data = self.client.get(reverse('api_recipes'), {'q': 'pancake'}).json()
+        self.assertEqual([r['title'] for r in data['results']], ['Pancakes'])
+
+    def test_recipe_detail(self):
+        data = self.client.get(reverse('api_recipe', args=[self.recipes[0].id])).json()
+        self.assertEqual(data['title'], 'Soup 0')
+        self.assertEqual(data['tags'], ['Vegan'])
+        self.assertEqual(data['comment_count'], 1)
+
+    def test_hidden_recipe_is_not_found(self):
+        response = self.client.get(reverse('api_recipe', args=[self.private.id]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Not found.'})
+
+    def test_recipe_comments(self):
+        url = reverse('api_recipe_comments', args=[self.recipes[0].id])
+        data = self.client.get(url).json()
+        self.assertEqual(data['results'][0]['text'], 'Lovely')
+        self.assertEqual(data['results'][0]['author'], '@johndoe')
+
+    def test_feed_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('api_feed'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'error': 'Authentication required.'})
+
+    def test_ndjson_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('api_recipes'), {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get(reverse('api_recipes')).status_code, 200)
+
+    def test_following_feed(self):
+        data = self.client.get(reverse('api_feed'), {'scope': 'following'}).json()
+        self.assertEqual(data['results'], [])
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        data = self.client.get(reverse('api_feed'), {'scope': 'following'}).json()
+        self.assertEqual(len(data['results']), 5)
+
+    def test_users(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        data = self.client.get(reverse('api_users')).json()
+        self.assertEqual(data['results'][0]['username'], '@janedoe')
+        self.assertEqual(data['results'][0]['follower_count'], 1)
+        data = self.client.get(reverse('api_user', args=['@janedoe'])).json()
+        self.assertEqual(data['url'], reverse('user_profile', args=['@janedoe']))
+        self.assertNotIn('email', data)
+
+    def test_user_search(self):
+        data = self.client.get(reverse('api_users'), {'q': 'pickles'}).json()
+        self.assertEqual(
+            sorted(user['username'] for user in data['results']),
+            ['@peterpickles', '@petrapickles'],
+        )
+        data = self.client.get(reverse('api_users'), {'q': 'ane'}).json()
+        self.assertEqual([user['username'] for user in data['results']], ['@janedoe'])
+
+    def test_api_is_read_only(self):
+        response = self.client.post(reverse('api_recipes'))
+        self.assertEqual(response.status_code, 405)
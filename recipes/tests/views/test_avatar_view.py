@@ -0,0 +1,40 @@
+"""Tests of the avatar view."""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User
+
+
+class AvatarViewTestCase(TestCase):
+    """Tests of the avatar view."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.url = self.user.avatar(30)
+
+    def test_avatar_url(self):
+        self.assertEqual(self.url, f'/avatars/{self.user.email_hash}/30.svg')
+
+    def test_avatar_sizes_round_up_to_served_sizes(self):
+        self.assertEqual(self.user.avatar(50), reverse('avatar', args=[self.user.email_hash, 60]))
+        self.assertEqual(self.user.avatar(500), reverse('avatar', args=[self.user.email_hash, 120]))
+
+    def test_get_avatar(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertContains(response, 'width="30"')
+        self.assertContains(response, f'fill="#{self.user.email_hash[:6]}"')
+
+    def test_avatar_is_rendered_once_per_size(self):
+        self.client.get(self.url)
+        self.assertIsNotNone(cache.get(f'identicon:{self.user.email_hash}:30'))
+        self.assertIsNone(cache.get(f'identicon:{self.user.email_hash}:60'))
+
+    def test_unknown_size_or_bad_hash_is_not_found(self):
+        self.assertEqual(self.client.get(f'/avatars/{self.user.email_hash}/31.svg').status_code, 404)
+        self.assertEqual(self.client.get('/avatars/not-a-hash/30.svg').status_code, 404)
@@ -1,6 +1,6 @@
 from django.test import TestCase
 from django.urls import reverse
-from recipes.models import User, Recipe
+from recipes.models import User, Recipe, Favourite
 
 class DashboardViewTest(TestCase):
 
@@ -54,6 +54,18 @@ class DashboardViewTest(TestCase):
         self.assertIn(first_recipe, recipe_list)
         self.assertIn(second_recipe, recipe_list)
 
+    def test_dashboard_shows_trending_recipes(self):
+        quiet = Recipe.objects.create(title="Toast", description="Bread", user=self.second_user)
+        busy = Recipe.objects.create(title="Curry", description="Spices", user=self.second_user)
+        Favourite.objects.create(user=self.user, recipe=busy)
+        private = Recipe.objects.create(
+            title="Secret", description="Hidden", user=self.second_user, visibility='me'
+        )
+        Favourite.objects.create(user=self.second_user, recipe=private)
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.context['trending_recipes']), [busy, quiet])
+        self.assertContains(response, 'Trending Recipes')
+
     def test_dashboard_pagination_page_size(self):
         for i in range(12):
             Recipe.objects.create(
@@ -1,6 +1,6 @@
 from django.test import TestCase
 from django.urls import reverse
-from recipes.models import User, Recipe, Favourite
+from recipes.models import User, Recipe, Favourite, Notification
 from recipes.tests.helpers import reverse_with_next
 
 
@@ -50,4 +50,35 @@ class FavouriteViewTest(TestCase):
         self.assertEqual(data["favourite_count"], 0)
         self.assertFalse(
             Favourite.objects.filter(user=self.user, recipe=self.recipe).exists()
-        )
\ No newline at end of file
+        )
+
+    def test_favourites_by_others_coalesce_into_one_notification(self):
+        for username in ['@janedoe', '@petrapickles', '@peterpickles']:
+            self.client.login(username=username, password='Password123')
+            self.client.post(self.toggle_url, {"recipe_id": self.recipe.id})
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.kind, Notification.FAVOURITE)
+        self.assertEqual(notification.actor.username, '@peterpickles')
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(
+            notification.text,
+            "@peterpickles and 2 others favourited your recipe 'Yoghurt bowl'"
+        )
+
+    def test_unfavouriting_does_not_notify(self):
+        other_user = User.objects.get(username='@janedoe')
+        Favourite.objects.create(user=other_user, recipe=self.recipe)
+        self.client.login(username=other_user.username, password='Password123')
+        self.client.post(self.toggle_url, {"recipe_id": self.recipe.id})
+        self.assertFalse(Notification.objects.exists())
+
+    def test_favourites_after_notification_is_read_start_a_new_one(self):
+        other_user = User.objects.get(username='@janedoe')
+        self.client.login(username=other_user.username, password='Password123')
+        self.client.post(self.toggle_url, {"recipe_id": self.recipe.id})
+        Notification.objects.update(is_read=True)
+        self.client.login(username='@petrapickles', password='Password123')
+        self.client.post(self.toggle_url, {"recipe_id": self.recipe.id})
+        unread = Notification.objects.get(user=self.user, is_read=False)
+        self.assertEqual(unread.actor_count, 1)
+        self.assertEqual(Notification.objects.count(), 2)
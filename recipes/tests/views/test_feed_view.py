@@ -0,0 +1,175 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from recipes.models import User, Recipe, Favourite, Follow
+from recipes.models.comment import Comment
+from recipes.tests.helpers import crafted_cursor
+from recipes.views.feed_view import FEED_PAGE_SIZE
+
+
+class FeedViewTest(TestCase):
+    """Tests of the feed view."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.url = reverse('feed')
+        self.client.login(username='@johndoe', password='Password123')
+
+    def _create_recipes(self, count, user=None):
+        now = timezone.now()
+        return [
+            Recipe.objects.create(
+                title=f'Recipe {i}',
+                description='test',
+                user=user or self.second_user,
+                publication_date=now - timedelta(minutes=i),
+            )
+            for i in range(count)
+        ]
+
+    def test_feed_url(self):
+        self.assertEqual(self.url, '/feed/')
+
+    def test_feed_requires_login(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue('/log_in' in response.url)
+
+    def test_feed_first_page_is_limited_to_page_size(self):
+        recipes = self._create_recipes(FEED_PAGE_SIZE + 3)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        page = response.context['recipes']
+        self.assertEqual(list(page), recipes[:FEED_PAGE_SIZE])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_next_cursor_continues_where_previous_page_stopped(self):
+        recipes = self._create_recipes(FEED_PAGE_SIZE + 3)
+        first_page = self.client.get(self.url).context['recipes']
+        response = self.client.get(self.url, {'cursor': first_page.next_cursor})
+        second_page = response.context['recipes']
+        self.assertEqual(list(second_page), recipes[FEED_PAGE_SIZE:])
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+
+    def test_previous_cursor_returns_to_first_page(self):
+        recipes = self._create_recipes(FEED_PAGE_SIZE + 3)
+        first_page = self.client.get(self.url).context['recipes']
+        second_page = self.client.get(
+            self.url, {'cursor': first_page.next_cursor}
+        ).context['recipes']
+        response = self.client.get(self.url, {'cursor': second_page.previous_cursor})
+        page = response.context['recipes']
+        self.assertEqual(list(page), recipes[:FEED_PAGE_SIZE])
+        self.assertFalse(page.has_previous())
+
+    def test_recipes_with_same_publication_date_are_not_skipped(self):
+        published = timezone.now()
+        recipes = [
+            Recipe.objects.create(
+                title=f'Recipe {i}',
+                description='test',
+                user=self.second_user,
+                publication_date=published,
+            )
+            for i in range(FEED_PAGE_SIZE + 2)
+        ]
+        first_page = self.client.get(self.url).context['recipes']
+        second_page = self.client.get(
+            self.url, {'cursor': first_page.next_cursor}
+        ).context['recipes']
+        seen = list(first_page) + list(second_page)
+        self.assertCountEqual(seen, recipes)
+
+    def test_invalid_cursor_shows_first_page(self):
+        recipes = self._create_recipes(3)
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['recipes']), recipes)
+
+    def test_crafted_cursor_shows_first_page(self):
+        recipes = self._create_recipes(3)
+        for sort in ['recent', 'popular', 'trending']:
+            for values in [[None, None], [{}, 1], [[1], 1], [1, 2, 3], ['x', 1], [1]] + [[None, None, None], ['x', 'y', 1]]:
+                with self.subTest(sort=sort, values=values):
+                    response = self.client.get(
+                        self.url, {'sort': sort, 'cursor': crafted_cursor(values)}
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertCountEqual(response.context['recipes'], recipes)
+
+    def test_popular_sort_paginates_by_favourite_count(self):
+        recipes = self._create_recipes(FEED_PAGE_SIZE + 1)
+        least_recent = recipes[-1]
+        Favourite.objects.create(user=self.user, recipe=least_recent)
+        first_page = self.client.get(self.url, {'sort': 'popular'}).context['recipes']
+        self.assertEqual(first_page[0], least_recent)
+        second_page = self.client.get(
+            self.url, {'sort': 'popular', 'cursor': first_page.next_cursor}
+        ).context['recipes']
+        self.assertEqual(list(second_page), [recipes[-2]])
+
+    def test_trending_sort_paginates_by_trending_score(self):
+        recipes = self._create_recipes(FEED_PAGE_SIZE + 1)
+        least_recent = recipes[-1]
+        Comment.objects.create(recipe=least_recent, user=self.user, text='Lovely')
+        first_page = self.client.get(self.url, {'sort': 'trending'}).context['recipes']
+        self.assertEqual(first_page[0], least_recent)
+        second_page = self.client.get(
+            self.url, {'sort': 'trending', 'cursor': first_page.next_cursor}
+        ).context['recipes']
+        self.assertEqual(len(second_page), 1)
+
+    def test_pagination_links_keep_filters(self):
+        self._create_recipes(FEED_PAGE_SIZE + 1)
+        response = self.client.get(self.url, {'difficulty': 'Beginner'})
+        page = response.context['recipes']
+        self.assertContains(response, f'difficulty=Beginner&cursor={page.next_cursor}')
+
+    def test_feed_hides_private_recipes_of_other_users(self):
+        hidden = Recipe.objects.create(
+            title='Secret', description='test', user=self.second_user, visibility='me'
+        )
+        response = self.client.get(self.url)
+        self.assertNotIn(hidden, list(response.context['recipes']))
+
+    def test_query_count_does_not_grow_with_number_of_cards(self):
+        self._create_recipes(1)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as single_card:
+            self.client.get(self.url)
+        recipes = self._create_recipes(FEED_PAGE_SIZE - 1)
+        for recipe in recipes:
+            Favourite.objects.create(user=self.user, recipe=recipe)
+        with CaptureQueriesContext(connection) as full_page:
+            self.client.get(self.url)
+        self.assertEqual(len(full_page), len(single_card))
+
+    def test_following_scope_only_shows_followed_users(self):
+        followed = self._create_recipes(1)[0]
+        stranger = User.objects.get(username='@petrapickles')
+        self._create_recipes(1, user=stranger)
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        response = self.client.get(self.url, {'scope': 'following'})
+        self.assertEqual(response.context['scope'], 'following')
+        self.assertEqual(list(response.context['recipes']), [followed])
+
+    def test_following_scope_paginates(self):
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        recipes = self._create_recipes(FEED_PAGE_SIZE + 2)
+        first_page = self.client.get(self.url, {'scope': 'following'}).context['recipes']
+        second_page = self.client.get(
+            self.url, {'scope': 'following', 'cursor': first_page.next_cursor}
+        ).context['recipes']
+        self.assertEqual(list(first_page) + list(second_page), recipes)
@@ -0,0 +1,121 @@
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe
+from recipes.models.comment import Notification
+from recipes.notifications import (
+    NotificationQueue, deferred_notifications, get_unread_count, notify,
+)
+
+
+class NotificationViewTest(TestCase):
+    """Tests of the notification badge and the notification read view."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(title='Soup', description='test', user=self.user)
+        self.client.login(username='@johndoe', password='Password123')
+
+    def _notify(self, text='Hello'):
+        return Notification.objects.create(
+            user=self.user, text=text, link=f'/recipe/{self.recipe.id}/'
+        )
+
+    def test_pages_show_unread_count(self):
+        self._notify()
+        self._notify()
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response.context['unread_count'], 2)
+
+    def test_warm_unread_count_costs_no_queries(self):
+        self._notify()
+        get_unread_count(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user), 1)
+
+    def test_new_notification_updates_cached_count(self):
+        self.assertEqual(get_unread_count(self.user), 0)
+        self._notify()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user), 1)
+
+    def test_reading_notification_decrements_count_once(self):
+        notification = self._notify()
+        self.assertEqual(get_unread_count(self.user), 1)
+        url = reverse('notification_read', args=[notification.id])
+        response = self.client.get(url)
+        self.assertRedirects(response, notification.link, fetch_redirect_response=False)
+        self.client.get(url)
+        notification.refresh_from_db()
+        self.assertTrue(notification.is_read)
+        self.assertEqual(get_unread_count(self.user), 0)
+
+    def test_cannot_read_other_users_notifications(self):
+        notification = Notification.objects.create(user=self.second_user, text='Hi')
+        response = self.client.get(reverse('notification_read', args=[notification.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_menu_lists_latest_notifications_first(self):
+        self._notify('First')
+        self._notify('Second')
+        response = self.client.get(reverse('feed'))
+        notifications = list(response.context['recent_notifications'])
+        self.assertEqual([n.text for n in notifications], ['Second', 'First'])
+
+    def test_anonymous_pages_have_no_notifications(self):
+        self.client.logout()
+        response = self.client.get(reverse('recipe_browse'))
+        self.assertEqual(response.context['unread_count'], 0)
+
+    def test_queue_writes_coalesced_notifications_in_bulk(self):
+        other_users = list(User.objects.exclude(pk=self.user.pk))
+        second_recipe = Recipe.objects.create(title='Stew', description='test', user=self.user)
+        self.assertEqual(get_unread_count(self.user), 0)
+        with self.assertNumQueries(5):
+            with NotificationQueue() as queue:
+                for actor in other_users:
+                    queue.add(Notification.FAVOURITE, self.recipe, actor)
+                    queue.add(Notification.FAVOURITE, second_recipe, actor)
+                queue.add(Notification.COMMENT, self.recipe, self.user)
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(
+            set(Notification.objects.values_list('actor_count', flat=True)),
+            {len(other_users)}
+        )
+        self.assertEqual(get_unread_count(self.user), 2)
+
+    def test_alternating_actors_count_once_each(self):
+        third_user = User.objects.get(username='@petrapickles')
+        with NotificationQueue() as queue:
+            for actor in [self.second_user, third_user, self.second_user, third_user]:
+                queue.add(Notification.COMMENT, self.recipe, actor)
+        with NotificationQueue() as queue:
+            queue.add(Notification.COMMENT, self.recipe, self.second_user)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(
+            notification.text, "@janedoe and 1 other commented on your recipe 'Soup'"
+        )
+
+    def test_deferred_events_are_written_in_one_flush(self):
+        second_recipe = Recipe.objects.create(title='Stew', description='test', user=self.user)
+        with deferred_notifications():
+            with self.assertNumQueries(0):
+                notify(Notification.FAVOURITE, self.recipe, self.second_user)
+                notify(Notification.COMMENT, second_recipe, self.second_user)
+            self.assertFalse(Notification.objects.exists())
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_deferred_events_are_dropped_on_error(self):
+        with self.assertRaises(ValueError):
+            with deferred_notifications():
+                notify(Notification.FAVOURITE, self.recipe, self.second_user)
+                raise ValueError
+        self.assertFalse(Notification.objects.exists())
+        notify(Notification.FAVOURITE, self.recipe, self.second_user)
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe, Follow
+from recipes.models.recipes import Ingredient
+from recipes.pantry import PantryIndex, invalidate_pantry_index
+
+
+class PantryViewTest(TestCase):
+    """Tests of the pantry ranking view."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.url = reverse('pantry')
+        self.client.login(username='@johndoe', password='Password123')
+        self.omelette = self._create_recipe('Omelette', 'Eggs 3\nButter 10 g')
+        self.pancakes = self._create_recipe('Pancakes', 'Eggs 2\nFlour 1 cup\nMilk 1 cup\nSugar')
+        self.risotto = self._create_recipe('Risotto', 'Rice 1 cup\nButter 20 g\nParmesan')
+
+    def _create_recipe(self, title, ingredients, user=None, visibility='public'):
+        return Recipe.objects.create(
+            title=title, description='test', ingredients=ingredients,
+            user=user or self.second_user, visibility=visibility,
+        )
+
+    def _result_ids(self, response):
+        return [result['id'] for result in response.json()['results']]
+
+    def test_pantry_url(self):
+        self.assertEqual(self.url, '/recipes/pantry/')
+
+    def test_pantry_requires_login(self):
+        self.client.logout()
+        response = self.client.get(self.url, {'q': 'eggs'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_recipes_are_ranked_by_coverage(self):
+        response = self.client.get(self.url, {'q': 'eggs, butter, milk'})
+        self.assertEqual(
+            self._result_ids(response),
+            [self.omelette.id, self.pancakes.id, self.risotto.id]
+        )
+        first = response.json()['results'][0]
+        self.assertEqual(first['coverage'], 1.0)
+        self.assertEqual(first['matched'], ['butter', 'eggs'])
+        self.assertEqual(first['missing_count'], 0)
+
+    def test_repeated_ingredient_parameters_are_accepted(self):
+        response = self.client.get(self.url, {'ingredient': ['Rice', 'Parmesan']})
+        self.assertEqual(self._result_ids(response), [self.risotto.id])
+
+    def test_unknown_ingredients_are_reported(self):
+        response = self.client.get(self.url, {'q': 'eggs, saffron'})
+        self.assertEqual(response.json()['unknown'], ['saffron'])
+
+    def test_limit_restricts_number_of_results(self):
+        response = self.client.get(self.url, {'q': 'eggs, butter', 'limit': '1'})
+        self.assertEqual(self._result_ids(response), [self.omelette.id])
+
+    def test_private_recipes_of_other_users_are_hidden(self):
+        hidden = self._create_recipe('Secret Eggs', 'Eggs', visibility='me')
+        own = self._create_recipe('My Eggs', 'Eggs', user=self.user, visibility='me')
+        response = self.client.get(self.url, {'q': 'eggs'})
+        self.assertNotIn(hidden.id, self._result_ids(response))
+        self.assertIn(own.id, self._result_ids(response))
+
+    def test_friends_recipes_are_visible_to_friends(self):
+        shared = self._create_recipe('Friendly Eggs', 'Eggs', visibility='friends')
+        self.assertNotIn(shared.id, self._result_ids(self.client.get(self.url, {'q': 'eggs'})))
+        Follow.objects.create(follower=self.user, followee=self.second_user)
+        Follow.objects.create(follower=self.second_user, followee=self.user)
+        self.assertIn(shared.id, self._result_ids(self.client.get(self.url, {'q': 'eggs'})))
+
+    def test_index_follows_recipe_changes(self):
+        self.client.get(self.url, {'q': 'rice'})
+        self.risotto.ingredients = 'Barley 1 cup'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.risotto.save()
+        response = self.client.get(self.url, {'q': 'rice'})
+        self.assertEqual(self._result_ids(response), [])
+
+    def test_index_follows_deleted_and_hidden_recipes(self):
+        self.client.get(self.url, {'q': 'butter'})
+        self.risotto.visibility = 'me'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.omelette.delete()
+            self.risotto.save()
+        response = self.client.get(self.url, {'q': 'butter'})
+        self.assertEqual(self._result_ids(response), [])
+
+    def test_changes_are_applied_without_rebuilding(self):
+        self.client.get(self.url, {'q': 'rice'})
+        with self.captureOnCommitCallbacks(execute=True):
+            paella = self._create_recipe('Paella', 'Rice 2 cups\nSaffron')
+        with mock.patch.object(PantryIndex, 'build', wraps=PantryIndex.build) as build:
+            response = self.client.get(self.url, {'q': 'rice'})
+        build.assert_not_called()
+        self.assertEqual(self._result_ids(response), [paella.id, self.risotto.id])
+
+    def test_a_change_is_logged_once_on_commit(self):
+        self.risotto.ingredients = 'Barley 1 cup'
+        with mock.patch('recipes.signals.record_pantry_change') as record:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.risotto.save()
+                record.assert_not_called()
+        record.assert_called_once_with(self.risotto.id)
+
+    def test_update_only_touches_the_recipe_postings(self):
+        index = PantryIndex.build()
+        self.risotto.ingredients = 'Barley 1 cup'
+        self.risotto.save()
+        updated = index.updated([self.risotto.id])
+        eggs, butter, barley = (
+            Ingredient.objects.get(name=name).id for name in ('eggs', 'butter', 'barley')
+        )
+        self.assertIs(updated.postings[eggs], index.postings[eggs])
+        self.assertEqual(list(updated.postings[butter]), [self.omelette.id])
+        self.assertEqual(list(updated.postings[barley]), [self.risotto.id])
+        self.assertEqual(updated.recipe_ingredients[self.risotto.id], (barley,))
+
+    def test_invalidating_rebuilds_the_index(self):
+        self.client.get(self.url, {'q': 'rice'})
+        invalidate_pantry_index()
+        with mock.patch.object(PantryIndex, 'build', wraps=PantryIndex.build) as build:
+            self.client.get(self.url, {'q': 'rice'})
+        build.assert_called_once()
@@ -1,4 +1,5 @@
 from django.test import TestCase
+from django.utils.html import escape
 from recipes.models import User, Recipe, Favourite, Follow
 from django.urls import reverse
 
@@ -194,8 +195,8 @@ class ProfileDisplayViewTest(TestCase):
         self.assertIn('gravatar.com/avatar/', url)
         self.assertIn('size=120', url)
 
-    def test_profile_context_includes_user_avatar(self):
+    def test_profile_shows_local_avatar_before_gravatar(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
-        self.assertIn('user_avatar', response.context)
-        self.assertEqual(response.context['user_avatar'], self.user.gravatar())
+        self.assertContains(response, f'src="{self.user.avatar(70)}"')
+        self.assertContains(response, f'data-gravatar="{escape(self.user.gravatar(70, default="404"))}"')
@@ -0,0 +1,90 @@
+"""Query budgets of the main views, so N+1 regressions fail the build."""
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe, Follow, Favourite
+from recipes.models.comment import Comment
+from recipes.tests.helpers import QueryBudgetMixin, ShippedCacheMixin
+
+
+class QueryBudgetTest(ShippedCacheMixin, TestCase, QueryBudgetMixin):
+    """
+    Budgets are measured with the shipped cache backend, whose reads may
+    be queries too: one for the viewer's entries (see `User.cached()`)
+    and one for the page's recipe cards (see `recipes.cards`).
+
+    Each view is loaded once to warm caches, then loaded again within its
+    budget. The data has several rows of everything a page lists, so a
+    query per row would exceed the budget.
+    """
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.others = list(User.objects.exclude(pk=self.user.pk))
+        for other in self.others:
+            Follow.objects.create(follower=self.user, followee=other)
+            Follow.objects.create(follower=other, followee=self.user)
+        for i in range(12):
+            recipe = Recipe.objects.create(
+                title=f'Recipe {i}', description='test', ingredients='Eggs 2\nMilk',
+                user=self.others[i % len(self.others)],
+            )
+            Favourite.objects.create(user=self.user, recipe=recipe)
+            Comment.objects.create(recipe=recipe, user=self.others[0], text='Nice')
+        Comment.objects.create(recipe=recipe, user=self.others[1], text='Great')
+        self.recipe = recipe
+        self.client.login(username='@johndoe', password='Password123')
+
+    def _assert_budget(self, url, budget):
+        self.client.get(url)
+        with self.assertMaxQueries(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_budget(self):
+        self._assert_budget(reverse('feed'), 7)
+
+    def test_following_feed_budget(self):
+        self._assert_budget(reverse('feed') + '?scope=following', 9)
+
+    def test_dashboard_budget(self):
+        self._assert_budget(reverse('dashboard'), 8)
+
+    def test_view_profile_budget(self):
+        self._assert_budget(reverse('view_profile'), 10)
+
+    def test_user_profile_budget(self):
+        self._assert_budget(reverse('user_profile', args=['@janedoe']), 12)
+
+    def test_recipe_browse_budget(self):
+        self._assert_budget(reverse('recipe_browse') + '?q=recipe', 8)
+
+    def test_user_browse_budget(self):
+        self._assert_budget(reverse('user_browse') + '?q=doe', 5)
+
+    def test_recipe_full_view_budget(self):
+        self._assert_budget(reverse('view_recipe', args=[self.recipe.id]), 13)
+
+    def test_pantry_budget(self):
+        self._assert_budget(reverse('pantry') + '?q=eggs', 7)
+
+    def test_follower_pages_do_not_grow_with_follower_count(self):
+        author = self.others[0]
+        url = reverse('user_profile', args=[author.username])
+        self.client.get(url)
+        with self.assertMaxQueries(12) as few_followers:
+            self.client.get(url)
+        for i in range(20):
+            follower = User.objects.create(
+                username=f'@follower{i}', email=f'follower{i}@example.com',
+                first_name='Follower', last_name=str(i),
+            )
+            Follow.objects.create(follower=follower, followee=author)
+        with self.assertMaxQueries(few_followers.count):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['user_followers'].object_list), 5)
+        self.assertEqual(response.context['user_followers'].paginator.num_pages, 5)
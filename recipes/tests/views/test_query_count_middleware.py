@@ -0,0 +1,57 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from recipes.middleware import (
+    DUPLICATE_QUERY_THRESHOLD, QueryCountMiddleware, query_fingerprint
+)
+from recipes.models import User
+
+
+class QueryCountMiddlewareTest(TestCase):
+    """Tests of the query count middleware."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.login(username='@johndoe', password='Password123')
+
+    @override_settings(RECIPES_SERVER_TIMING=True)
+    def test_response_has_server_timing_header(self):
+        response = self.client.get(reverse('feed'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+
+    @override_settings(RECIPES_SERVER_TIMING=False)
+    def test_server_timing_header_can_be_disabled(self):
+        response = self.client.get(reverse('feed'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_server_timing_header_follows_debug_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('feed')))
+        with self.settings(DEBUG=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('feed')))
+
+    def test_request_is_logged(self):
+        with self.assertLogs('recipes.queries', level='DEBUG') as logs:
+            self.client.get(reverse('feed'))
+        self.assertIn('GET /feed/ 200 queries=', logs.output[0])
+
+    @override_settings(RECIPES_SERVER_TIMING=True)
+    def test_repeated_queries_are_logged_as_warning(self):
+        def view(request):
+            for user_id in range(DUPLICATE_QUERY_THRESHOLD):
+                User.objects.filter(pk=user_id).exists()
+            return HttpResponse()
+
+        middleware = QueryCountMiddleware(view)
+        with self.assertLogs('recipes.queries', level='WARNING') as logs:
+            response = middleware(RequestFactory().get('/n-plus-one/'))
+        self.assertIn(f'desc="{DUPLICATE_QUERY_THRESHOLD} queries"', response['Server-Timing'])
+        self.assertIn(f'duplicates={DUPLICATE_QUERY_THRESHOLD}', logs.output[0])
+        self.assertIn(f'repeated {DUPLICATE_QUERY_THRESHOLD} times', logs.output[1])
+
+    def test_in_lists_share_a_fingerprint(self):
+        self.assertEqual(
+            query_fingerprint('SELECT 1 WHERE id IN (%s, %s)'),
+            query_fingerprint('SELECT 1 WHERE id IN (%s)'),
+        )
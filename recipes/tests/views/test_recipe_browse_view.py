@@ -1,7 +1,11 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from recipes.models import User
 from django.urls import reverse
-from recipes.models.recipes import Recipe
+from recipes.models.recipes import Recipe, Tag
+from recipes.views.recipe_browse_view import BROWSE_PAGE_SIZE
 
 
 class RecipeBrowseTest(TestCase):
@@ -21,7 +25,7 @@ class RecipeBrowseTest(TestCase):
             title='Vanilla Cake',
             description='eggs, milk, flour, sugar, vanilla, icing',
             difficulty='Beginner',
-            visibility='Public',
+            visibility='public',
             user=self.user
         )
 
@@ -29,7 +33,7 @@ class RecipeBrowseTest(TestCase):
             title='Chocolate Cake',
             description='eggs, milk, flour, sugar, chocolate icing',
             difficulty='Intermediate',
-            visibility='Public',
+            visibility='public',
             user=self.user
         )
 
@@ -37,7 +41,7 @@ class RecipeBrowseTest(TestCase):
             title='Caramel Brownies',
             description='eggs, milk, flour, sugar, cocoa powder, caramel',
             difficulty='Advanced',
-            visibility='Public',
+            visibility='public',
             user=self.user
         )
 
@@ -79,3 +83,136 @@ class RecipeBrowseTest(TestCase):
         response = self.client.get(self.url, {'q': 'Cake'})
         recipes = list(response.context['recipes'])
         self.assertCountEqual(recipes, [self.second_recipe, self.first_recipe])
+
+    def test_search_matches_word_prefixes(self):
+        response = self.client.get(self.url, {'q': 'choc'})
+        recipes = list(response.context['recipes'])
+        self.assertEqual(recipes, [self.second_recipe])
+
+    def test_search_requires_every_word(self):
+        response = self.client.get(self.url, {'q': 'cake vanilla'})
+        recipes = list(response.context['recipes'])
+        self.assertEqual(recipes, [self.first_recipe])
+
+    def test_search_ranks_title_matches_first(self):
+        caramel_mention = Recipe.objects.create(
+            title='Apple Pie',
+            description='apples with a little caramel',
+            visibility='public',
+            user=self.user
+        )
+        response = self.client.get(self.url, {'q': 'caramel'})
+        recipes = list(response.context['recipes'])
+        self.assertEqual(recipes, [self.third_recipe, caramel_mention])
+
+    def test_search_index_follows_edits_and_deletes(self):
+        self.first_recipe.title = 'Lemon Cake'
+        self.first_recipe.save()
+        self.assertEqual(list(Recipe.objects.search('vanilla')), [self.first_recipe])
+        self.assertEqual(list(Recipe.objects.search('lemon')), [self.first_recipe])
+        self.first_recipe.delete()
+        self.assertEqual(list(Recipe.objects.search('lemon')), [])
+
+    def test_search_highlights_matches_in_snippet(self):
+        response = self.client.get(self.url, {'q': 'cocoa'})
+        self.assertContains(response, '<mark>cocoa</mark>')
+
+    def test_search_snippet_is_escaped(self):
+        Recipe.objects.create(
+            title='Fudge',
+            description='<script>alert(1)</script> fudge',
+            visibility='public',
+            user=self.user
+        )
+        response = self.client.get(self.url, {'q': 'fudge'})
+        self.assertNotContains(response, '<script>alert(1)</script>')
+        self.assertContains(response, '&lt;script&gt;')
+
+    def test_search_with_only_punctuation_returns_nothing(self):
+        response = self.client.get(self.url, {'q': '"*)'})
+        self.assertEqual(list(response.context['recipes']), [])
+
+    def test_user_filter_only_loads_the_selected_user(self):
+        response = self.client.get(self.url, {'user': self.user.pk})
+        self.assertNotIn('users', response.context)
+        self.assertEqual(response.context['selected_user'], self.user)
+        self.assertContains(response, 'value="@johndoe"')
+        self.assertContains(response, reverse('user_autocomplete'))
+
+    def test_results_are_paginated_by_cursor(self):
+        for i in range(BROWSE_PAGE_SIZE):
+            Recipe.objects.create(title=f'Cake {i}', description='sponge', user=self.user)
+        first_page = self.client.get(self.url, {'q': 'cake'}).context['recipes']
+        self.assertEqual(len(first_page), BROWSE_PAGE_SIZE)
+        response = self.client.get(self.url, {'q': 'cake', 'cursor': first_page.next_cursor})
+        second_page = list(response.context['recipes'])
+        self.assertEqual(len(second_page), 2)
+        self.assertFalse(set(second_page) & set(first_page))
+        self.assertContains(response, 'q=cake&amp;cursor=')
+
+    def test_search_results_keep_relevance_order_across_pages(self):
+        for i in range(BROWSE_PAGE_SIZE):
+            Recipe.objects.create(title='Pie', description=f'has cocoa {i}', user=self.user)
+        first_page = self.client.get(self.url, {'q': 'cocoa'}).context['recipes']
+        ranks = [recipe.search_rank for recipe in first_page]
+        second_page = self.client.get(
+            self.url, {'q': 'cocoa', 'cursor': first_page.next_cursor}
+        ).context['recipes']
+        ranks += [recipe.search_rank for recipe in second_page]
+        self.assertEqual(len(ranks), BROWSE_PAGE_SIZE + 1)
+        self.assertEqual(ranks, sorted(ranks))
+
+    def test_facet_counts(self):
+        vegan = Tag.objects.get(name='Vegan')
+        self.first_recipe.tags.add(vegan)
+        self.second_recipe.tags.add(vegan)
+        self.first_recipe.time_required = '30'
+        self.first_recipe.save()
+        response = self.client.get(self.url)
+        self.assertIn((vegan, 2), response.context['tags'])
+        self.assertEqual(
+            response.context['categories'],
+            [('Beginner', 1), ('Intermediate', 1), ('Advanced', 1)],
+        )
+        self.assertIn(('30', '30 minutes', 1), response.context['times'])
+        self.assertContains(response, 'Vegan (2)')
+
+    def test_facet_counts_ignore_their_own_selection(self):
+        vegan = Tag.objects.get(name='Vegan')
+        self.first_recipe.tags.add(vegan)
+        response = self.client.get(self.url, {'difficulty': 'Beginner', 'tag': 'Vegan'})
+        self.assertEqual(list(response.context['recipes']), [self.first_recipe])
+        self.assertEqual(
+            response.context['categories'],
+            [('Beginner', 1), ('Intermediate', 0), ('Advanced', 0)],
+        )
+        tags = dict(response.context['tags'])
+        self.assertEqual(tags[vegan], 1)
+        self.assertEqual(tags[Tag.objects.exclude(pk=vegan.pk).first()], 0)
+
+    def test_facet_counts_follow_search(self):
+        response = self.client.get(self.url, {'q': 'cake'})
+        self.assertEqual(
+            response.context['categories'],
+            [('Beginner', 1), ('Intermediate', 1), ('Advanced', 0)],
+        )
+
+    def test_facet_counts_are_one_cached_query(self):
+        tag_count = Tag.objects.count()
+        self.client.get(self.url, {'q': 'cake'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'q': ' CAKE '})
+        self.assertFalse(any('COUNT(DISTINCT' in query['sql'] for query in queries))
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'q': 'cake'})
+        counting = [query for query in queries if 'COUNT(DISTINCT' in query['sql']]
+        self.assertEqual(len(counting), 1)
+        self.assertEqual(counting[0]['sql'].count('COUNT(DISTINCT'), tag_count + 3 + 8)
+
+    def test_malformed_filters_are_ignored(self):
+        response = self.client.get(
+            self.url, {'user': 'abc', 'date': '2024-13-45', 'difficulty': 'Impossible'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['recipes']), 3)
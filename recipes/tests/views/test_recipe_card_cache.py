@@ -0,0 +1,77 @@
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe, Favourite, Tag
+from recipes.tests.helpers import ShippedCacheMixin
+
+
+class RecipeCardCacheTest(TestCase):
+    """Tests of the fragment cache of recipe cards."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            title='Lentil soup', description='Warming', user=self.second_user
+        )
+        self.url = reverse('feed')
+        self.client.login(username='@johndoe', password='Password123')
+
+    def test_cards_are_rendered_once(self):
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'recipes/recipe_card_body.html')
+        response = self.client.get(self.url)
+        self.assertTemplateNotUsed(response, 'recipes/recipe_card_body.html')
+        self.assertContains(response, 'Lentil soup')
+
+    def test_edited_recipe_is_rendered_again(self):
+        self.client.get(self.url)
+        self.recipe.title = 'Red lentil soup'
+        self.recipe.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Red lentil soup')
+
+    def test_tag_changes_render_card_again(self):
+        self.client.get(self.url)
+        tag = Tag.objects.get(name='Vegan')
+        self.recipe.tags.add(tag)
+        self.assertContains(self.client.get(self.url), 'tag-vegan')
+        tag.name = 'Plant-Based'
+        tag.save()
+        self.assertContains(self.client.get(self.url), 'tag-plant-based')
+        tag.recipe_set.clear()
+        self.assertNotContains(self.client.get(self.url), 'tag-plant-based')
+
+    def test_favourite_state_is_per_viewer(self):
+        Favourite.objects.create(user=self.user, recipe=self.recipe)
+        self.assertContains(self.client.get(self.url), 'class="bi bi-heart-fill')
+        self.client.login(username='@janedoe', password='Password123')
+        self.assertNotContains(self.client.get(self.url), 'class="bi bi-heart-fill')
+
+
+class RecipeCardCacheQueryTest(ShippedCacheMixin, TestCase):
+    """Tests of the cache reads of recipe cards with the shipped cache backend."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.login(username='@johndoe', password='Password123')
+
+    def test_cards_of_a_page_are_read_together(self):
+        for count in [1, 9]:
+            Recipe.objects.all().delete()
+            for i in range(count):
+                Recipe.objects.create(title=f'Soup {i}', description='Warming', user=self.user)
+            self.client.get(reverse('feed'))
+            # Session, user, viewer's cache entries, recipes, tags, cards, notifications.
+            with self.assertNumQueries(7):
+                response = self.client.get(reverse('feed'))
+            self.assertContains(response, f'Soup {count - 1}')
@@ -41,6 +41,17 @@ class RecipeCommentViewTestCase(TestCase):
         self.assertEqual(notification.text, expected_text)
         self.assertEqual(notification.link, f"/recipe/{self.recipe.id}/")
 
+    def test_repeated_comments_by_one_user_count_once(self):
+        self.client.force_login(self.user)
+        self.client.post(self.comment_url, {'text': 'Great!'})
+        self.client.post(self.comment_url, {'text': 'Still great!'})
+        notification = Notification.objects.get(user=self.other_user)
+        self.assertEqual(notification.actor_count, 1)
+        self.assertEqual(
+            notification.text,
+            f"{self.user.username} commented on your recipe '{self.recipe.title}'"
+        )
+
     def test_no_notification_when_commenting_on_own_recipe(self):
         self.client.force_login(self.user)
         own_recipe = Recipe.objects.create(title='My Recipe', description='Test', user=self.user)
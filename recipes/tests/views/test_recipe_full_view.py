@@ -0,0 +1,242 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from recipes.models import User, Recipe, Favourite
+from recipes.models.comment import Comment, Notification
+from recipes.notifications import notify
+from recipes.tests.helpers import crafted_cursor
+from recipes.views.recipe_full_view import COMMENTS_PAGE_SIZE, RecipeFullView
+
+
+class RecipeFullViewTest(TestCase):
+    """Tests of conditional GETs and the page cache of the recipe page."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            title='Lentil soup', description='Warming', user=self.second_user
+        )
+        self.url = reverse('view_recipe', args=[self.recipe.id])
+
+    def _revalidate(self, response):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+
+    def test_unchanged_page_is_not_modified(self):
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response.headers['Cache-Control'])
+        response = self._revalidate(response)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_not_modified_skips_rendering(self):
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        # Session, user and recipe; no comments, tags or notifications.
+        with self.assertNumQueries(3):
+            response = self._revalidate(response)
+        self.assertTemplateNotUsed(response, 'recipes/recipe_full.html')
+
+    def test_new_comment_changes_the_page(self):
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        Comment.objects.create(recipe=self.recipe, user=self.second_user, text='Enjoy')
+        response = self._revalidate(response)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Enjoy')
+
+    def test_favourite_changes_the_page(self):
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        favourite = Favourite.objects.create(user=self.user, recipe=self.recipe)
+        response = self._revalidate(response)
+        self.assertEqual(response.status_code, 200)
+        favourite.delete()
+        self.assertEqual(self._revalidate(response).status_code, 200)
+
+    def test_edit_changes_the_page(self):
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        self.recipe.title = 'Red lentil soup'
+        self.recipe.save()
+        self.assertContains(self._revalidate(response), 'Red lentil soup')
+
+    def test_new_notification_changes_the_page(self):
+        self.client.login(username='@janedoe', password='Password123')
+        response = self.client.get(self.url)
+        other_recipe = Recipe.objects.create(title='Stew', description='Hearty', user=self.second_user)
+        notify(Notification.COMMENT, other_recipe, self.user)
+        self.assertEqual(self._revalidate(response).status_code, 200)
+
+    def test_etag_is_per_session(self):
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        self.client.logout()
+        self.client.login(username='@johndoe', password='Password123')
+        self.assertEqual(self._revalidate(response).status_code, 200)
+
+    def test_hidden_recipe_is_not_found_even_with_an_etag(self):
+        self.recipe.visibility = 'me'
+        self.recipe.save()
+        self.client.login(username='@janedoe', password='Password123')
+        response = self.client.get(self.url)
+        self.client.logout()
+        self.client.login(username='@johndoe', password='Password123')
+        response = self._revalidate(response)
+        self.assertEqual(response.status_code, 404)
+
+    def test_anonymous_page_is_shared_and_cached(self):
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'recipes/recipe_full.html')
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        self.assertContains(response, 'to comment.')
+        self.assertIn('Last-Modified', response.headers)
+        self.assertNotIn('private', response.headers['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertTemplateNotUsed(response, 'recipes/recipe_full.html')
+        self.assertContains(response, 'Lentil soup')
+
+    def test_anonymous_if_modified_since(self):
+        response = self.client.get(self.url)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_anonymous_page_is_rendered_again_after_a_comment(self):
+        self.client.get(self.url)
+        Comment.objects.create(recipe=self.recipe, user=self.user, text='Delicious')
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'recipes/recipe_full.html')
+        self.assertContains(response, 'Delicious')
+
+    def test_anonymous_page_is_rendered_again_after_a_rename(self):
+        Comment.objects.create(recipe=self.recipe, user=self.user, text='Delicious')
+        self.client.get(self.url)
+        for user, username in [(self.second_user, '@janeroe'), (self.user, '@johnroe')]:
+            user = User.objects.get(pk=user.pk)
+            user.username = username
+            user.save()
+            response = self.client.get(self.url)
+            self.assertTemplateUsed(response, 'recipes/recipe_full.html')
+            self.assertContains(response, username)
+
+    def test_other_user_changes_keep_the_cached_page(self):
+        self.client.get(self.url)
+        self.second_user.first_name = 'Janet'
+        self.second_user.save()
+        response = self.client.get(self.url)
+        self.assertTemplateNotUsed(response, 'recipes/recipe_full.html')
+
+    def test_signed_in_page_is_not_served_from_the_shared_cache(self):
+        self.client.get(self.url)
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'recipes/recipe_full.html')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+
+class RecipeCommentsTest(TestCase):
+    """Tests of the paginated comments of the recipe page."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.second_user = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            title='Lentil soup', description='Warming', user=self.second_user
+        )
+        Comment.objects.bulk_create(
+            Comment(recipe=self.recipe, user=self.second_user, text=f'Comment {i}')
+            for i in range(COMMENTS_PAGE_SIZE + 5)
+        )
+        self.url = reverse('view_recipe', args=[self.recipe.id])
+        self.client.login(username='@johndoe', password='Password123')
+
+    def test_recipe_comments_url(self):
+        self.assertEqual(
+            reverse('recipe_comments', args=[self.recipe.id]),
+            f'/recipe/{self.recipe.id}/comments/',
+        )
+
+    def test_page_shows_first_page_of_comments(self):
+        response = self.client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PAGE_SIZE)
+        self.assertEqual(comments[0].text, f'Comment {COMMENTS_PAGE_SIZE + 4}')
+        self.assertContains(response, 'Load more comments')
+
+    def test_next_page_is_loaded_from_the_endpoint(self):
+        cursor = self.client.get(self.url).context['comments'].next_cursor
+        response = self.client.get(
+            reverse('recipe_comments', args=[self.recipe.id]), {'cursor': cursor}
+        )
+        self.assertTemplateUsed(response, 'recipes/comments_page.html')
+        self.assertTemplateNotUsed(response, 'base_content.html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'Comment {i}' for i in reversed(range(5))],
+        )
+        self.assertNotContains(response, 'Load more comments')
+
+    def test_page_loads_the_recipe_once(self):
+        with patch.object(RecipeFullView, 'get_object', autospec=True,
+                          side_effect=RecipeFullView.get_object) as get_object:
+            self.client.get(self.url)
+        get_object.assert_called_once()
+
+    def test_page_joins_the_comment_authors(self):
+        recipe = Recipe.objects.create(title='Stew', description='Hearty', user=self.second_user)
+        Comment.objects.create(recipe=recipe, user=self.user, text='Lovely')
+        url = reverse('view_recipe', args=[recipe.id])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as one_comment:
+            self.client.get(url)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as full_page:
+            self.client.get(self.url)
+        self.assertEqual(len(full_page), len(one_comment))
+
+    def test_comment_pages_cost_the_same_however_many_comments(self):
+        url = reverse('recipe_comments', args=[self.recipe.id])
+        self.client.get(url)
+        # Session, user, recipe and one page of comments with their authors.
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(
+            reverse('recipe_comments', args=[self.recipe.id]), {'cursor': 'garbage'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_crafted_cursor_is_rejected(self):
+        for values in [[None, None], [{}, 1], [[1], 1], [1, 2, 3], ['x', 1], [1]]:
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse('recipe_comments', args=[self.recipe.id]),
+                    {'cursor': crafted_cursor(values)},
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_comments_of_hidden_recipe_are_not_found(self):
+        self.recipe.visibility = 'me'
+        self.recipe.save()
+        response = self.client.get(reverse('recipe_comments', args=[self.recipe.id]))
+        self.assertEqual(response.status_code, 404)
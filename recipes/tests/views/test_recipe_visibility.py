@@ -0,0 +1,94 @@
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe, Follow, Favourite, Comment
+
+
+class RecipeVisibilityTest(TestCase):
+    """Tests that every recipe listing and detail page applies the same visibility rules."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.owner = User.objects.get(username='@janedoe')
+        self.public_recipe = Recipe.objects.create(
+            title='Public', description='test', user=self.owner, visibility='public'
+        )
+        self.friends_recipe = Recipe.objects.create(
+            title='Friends', description='test', user=self.owner, visibility='friends'
+        )
+        self.private_recipe = Recipe.objects.create(
+            title='Private', description='test', user=self.owner, visibility='me'
+        )
+        self.client.login(username='@johndoe', password='Password123')
+
+    def _make_friends(self):
+        Follow.objects.create(follower=self.user, followee=self.owner)
+        Follow.objects.create(follower=self.owner, followee=self.user)
+
+    def _feed_recipes(self):
+        return list(self.client.get(reverse('feed')).context['recipes'])
+
+    def _profile_recipes(self):
+        url = reverse('user_profile', kwargs={'username': self.owner.username})
+        return list(self.client.get(url).context['recipes'])
+
+    def test_feed_shows_friends_recipes_to_mutual_followers_only(self):
+        Follow.objects.create(follower=self.user, followee=self.owner)
+        self.assertEqual(self._feed_recipes(), [self.public_recipe])
+        Follow.objects.create(follower=self.owner, followee=self.user)
+        self.assertEqual(self._feed_recipes(), [self.friends_recipe, self.public_recipe])
+
+    def test_feed_shows_owner_all_of_their_recipes(self):
+        self.client.login(username='@janedoe', password='Password123')
+        self.assertEqual(
+            self._feed_recipes(),
+            [self.private_recipe, self.friends_recipe, self.public_recipe]
+        )
+
+    def test_profile_hides_friends_recipes_from_one_way_followers(self):
+        Follow.objects.create(follower=self.user, followee=self.owner)
+        self.assertEqual(self._profile_recipes(), [self.public_recipe])
+
+    def test_profile_never_shows_private_recipes_to_friends(self):
+        self._make_friends()
+        self.assertEqual(self._profile_recipes(), [self.friends_recipe, self.public_recipe])
+
+    def test_profile_shows_only_public_recipes_to_anonymous_users(self):
+        self.client.logout()
+        self.assertEqual(self._profile_recipes(), [self.public_recipe])
+
+    def test_browse_applies_visibility(self):
+        response = self.client.get(reverse('recipe_browse'))
+        self.assertEqual(list(response.context['recipes']), [self.public_recipe])
+
+    def test_recipe_detail_is_not_found_for_hidden_recipes(self):
+        response = self.client.get(reverse('view_recipe', kwargs={'pk': self.private_recipe.id}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('view_recipe', kwargs={'pk': self.friends_recipe.id}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_recipe_detail_is_shown_to_friends(self):
+        self._make_friends()
+        response = self.client.get(reverse('view_recipe', kwargs={'pk': self.friends_recipe.id}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_cannot_comment_on_hidden_recipe(self):
+        url = reverse('recipe_comment', kwargs={'recipe_id': self.private_recipe.id})
+        response = self.client.post(url, {'text': 'Sneaky'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.filter(recipe=self.private_recipe).exists())
+
+    def test_cannot_favourite_hidden_recipe(self):
+        response = self.client.post(reverse('toggle_favourite'), {'recipe_id': self.private_recipe.id})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Favourite.objects.filter(recipe=self.private_recipe).exists())
+
+    def test_unfollowing_hides_friends_recipes_again(self):
+        self._make_friends()
+        self.assertIn(self.friends_recipe, self._feed_recipes())
+        self.client.post(reverse('unfollow_user', args=[self.owner.username]))
+        self.assertNotIn(self.friends_recipe, self._feed_recipes())
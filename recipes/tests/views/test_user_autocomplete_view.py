@@ -0,0 +1,65 @@
+"""Tests of the user autocomplete view."""
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User
+from recipes.user_search import AUTOCOMPLETE_LIMIT
+
+
+class UserAutocompleteViewTestCase(TestCase):
+    """Tests of the user autocomplete view."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.url = reverse('user_autocomplete')
+        self.user = User.objects.get(username='@johndoe')
+
+    def _usernames(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [result['username'] for result in response.json()['results']]
+
+    def test_user_autocomplete_url(self):
+        self.assertEqual(self.url, '/users/autocomplete/')
+
+    def test_results_describe_users(self):
+        response = self.client.get(self.url, {'q': 'johnd'})
+        self.assertEqual(response.json(), {'results': [
+            {'id': self.user.pk, 'username': '@johndoe', 'full_name': 'John Doe'},
+        ]})
+
+    def test_matches_username_prefix_ignoring_case(self):
+        self.assertEqual(self._usernames('@PET'), ['@peterpickles', '@petrapickles'])
+
+    def test_matches_full_name_prefix(self):
+        self.assertEqual(self._usernames('jane d'), ['@janedoe'])
+
+    def test_username_matches_come_before_name_matches(self):
+        User.objects.create_user(
+            username='@cook', email='cook@example.org', password='Password123',
+            first_name='Jo', last_name='Cook',
+        )
+        self.assertEqual(self._usernames('jo'), ['@johndoe', '@cook'])
+
+    def test_at_sign_only_matches_usernames(self):
+        self.assertEqual(self._usernames('@john doe'), [])
+
+    def test_does_not_match_inside_names(self):
+        self.assertEqual(self._usernames('doe'), [])
+
+    def test_empty_query_matches_nothing(self):
+        self.assertEqual(self._usernames(' '), [])
+        self.assertEqual(self._usernames('@'), [])
+
+    def test_results_are_limited(self):
+        User.objects.bulk_create([
+            User(username=f'@cook{i:02}', email=f'cook{i}@example.org', first_name='Cook',
+                 last_name=str(i), username_key=f'cook{i:02}', name_key=f'cook {i}')
+            for i in range(AUTOCOMPLETE_LIMIT + 5)
+        ])
+        with self.assertNumQueries(1):
+            usernames = self._usernames('cook')
+        self.assertEqual(usernames, [f'@cook{i:02}' for i in range(AUTOCOMPLETE_LIMIT)])
@@ -1,7 +1,10 @@
 """Tests of the follow view."""
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from recipes.models import User, Follow
 from django.urls import reverse
+from recipes.views.user_browse_view import USER_BROWSE_PAGE_SIZE
 
 class UserBrowseView(TestCase):
     """Tests of the user browse view"""
@@ -59,6 +62,50 @@ class UserBrowseView(TestCase):
     def test_search_multiple_users(self):
         self.assertEqual(self._search_and_get_results('doe'),[self.second_user, self.user])
 
+    def test_search_matches_inside_names(self):
+        peter = User.objects.get(username='@peterpickles')
+        self.assertEqual(self._search_and_get_results('ICKLE'), [peter, self.third_user])
+
+    def test_search_matches_every_word(self):
+        self.assertEqual(self._search_and_get_results('jane doe'), [self.second_user])
+        self.assertEqual(self._search_and_get_results('sophie doe'), [])
+
+    def test_short_words_match_the_start_of_names(self):
+        self.assertEqual(self._search_and_get_results('fr'), [self.fifth_user])
+        self.assertEqual(self._search_and_get_results('ra'), [])
+
+    def test_username_matches_rank_first(self):
+        User.objects.create_user(
+            username='@cook', email='cook@email.org', password='Password123',
+            first_name='Harrison', last_name='Smith',
+        )
+        results = self._search_and_get_results('harris')
+        self.assertEqual(results[0], self.fourth_user)
+
+    def test_search_is_paged_without_counting(self):
+        User.objects.bulk_create([
+            User(username=f'@baker{i}', email=f'baker{i}@email.org',
+                 first_name='Baker', last_name=str(i))
+            for i in range(USER_BROWSE_PAGE_SIZE + 1)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'q': 'baker'})
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+        page = response.context['users']
+        self.assertEqual(len(page), USER_BROWSE_PAGE_SIZE)
+        self.assertTrue(page.has_next())
+        self.assertContains(response, 'page=2')
+
+        response = self.client.get(self.url, {'q': 'baker', 'page': 2})
+        page = response.context['users']
+        self.assertEqual(len(page), 1)
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_page_out_of_range_shows_first_page(self):
+        response = self.client.get(self.url, {'q': 'doe', 'page': 5})
+        self.assertEqual(response.context['users'].number, 1)
+
     def test_get_top_five_most_followed_users(self):
         Follow.objects.create(follower=self.second_user, followee=self.user)
         Follow.objects.create(follower=self.third_user, followee=self.user)
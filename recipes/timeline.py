@@ -0,0 +1,322 @@
+"""
+Materialized following timelines.
+
+The following feed shows recipes from the users someone follows. Rather than
+finding them among all recipes on every visit, each new recipe is written
+once into the `TimelineEntry` rows of its author's followers ("fan-out on
+write"), and the feed reads the viewer's own entries back in index order
+(see `TimelinePaginator`).
+
+Authors with more than `TIMELINE_FANOUT_LIMIT` followers are not fanned out,
+since one recipe would mean a huge write. Their recipes are merged into
+their followers' timelines when the feed is read instead, as a second range
+read in the same order. When such an author drops back to the limit, their
+latest recipes are backfilled into every follower's timeline (see
+`resume_fan_out()`).
+
+Each timeline keeps its latest `TIMELINE_SIZE` entries. `User.timeline_size`
+counts a user's entries; once a delivery takes it past the size by
+`TIMELINE_TRIM_SLACK`, the oldest entries are deleted, so trimming costs one
+index walk every `TIMELINE_TRIM_SLACK` deliveries rather than one each.
+
+Following someone backfills their latest recipes into the follower's
+timeline; unfollowing removes them again.
+"""
+import heapq
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from recipes.models.counters import adjust_counter
+from recipes.models.follow import Follow
+from recipes.models.recipes import Recipe
+from recipes.models.timeline import TimelineEntry
+from recipes.models.user import User
+from recipes.pagination import CursorPage, CursorPaginator
+
+TIMELINE_FANOUT_LIMIT = 5000
+TIMELINE_BACKFILL_SIZE = 100
+TIMELINE_BATCH_SIZE = 1000
+TIMELINE_SIZE = 500
+TIMELINE_TRIM_SLACK = 50
+
+# Order of a timeline, over recipes and over the entries copied from them.
+TIMELINE_ORDERING = ('-publication_date', '-id')
+TIMELINE_ENTRY_ORDERING = ('-published_at', '-recipe_id')
+
+
+def is_fanned_out(author):
+    """Return whether new recipes of `author` are written to timelines."""
+    return author.follower_count <= TIMELINE_FANOUT_LIMIT
+
+
+def timeline_recipient_ids(recipe):
+    """Return the ids of the followers allowed to see `recipe` in their timeline."""
+    if recipe.visibility == 'me':
+        return []
+    follower_ids = Follow.objects.filter(followee_id=recipe.user_id).values_list(
+        'follower_id', flat=True
+    )
+    if recipe.visibility == 'friends':
+        friend_ids = recipe.user.get_friend_ids()
+        return [follower_id for follower_id in follower_ids if follower_id in friend_ids]
+    return list(follower_ids)
+
+
+def remove_from_timelines(recipe):
+    """Delete the timeline entries of `recipe`, keeping timeline sizes in step."""
+    entries = TimelineEntry.objects.filter(recipe=recipe)
+    User.objects.filter(pk__in=Subquery(entries.values('user_id'))).update(
+        timeline_size=Greatest(F('timeline_size') - 1, 0)
+    )
+    entries.delete()
+
+
+def fan_out_recipe(recipe, replace=False):
+    """
+    Write `recipe` into the timelines of its author's followers.
+
+    Args:
+        recipe (Recipe): The published or edited recipe.
+        replace (bool): Remove the recipe's existing entries first, for
+            when its author or visibility changed.
+    """
+    if replace:
+        remove_from_timelines(recipe)
+    if not is_fanned_out(recipe.user):
+        return
+    recipient_ids = timeline_recipient_ids(recipe)
+    for start in range(0, len(recipient_ids), TIMELINE_BATCH_SIZE):
+        user_ids = recipient_ids[start:start + TIMELINE_BATCH_SIZE]
+        # Only timelines gaining an entry grow; a backfill may have added it already.
+        has_entry = set(
+            TimelineEntry.objects.filter(recipe=recipe, user_id__in=user_ids)
+            .values_list('user_id', flat=True)
+        )
+        user_ids = [user_id for user_id in user_ids if user_id not in has_entry]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, recipe=recipe, published_at=recipe.publication_date)
+                for user_id in user_ids
+            ],
+            ignore_conflicts=True,
+        )
+        User.objects.filter(pk__in=user_ids).update(timeline_size=F('timeline_size') + 1)
+        for user_id in User.objects.filter(
+            pk__in=user_ids, timeline_size__gt=TIMELINE_SIZE + TIMELINE_TRIM_SLACK
+        ).values_list('id', flat=True):
+            cap_timeline(user_id)
+
+
+def resume_fan_out(author_id):
+    """
+    Backfill the timelines of an author's followers once they are fanned out again.
+
+    Called after an unfollow; only acts when the author has just dropped
+    back to `TIMELINE_FANOUT_LIMIT` followers. Their recipes published while
+    they had more are in no timeline, so their latest
+    `TIMELINE_BACKFILL_SIZE` recipes are copied into every follower's
+    timeline, and those timelines recounted.
+    """
+    author = User.objects.filter(pk=author_id, follower_count=TIMELINE_FANOUT_LIMIT).first()
+    if author is None:
+        return
+    recipes = list(
+        Recipe.objects.filter(user=author).exclude(visibility='me')
+        .order_by(*TIMELINE_ORDERING)
+        .values_list('id', 'publication_date', 'visibility')[:TIMELINE_BACKFILL_SIZE]
+    )
+    if not recipes:
+        return
+    friend_ids = author.get_friend_ids()
+    follower_ids = list(Follow.objects.filter(followee=author).values_list('follower_id', flat=True))
+    for start in range(0, len(follower_ids), TIMELINE_BATCH_SIZE):
+        user_ids = follower_ids[start:start + TIMELINE_BATCH_SIZE]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, recipe_id=recipe_id, published_at=published_at)
+                for user_id in user_ids
+                for recipe_id, published_at, visibility in recipes
+                if visibility == 'public' or user_id in friend_ids
+            ],
+            ignore_conflicts=True,
+            batch_size=TIMELINE_BATCH_SIZE,
+        )
+        recount_timelines(user_ids)
+
+
+def recount_timelines(user_ids):
+    """Set the timeline sizes of the given users from their entries, capping those past the limit."""
+    sizes = (
+        TimelineEntry.objects.filter(user=OuterRef('pk')).order_by()
+        .values('user').annotate(size=Count('pk')).values('size')
+    )
+    User.objects.filter(pk__in=user_ids).update(timeline_size=Coalesce(Subquery(sizes), 0))
+    for user_id in User.objects.filter(
+        pk__in=user_ids, timeline_size__gt=TIMELINE_SIZE + TIMELINE_TRIM_SLACK
+    ).values_list('id', flat=True):
+        cap_timeline(user_id)
+
+
+def move_in_timelines(recipe):
+    """Update the entries of `recipe` after its publication date changed."""
+    TimelineEntry.objects.filter(recipe=recipe).update(published_at=recipe.publication_date)
+
+
+def cap_timeline(user):
+    """
+    Delete the entries of a timeline past its latest `TIMELINE_SIZE` and recount it.
+
+    Args:
+        user (User): The timeline's owner, or their id.
+    """
+    entries = TimelineEntry.objects.filter(user=user)
+    last_kept = list(
+        entries.order_by(*TIMELINE_ENTRY_ORDERING)
+        .values_list('published_at', 'recipe_id')[TIMELINE_SIZE - 1:TIMELINE_SIZE]
+    )
+    if not last_kept:
+        size = entries.count()
+    else:
+        [(published_at, recipe_id)] = last_kept
+        entries.filter(
+            Q(published_at__lt=published_at) | Q(published_at=published_at, recipe_id__lt=recipe_id)
+        ).delete()
+        size = TIMELINE_SIZE
+    User.objects.filter(pk=getattr(user, 'pk', user)).update(timeline_size=size)
+
+
+def backfill_timeline(user, author):
+    """Copy the latest recipes of `author` that `user` may see into their timeline."""
+
+    if not is_fanned_out(author):
+        return
+    recipes = (
+        Recipe.objects.filter(user=author).visible_to(user)
+        .order_by(*TIMELINE_ORDERING)
+        .values_list('id', 'publication_date')[:TIMELINE_BACKFILL_SIZE]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user=user, recipe_id=recipe_id, published_at=published_at)
+            for recipe_id, published_at in recipes
+        ],
+        ignore_conflicts=True,
+    )
+    cap_timeline(user)
+
+
+def trim_timeline(user, author, friends_only=False):
+    """
+    Remove recipes of `author` from the timeline of `user`.
+
+    Args:
+        user (User): The timeline's owner, or their id.
+        author (User): The author whose recipes to remove, or their id.
+        friends_only (bool): Only remove friends-only recipes, for when
+            `user` still follows `author` but they are no longer friends.
+    """
+    entries = TimelineEntry.objects.filter(user=user, recipe__user=author)
+    if friends_only:
+        entries = entries.filter(recipe__visibility='friends')
+    deleted, _ = entries.delete()
+    if deleted:
+        adjust_counter(User, getattr(user, 'pk', user), 'timeline_size', -deleted)
+
+
+def unfanned_author_ids(viewer):
+    """Return the ids of the users `viewer` follows whose recipes are not fanned out."""
+    return list(
+        Follow.objects.filter(
+            follower=viewer, followee__follower_count__gt=TIMELINE_FANOUT_LIMIT
+        ).values_list('followee_id', flat=True)
+    )
+
+
+def following_timeline(viewer):
+    """
+    Return the recipes in the following timeline of `viewer`, in no order.
+
+    Combines the viewer's materialized entries with the recipes of followed
+    authors who are too popular to fan out. Apply
+    `RecipeQuerySet.visible_to()` on top, since visibility can change after
+    an entry is written. Listing the timeline newest first is cheaper with
+    `TimelinePaginator`, which reads both parts in index order.
+    """
+    entries = TimelineEntry.objects.filter(user=viewer).values('recipe_id')
+    return Recipe.objects.filter(
+        Q(id__in=Subquery(entries)) | Q(user_id__in=unfanned_author_ids(viewer))
+    )
+
+
+class TimelinePaginator(CursorPaginator):
+    """
+    Page the following timeline of `viewer`, newest first, by cursor.
+
+    A page is merged from ranges read in the same order: the viewer's
+    entries, along the (user, -published_at, -recipe) index, and the
+    recipes of each followed author too popular to fan out, along
+    (user, -publication_date, -id). Each range reads at most one row more
+    than a page. The page's recipes are then loaded from `queryset` by id,
+    so it may add annotations, prefetches and a visibility check.
+
+    Attributes:
+        viewer (User): The owner of the timeline.
+        recipe_filters (dict): Lookups on recipe columns, applied to both
+            ranges so that pages are cut after filtering.
+    """
+
+    def __init__(self, queryset, per_page, viewer, **recipe_filters):
+        super().__init__(queryset, TIMELINE_ORDERING, per_page)
+        self.viewer = viewer
+        self.recipe_filters = recipe_filters
+
+    def page(self, cursor=None):
+        """
+        Return the page for `cursor`.
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded.
+        """
+        values, reverse = None, False
+        if cursor:
+            values, reverse = self.decode_cursor(cursor)
+
+        ranges = [list(self.entry_keys_queryset(values, reverse))] + [
+            list(self.author_keys_queryset(author_id, values, reverse))
+            for author_id in unfanned_author_ids(self.viewer)
+        ]
+        recipe_ids = []
+        for _, recipe_id in heapq.merge(*ranges, reverse=not reverse):
+            if recipe_id not in recipe_ids:
+                recipe_ids.append(recipe_id)
+            if len(recipe_ids) > self.per_page:
+                break
+        has_more = len(recipe_ids) > self.per_page
+        recipe_ids = recipe_ids[:self.per_page]
+        if reverse:
+            recipe_ids.reverse()
+
+        recipes = self.queryset.filter(id__in=recipe_ids).order_by().in_bulk()
+        rows = [recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes]
+        if reverse:
+            return CursorPage(rows, self, has_next=True, has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more, has_previous=values is not None)
+
+    def entry_keys_queryset(self, values=None, reverse=False):
+        """Return the query of the viewer's entry keys (published_at, recipe id) after `values`."""
+        entries = TimelineEntry.objects.filter(
+            user=self.viewer,
+            **{f'recipe__{lookup}': value for lookup, value in self.recipe_filters.items()},
+        )
+        if values is not None:
+            entries = entries.filter(self.keyset_filter(values, reverse, TIMELINE_ENTRY_ORDERING))
+        ordering = self._reversed_ordering(TIMELINE_ENTRY_ORDERING) if reverse else TIMELINE_ENTRY_ORDERING
+        return entries.order_by(*ordering).values_list('published_at', 'recipe_id')[:self.per_page + 1]
+
+    def author_keys_queryset(self, author_id, values=None, reverse=False):
+        """Return the query of an unfanned author's recipe keys (publication date, id) after `values`."""
+        recipes = Recipe.objects.filter(user_id=author_id, **self.recipe_filters).visible_to(self.viewer)
+        if values is not None:
+            recipes = recipes.filter(self.keyset_filter(values, reverse))
+        ordering = self._reversed_ordering() if reverse else self.ordering
+        return recipes.order_by(*ordering).values_list('publication_date', 'id')[:self.per_page + 1]
@@ -0,0 +1,160 @@
+"""
+Trending recipes: time-decayed activity scores, read as a top-K index scan.
+
+Every favourite, comment and view adds a weight to its recipe that halves
+every `TRENDING_HALF_LIFE`. Decaying every score as time passes would mean
+rewriting every row; instead, an event's weight is scaled *up* by how long
+after `TRENDING_EPOCH` it happened:
+
+    score = log2(sum of weight * 2 ** ((event time - epoch) / half life))
+
+Ranking by that sum ranks by decayed activity as of any moment, as scaling
+every recipe by the same factor keeps their order. Scores never need
+updating just because time passed, an event is one atomic `UPDATE`, and
+trending is `ORDER BY trending_score DESC` over `recipe_trending_idx`.
+The sum is kept as its base-2 logarithm, which grows by one per half-life
+instead of doubling, so it never overflows a float.
+
+Views are counted in the cache and written every `TRENDING_VIEW_BATCH`
+views of a recipe, so the recipe page does not write on every hit. Their
+part of the score is also kept in `view_score`, because views leave no rows
+behind to count again.
+
+Unfavourites and deleted comments are not subtracted as they happen;
+`rebuild_trending_scores()` (the `update_trending` command) recomputes the
+scores from the favourites and comments that remain, and should be run
+periodically.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest, Least, Log, Power
+from django.utils import timezone
+from recipes.models.comment import Comment
+from recipes.models.favourite import Favourite
+from recipes.models.recipes import Recipe
+
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_HALF_LIFE = timedelta(days=2)
+TRENDING_WEIGHTS = {
+    'favourite': 3.0,
+    'comment': 2.0,
+    'view': 0.25,
+}
+TRENDING_VIEW_BATCH = 10
+TRENDING_VIEW_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Events older than this add less than 2 ** -15 of a fresh one.
+TRENDING_REBUILD_WINDOW = TRENDING_HALF_LIFE * 15
+TRENDING_REBUILD_BATCH_SIZE = 500
+
+
+def event_score(kind, at, count=1):
+    """
+    Return the log2 score of `count` events of `kind` at time `at`.
+
+    Args:
+        kind (str): A key of `TRENDING_WEIGHTS`.
+        at (datetime): When the events happened.
+        count (int): Number of events.
+    """
+    return math.log2(TRENDING_WEIGHTS[kind] * count) + (at - TRENDING_EPOCH) / TRENDING_HALF_LIFE
+
+
+def log_add(a, b):
+    """Return log2(2 ** a + 2 ** b) without leaving log space."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def log_add_expression(field_name, score):
+    """Return the database expression for `log_add(<field_name>, score)`."""
+    score = Value(score, output_field=FloatField())
+    high = Greatest(F(field_name), score)
+    low = Least(F(field_name), score)
+    return high + Log(2, 1 + Power(2, low - high))
+
+
+def trending_increment(kind, at=None, count=1):
+    """
+    Return the `UPDATE` value adding events to `Recipe.trending_score`.
+
+    For use with other changes to the same rows, such as counters.
+    """
+    return log_add_expression('trending_score', event_score(kind, at or timezone.now(), count))
+
+
+def trending_view_cache_key(recipe_id):
+    return f'trending_views:{recipe_id}'
+
+
+def record_view(recipe_id):
+    """
+    Count a view of a recipe's page.
+
+    Views are counted in the cache; every `TRENDING_VIEW_BATCH`th view of
+    a recipe writes the whole batch to its score. Views in a batch that is
+    evicted before it fills up are lost, which only makes trending slightly
+    less sensitive to views.
+    """
+    key = trending_view_cache_key(recipe_id)
+    try:
+        views = cache.incr(key)
+    except ValueError:
+        # First view of a batch; adding only then saves a round trip per view.
+        cache.add(key, 1, TRENDING_VIEW_CACHE_TIMEOUT)
+        return
+    if views % TRENDING_VIEW_BATCH:
+        return
+    score = event_score('view', timezone.now(), TRENDING_VIEW_BATCH)
+    Recipe.objects.filter(pk=recipe_id).update(
+        trending_score=log_add_expression('trending_score', score),
+        view_score=log_add_expression('view_score', score),
+    )
+
+
+def rebuild_trending_scores(now=None, batch_size=TRENDING_REBUILD_BATCH_SIZE):
+    """
+    Recompute every trending score from the favourites and comments that remain.
+
+    Activity older than `TRENDING_REBUILD_WINDOW` is left out, as it no
+    longer affects the ranking. Events recorded while the rebuild runs may
+    be overwritten; they are counted again by the next rebuild.
+
+    Args:
+        now (datetime, optional): The time to rebuild as of.
+        batch_size (int): Number of recipes updated per query.
+
+    Returns:
+        int: Number of recipes with recent favourites or comments.
+    """
+    since = (now or timezone.now()) - TRENDING_REBUILD_WINDOW
+    events = (
+        ('favourite', Favourite.objects.filter(favourited_at__gte=since)
+            .values_list('recipe_id', 'favourited_at')),
+        ('comment', Comment.objects.filter(created_at__gte=since)
+            .values_list('recipe_id', 'created_at')),
+    )
+    scores = {}
+    for kind, rows in events:
+        for recipe_id, at in rows.iterator():
+            score = event_score(kind, at)
+            scores[recipe_id] = log_add(scores[recipe_id], score) if recipe_id in scores else score
+
+    with transaction.atomic():
+        Recipe.objects.exclude(trending_score=F('view_score')).update(
+            trending_score=F('view_score')
+        )
+        recipe_ids = sorted(scores)
+        for start in range(0, len(recipe_ids), batch_size):
+            recipes = list(
+                Recipe.objects.filter(pk__in=recipe_ids[start:start + batch_size])
+                .only('id', 'view_score')
+            )
+            for recipe in recipes:
+                recipe.trending_score = log_add(scores[recipe.pk], recipe.view_score)
+            Recipe.objects.bulk_update(recipes, ['trending_score'])
+    return len(scores)
@@ -0,0 +1,235 @@
+"""
+Searching for users: prefix autocompletion and ranked substring search.
+
+Autocompletion matches the start of a username or full name. Each user keeps
+lower-case copies of their username (without the `@`) and full name in
+`User.username_key` and `User.name_key`, kept in step by a `pre_save`
+signal. Both columns are indexed, and a prefix is searched as the range
+`prefix <= key < successor(prefix)` rather than with `LIKE`, which SQLite
+cannot answer from an index when it is case-insensitive. Each lookup
+therefore reads at most `AUTOCOMPLETE_LIMIT` index entries however many
+users there are.
+
+The user search page matches words anywhere in usernames and names. A
+leading-wildcard `LIKE` has to read every user, so the backends here query a
+trigram index instead: an FTS5 table with the trigram tokenizer on SQLite
+and `pg_trgm` GIN indexes on PostgreSQL (both created by migration 0014).
+Words shorter than a trigram cannot be looked up that way; they match the
+start of usernames and names through the autocompletion keys. Other
+databases fall back to an unindexed substring filter.
+
+Results are annotated with `search_rank`, lower being better.
+"""
+from abc import ABC, abstractmethod
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from recipes.models.user import User, search_key
+from recipes.search import restore_fts_triggers
+
+AUTOCOMPLETE_LIMIT = 10
+TRIGRAM_LENGTH = 3
+
+USER_FTS_TABLE = 'recipes_user_fts'
+
+USER_SQLITE_TRIGGERS = {
+    f'{USER_FTS_TABLE}_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS {USER_FTS_TABLE}_insert AFTER INSERT ON recipes_user
+        BEGIN
+            INSERT INTO {USER_FTS_TABLE}(rowid, username, first_name, last_name)
+            VALUES (new.id, new.username, new.first_name, new.last_name);
+        END
+    """,
+    f'{USER_FTS_TABLE}_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS {USER_FTS_TABLE}_delete AFTER DELETE ON recipes_user
+        BEGIN
+            INSERT INTO {USER_FTS_TABLE}({USER_FTS_TABLE}, rowid, username, first_name, last_name)
+            VALUES ('delete', old.id, old.username, old.first_name, old.last_name);
+        END
+    """,
+    f'{USER_FTS_TABLE}_update': f"""
+        CREATE TRIGGER IF NOT EXISTS {USER_FTS_TABLE}_update
+        AFTER UPDATE OF username, first_name, last_name ON recipes_user
+        BEGIN
+            INSERT INTO {USER_FTS_TABLE}({USER_FTS_TABLE}, rowid, username, first_name, last_name)
+            VALUES ('delete', old.id, old.username, old.first_name, old.last_name);
+            INSERT INTO {USER_FTS_TABLE}(rowid, username, first_name, last_name)
+            VALUES (new.id, new.username, new.first_name, new.last_name);
+        END
+    """,
+}
+
+
+def prefix_filter(field_name, prefix):
+    """Return the filter of rows whose `field_name` starts with `prefix`, as a range."""
+    successor = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field_name}__gte': prefix, f'{field_name}__lt': successor})
+
+
+def autocomplete_users(query, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Return up to `limit` users whose username or full name starts with `query`.
+
+    Username matches come first, then full name matches, each in
+    alphabetical order. A query starting with `@` only matches usernames.
+    Each kind of match is one query reading an index range.
+
+    Args:
+        query (str): What the user has typed so far; case is ignored.
+        limit (int): Maximum number of users returned.
+
+    Returns:
+        list: The matching users, with only their names loaded.
+    """
+    prefix = search_key(query)
+    username_prefix = prefix.removeprefix('@')
+    searches = []
+    if username_prefix:
+        searches.append(('username_key', username_prefix))
+    if prefix and not prefix.startswith('@'):
+        searches.append(('name_key', prefix))
+
+    matches = {}
+    for field_name, field_prefix in searches:
+        users = (
+            User.objects.filter(prefix_filter(field_name, field_prefix))
+            .exclude(pk__in=list(matches))
+            .only('id', 'username', 'first_name', 'last_name')
+            .order_by(field_name, 'id')[:limit - len(matches)]
+        )
+        for user in users:
+            matches[user.pk] = user
+        if len(matches) >= limit:
+            break
+    return list(matches.values())
+
+
+def short_term_filter(term):
+    """Return the filter of users whose username or name starts with `term`."""
+    condition = Q(pk__in=[])
+    username_prefix = term.removeprefix('@')
+    if username_prefix:
+        condition |= prefix_filter('username_key', username_prefix)
+    if not term.startswith('@'):
+        condition |= prefix_filter('name_key', term)
+    return condition
+
+
+def unranked(queryset):
+    """Annotate `queryset` with empty search ranks."""
+    return queryset.annotate(search_rank=Value(0.0))
+
+
+class UserSearchBackend(ABC):
+    """
+    Base class of user search backends.
+
+    Subclasses implement `filter()` for a particular database.
+    """
+
+    def search(self, queryset, query):
+        """Return users in `queryset` matching every word of `query`."""
+        terms = search_key(query).split()
+        if not terms:
+            return unranked(queryset.none())
+        for term in terms:
+            if len(term) < TRIGRAM_LENGTH:
+                queryset = queryset.filter(short_term_filter(term))
+        long_terms = [term for term in terms if len(term) >= TRIGRAM_LENGTH]
+        if not long_terms:
+            return unranked(queryset)
+        return self.filter(queryset, long_terms)
+
+    @abstractmethod
+    def filter(self, queryset, terms):
+        """Return users in `queryset` matching every one of `terms`, ranked."""
+
+
+class SubstringUserSearchBackend(UserSearchBackend):
+    """Unindexed fallback matching words anywhere in the username or name."""
+
+    def filter(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(
+                Q(username__icontains=term)
+                | Q(first_name__icontains=term)
+                | Q(last_name__icontains=term)
+            )
+        return unranked(queryset)
+
+
+class SQLiteUserSearchBackend(UserSearchBackend):
+    """
+    Search the `recipes_user_fts` FTS5 trigram table.
+
+    Every word must appear in some column. Matches in the username weigh
+    twice as much as matches in the names when ranking with bm25.
+    """
+
+    def filter(self, queryset, terms):
+        match = ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return queryset.extra(
+            tables=[USER_FTS_TABLE],
+            where=[
+                f'{USER_FTS_TABLE}.rowid = recipes_user.id',
+                f'{USER_FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+        ).annotate(
+            search_rank=RawSQL(
+                f'bm25({USER_FTS_TABLE}, 2.0, 1.0, 1.0)', [], output_field=FloatField()
+            ),
+        )
+
+
+class PostgreSQLUserSearchBackend(UserSearchBackend):
+    """
+    Search with `ILIKE`, answered by the `pg_trgm` GIN indexes on each column.
+
+    Results are ranked by their best trigram similarity to the query,
+    negated to keep lower ranks first as with the other backends.
+    """
+
+    columns = ('username', 'first_name', 'last_name')
+
+    def filter(self, queryset, terms):
+        ops = connections[queryset.db].ops
+        where, params = [], []
+        for term in terms:
+            pattern = f'%{ops.prep_for_like_query(term)}%'
+            where.append('(' + ' OR '.join(
+                f'recipes_user.{column} ILIKE %s' for column in self.columns
+            ) + ')')
+            params += [pattern] * len(self.columns)
+        query = ' '.join(terms)
+        similarity = ', '.join(f'similarity(recipes_user.{column}, %s)' for column in self.columns)
+        return queryset.extra(where=where, params=params).annotate(
+            search_rank=RawSQL(
+                f'-greatest({similarity})', [query] * len(self.columns),
+                output_field=FloatField(),
+            ),
+        )
+
+
+USER_SEARCH_BACKENDS = {
+    'sqlite': SQLiteUserSearchBackend,
+    'postgresql': PostgreSQLUserSearchBackend,
+}
+
+
+def search_users(queryset, query):
+    """
+    Return users in `queryset` matching every word of `query`, with their `search_rank`.
+
+    Words match anywhere in the username, first or last name, ignoring
+    case; words shorter than a trigram only match the start of them.
+    """
+    vendor = connections[queryset.db].vendor
+    backend = USER_SEARCH_BACKENDS.get(vendor, SubstringUserSearchBackend)()
+    return backend.search(queryset, query)
+
+
+def restore_user_search_triggers(connection):
+    """Recreate any missing SQLite user search triggers and rebuild the index."""
+    return restore_fts_triggers(connection, USER_FTS_TABLE, 'recipes_user', USER_SQLITE_TRIGGERS)
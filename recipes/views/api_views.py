@@ -0,0 +1,99 @@
+from functools import partial
+
+from django.shortcuts import get_object_or_404
+from recipes.api import (
+    COMMENTS, RECIPES, USERS, ApiError, api_view, detail_response, list_response,
+)
+from recipes.models.comment import Comment
+from recipes.models.recipes import Recipe
+from recipes.models.user import User
+from recipes.timeline import TimelinePaginator, following_timeline
+from recipes.user_search import search_users
+
+RECENT_ORDERING = ('-publication_date', '-id')
+# Changes whenever anything a recipe is listed with does.
+RECIPE_VERSION_FIELD = 'modified_at'
+
+
+@api_view
+def api_recipes(request):
+    """
+    List the recipes the user may see, newest first.
+
+    With `q`, only recipes matching the words of the query are listed.
+    Search results stay in date order so they can be paged by cursor.
+    """
+    recipes = Recipe.objects.visible_to(request.user)
+    query = request.GET.get('q', '').strip()
+    if query:
+        recipes = recipes.search(query)
+    return list_response(
+        request, recipes, RECIPES, RECENT_ORDERING, version_field=RECIPE_VERSION_FIELD
+    )
+
+
+@api_view
+def api_recipe(request, pk):
+    """Return one recipe the user may see."""
+    recipes = RECIPES.restrict(
+        Recipe.objects.visible_to(request.user),
+        RECIPES.parse_fields(request.GET.get('fields'), default=tuple(RECIPES.fields)),
+    )
+    return detail_response(request, get_object_or_404(recipes, pk=pk), RECIPES)
+
+
+@api_view
+def api_recipe_comments(request, pk):
+    """List the comments on a recipe the user may see, newest first."""
+    recipe = get_object_or_404(Recipe.objects.visible_to(request.user).only('id'), pk=pk)
+    comments = Comment.objects.filter(recipe=recipe)
+    return list_response(request, comments, COMMENTS, ('-created_at', '-id'))
+
+
+@api_view
+def api_feed(request):
+    """
+    List the user's feed, newest first.
+
+    With `scope=following` only recipes from followed users are listed,
+    as in the HTML feed. Anonymous requests get a JSON 401.
+    """
+    if not request.user.is_authenticated:
+        raise ApiError('Authentication required.', status=401)
+    recipes = Recipe.objects.all()
+    paginator = None
+    if request.GET.get('scope') == 'following':
+        if request.GET.get('format') == 'ndjson':
+            recipes = following_timeline(request.user)
+        else:
+            paginator = partial(TimelinePaginator, viewer=request.user)
+    return list_response(
+        request, recipes.visible_to(request.user), RECIPES, RECENT_ORDERING, paginator,
+        version_field=RECIPE_VERSION_FIELD,
+    )
+
+
+@api_view
+def api_users(request):
+    """
+    List users, most followed first.
+
+    With `q`, only users whose username or name matches the words of the
+    query are listed. Search results stay in follower order so they can be
+    paged by cursor.
+    """
+    users = User.objects.all()
+    query = request.GET.get('q', '').strip()
+    if query:
+        users = search_users(users, query)
+    return list_response(request, users, USERS, ('-follower_count', 'username'))
+
+
+@api_view
+def api_user(request, username):
+    """Return one user."""
+    users = USERS.restrict(
+        User.objects.all(),
+        USERS.parse_fields(request.GET.get('fields'), default=tuple(USERS.fields)),
+    )
+    return detail_response(request, get_object_or_404(users, username=username), USERS)
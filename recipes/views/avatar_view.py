@@ -0,0 +1,21 @@
+import re
+
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from recipes.avatars import AVATAR_SIZES, get_identicon
+
+EMAIL_HASH_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+AVATAR_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def avatar_view(request, digest, size):
+    """
+    Return the identicon of an email hash as an SVG image.
+
+    The image depends only on its URL, so browsers may keep it forever.
+    """
+    if not EMAIL_HASH_PATTERN.match(digest) or size not in AVATAR_SIZES:
+        raise Http404('No such avatar.')
+    response = HttpResponse(get_identicon(digest, size), content_type='image/svg+xml')
+    patch_cache_control(response, public=True, max_age=AVATAR_MAX_AGE, immutable=True)
+    return response
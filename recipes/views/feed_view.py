@@ -1,56 +1,87 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Exists, OuterRef, Count
 
 from recipes.models.recipes import Recipe
-from recipes.models.follow import Follow
+from recipes.pagination import CursorPaginator
+from recipes.timeline import TimelinePaginator, following_timeline
+
+FEED_PAGE_SIZE = 9
+
+FEED_ORDERINGS = {
+    'recent': ('-publication_date', '-id'),
+    'popular': ('-favourite_count', '-publication_date', '-id'),
+    'trending': ('-trending_score', '-id'),
+}
+
+
+def feed_paginator(viewer, sort='recent', scope='all', difficulty=None):
+    """
+    Return the paginator of the feed of `viewer`, as listed by `feed_view`.
+
+    Args:
+        viewer (User): The user the feed is shown to.
+        sort (str): A key of `FEED_ORDERINGS`.
+        scope (str): 'following' for recipes from followed users only,
+            or 'all'.
+        difficulty (str): Only list recipes of this difficulty, if set.
+    """
+    filters = {}
+    if difficulty:
+        filters['difficulty'] = difficulty
+
+    if scope == 'following' and sort != 'recent':
+        # Only the newest-first timeline can be read in index order.
+        recipes = following_timeline(viewer)
+    else:
+        recipes = Recipe.objects.all()
+    recipes = (
+        recipes.filter(**filters)
+        .visible_to(viewer)
+        .with_viewer_state(viewer)
+        .select_related('user')
+        .prefetch_related('tags')
+    )
+
+    if scope == 'following' and sort == 'recent':
+        return TimelinePaginator(recipes, FEED_PAGE_SIZE, viewer, **filters)
+    return CursorPaginator(recipes, FEED_ORDERINGS[sort], FEED_PAGE_SIZE)
 
 
 @login_required
 def feed_view(request):
+    """
+    Display the recipes visible to the current user, one page at a time.
+
+    Pages are addressed by an opaque `cursor` query parameter rather than a
+    page number, so loading a page deep in the feed is as cheap as loading
+    the first one. With `scope=following` only recipes from followed users
+    are shown, read from the viewer's materialized timeline (in index
+    order when sorted by date).
+    """
     viewer = request.user
     sort = request.GET.get('sort', 'recent')
-    recipes = Recipe.objects.all().select_related('user').prefetch_related('tags')
-    unread_count = request.user.notifications.filter(is_read=False).count()
-
-    owner_follows_viewer = Follow.objects.filter(
-        follower=OuterRef('user'),
-        followee=viewer
-    )
-    viewer_follows_owner = Follow.objects.filter(
-        follower=viewer,
-        followee=OuterRef('user')
-    )
-
-    recipes = recipes.annotate(
-        owner_follows_viewer=Exists(owner_follows_viewer),
-        viewer_follows_owner=Exists(viewer_follows_owner)
-    ).filter(
-        Q(visibility='public') |
-        Q(visibility='friends',
-          owner_follows_viewer=True,
-          viewer_follows_owner=True) |
-        Q(visibility='me', user=viewer)
-    ).order_by('-publication_date')
+    if sort not in FEED_ORDERINGS:
+        sort = "recent"
+    scope = request.GET.get('scope')
+    if scope != 'following':
+        scope = 'all'
 
     categories = ['Beginner', 'Intermediate', 'Advanced']
     selected_difficulty = request.GET.get('difficulty')
-    if selected_difficulty in categories:
-        recipes = recipes.filter(difficulty=selected_difficulty)
-
-    # sort order
-    if sort == "popular":
-        recipes = recipes.annotate(
-            fav_count=Count("favourite")   # adjust related name if different
-        ).order_by("-fav_count", "-publication_date")
-    else:
-        recipes = recipes.order_by("-publication_date")
+    difficulty = selected_difficulty if selected_difficulty in categories else None
+
+    paginator = feed_paginator(viewer, sort, scope, difficulty)
+    recipes_page = paginator.get_page(request.GET.get('cursor'))
+
+    page_query = request.GET.copy()
+    page_query.pop('cursor', None)
 
     context = {
-        'recipes': recipes,
+        'recipes': recipes_page,
+        'page_query': page_query.urlencode(),
         'categories': categories,
         'selected_difficulty': selected_difficulty,
-        "unread_count": unread_count,
         'sort': sort,
+        'scope': scope,
     }
     return render(request, 'recipes/feed.html', context)
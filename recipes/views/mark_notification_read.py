@@ -1,6 +1,7 @@
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from recipes.models.comment import Notification
+from recipes.notifications import mark_notification_read as mark_read
 
 
 @login_required
@@ -9,7 +10,6 @@ def mark_notification_read(request, notification_id):
     Mark the notification as read once it has been clicked
     """
     notif = get_object_or_404(Notification, id=notification_id, user=request.user)
-    notif.is_read = True
-    notif.save()
+    mark_read(notif)
 
     return redirect(notif.link)
\ No newline at end of file
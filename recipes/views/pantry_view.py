@@ -0,0 +1,70 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.urls import reverse
+from recipes.ingredients import normalize_ingredient_name
+from recipes.models.recipes import Ingredient, Recipe
+from recipes.pantry import get_pantry_index
+
+PANTRY_DEFAULT_LIMIT = 20
+PANTRY_MAX_LIMIT = 50
+
+
+@login_required
+def pantry_view(request):
+    """
+    Rank recipes by how much of the user's pantry they use.
+
+    The pantry is given as repeated `ingredient` parameters and/or a comma
+    separated `q` parameter. Only recipes the user may see (the same rules
+    as the feed) are returned, best covered first.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The top recipes with their coverage of the pantry.
+    """
+    names = request.GET.getlist('ingredient') + request.GET.get('q', '').split(',')
+    names = {normalize_ingredient_name(name) for name in names} - {''}
+    limit = parse_limit(request.GET.get('limit'))
+
+    ingredients = dict(
+        Ingredient.objects.filter(name__in=names).values_list('id', 'name')
+    )
+    index = get_pantry_index()
+    ranked = index.rank(ingredients, request.user, limit)
+
+    recipes = Recipe.objects.only('id', 'title').in_bulk(
+        [recipe_id for recipe_id, _, _ in ranked]
+    )
+    results = []
+    for recipe_id, matched_count, ingredient_count in ranked:
+        recipe = recipes.get(recipe_id)
+        if recipe is None:
+            continue
+        results.append({
+            'id': recipe.id,
+            'title': recipe.title,
+            'url': reverse('view_recipe', args=[recipe.id]),
+            'coverage': round(matched_count / ingredient_count, 3),
+            'matched': sorted(
+                name for ingredient_id, name in ingredients.items()
+                if index.contains(ingredient_id, recipe_id)
+            ),
+            'missing_count': ingredient_count - matched_count,
+        })
+
+    return JsonResponse({
+        'pantry': sorted(names),
+        'unknown': sorted(names - set(ingredients.values())),
+        'results': results,
+    })
+
+
+def parse_limit(value):
+    """Return the requested number of results, clamped to a sane range."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return PANTRY_DEFAULT_LIMIT
+    return max(1, min(limit, PANTRY_MAX_LIMIT))
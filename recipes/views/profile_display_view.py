@@ -19,7 +19,6 @@ def profile_display_view(request):
          'followers': get_follower_count(user),
          'user_followers': paginate_followers(request, user),
          'user_name': user.username,
-         'user_avatar': user.gravatar(),
          'favourites': paginate_favourite_recipes(request, user)
     }
     return render(request, 'view_profile.html', context)
\ No newline at end of file
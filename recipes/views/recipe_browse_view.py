@@ -1,81 +1,91 @@
 from django.shortcuts import render
-from django.db.models import Q, Count
+from recipes.browse import BrowseFilters, count_facets
+from recipes.forms.recipe_form import TIME_CHOICES
 from recipes.models.recipes import Recipe, Tag
 from recipes.models.user import User
+from recipes.pagination import CursorPaginator
 
+BROWSE_PAGE_SIZE = 9
 
-def recipe_browse_view(request):
+BROWSE_ORDERINGS = {
+    'recent': ('-publication_date', '-id'),
+    'relevance': ('search_rank', '-publication_date', '-id'),
+    'popular': ('-favourite_count', '-publication_date', '-id'),
+}
+
+
+def browse_paginator(filters, viewer, popular=False):
     """
-    Display a list of recipes based on a search query
+    Return the paginator of the recipes matching `filters`, as listed by `recipe_browse_view`.
+
+    Args:
+        filters (BrowseFilters): The search query and filters.
+        viewer (User): The user browsing.
+        popular (bool): Order by favourites rather than by relevance or date.
     """
-    query = request.GET.get('q', '').strip()
-    user_id = request.GET.get('user')  # get user from GET
-    date = request.GET.get('date')
-    tags = request.GET.getlist('tag')
-    category = request.GET.get('category')
-    popular = request.GET.get('popular')
-    time_required = request.GET.get('time')
-    
-    if request.user.is_authenticated:
-        unread_count = request.user.notifications.filter(is_read=False).count()
+    recipes = (
+        filters.apply(filters.base_queryset(viewer))
+        .with_viewer_state(viewer)
+        .select_related('user')
+        .prefetch_related('tags')
+    )
+    if popular:
+        ordering = BROWSE_ORDERINGS['popular']
+    elif filters.query:
+        ordering = BROWSE_ORDERINGS['relevance']
     else:
-        unread_count = 0
-
-    if user_id:
-        user_id = int(user_id)  # convert to integer for comparison in template
+        ordering = BROWSE_ORDERINGS['recent']
+    return CursorPaginator(recipes, ordering, BROWSE_PAGE_SIZE)
 
-    recipes = Recipe.objects.all()
-    users = User.objects.all()
-    all_tags = Tag.objects.all()
-    categories = [choice[0] for choice in Recipe.DIFFICULTY_CHOICES]
 
-    if not query and not tags and not user_id and not date and not category and not time_required:
-        recipes = Recipe.objects.all()
-
-    if query:
-        recipes = recipes.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query)
-        ).order_by('-publication_date')
+def recipe_browse_view(request):
+    """
+    Display the recipes matching a search query and filters, a page at a time.
 
-    if tags:
-        recipes = recipes.filter(tags__name__in=tags).distinct()
+    Results are ordered by relevance when searching, or by favourites with
+    `popular`, and paged by cursor like the feed. The tag, difficulty and
+    time filters show how many recipes each option would match (see
+    `recipes.browse`). The user filter is picked by autocompletion (see
+    `user_autocomplete_view`), so only the selected user is loaded here.
+    """
+    filters = BrowseFilters.from_query_dict(request.GET)
+    popular = request.GET.get('popular')
 
-    if user_id:
-        recipes = recipes.filter(user__id=user_id)
+    paginator = browse_paginator(filters, request.user, bool(popular))
+    recipes_page = paginator.get_page(request.GET.get('cursor'))
 
-    if date:
-        recipes = recipes.filter(publication_date__date=date)
+    all_tags = list(Tag.objects.all())
+    facets = count_facets(filters, request.user, all_tags)
 
-    if category:
-        recipes = recipes.filter(difficulty=category)
-    
-    if time_required:
-        recipes = recipes.filter(time_required=time_required)
-        
-    if popular:
-        recipes = filter_by_popularity(recipes)
-    
+    selected_user = None
+    if filters.user_id:
+        selected_user = User.objects.only('id', 'username').filter(pk=filters.user_id).first()
 
-    selected_difficulty = request.GET.get('difficulty')
-    if selected_difficulty in [choice[0] for choice in Recipe.DIFFICULTY_CHOICES]:
-        recipes = recipes.filter(difficulty=selected_difficulty)
+    page_query = request.GET.copy()
+    page_query.pop('cursor', None)
+    sort_query = page_query.copy()
+    sort_query.pop('popular', None)
+    difficulty_query = page_query.copy()
+    for name in ('difficulty', 'category'):
+        difficulty_query.pop(name, None)
 
     return render(request, 'recipes/recipe_browse.html', {
-        'recipes': recipes,
-        'query': query,
-        'users': users,
-        'tags': all_tags,
-        'categories': categories,
-        'selected_tags': tags,
-        'selected_user': user_id,
-        'selected_date': date,
-        'selected_time': time_required,
-        'selected_difficulty': selected_difficulty,
-        "unread_count": unread_count,
-        'popular' : popular
+        'recipes': recipes_page,
+        'page_query': page_query.urlencode(),
+        'sort_query': sort_query.urlencode(),
+        'difficulty_query': difficulty_query.urlencode(),
+        'query': filters.query,
+        'tags': [(tag, facets['tag'].get(tag.name, 0)) for tag in all_tags],
+        'categories': [
+            (difficulty, facets['difficulty'][difficulty])
+            for difficulty, _ in Recipe.DIFFICULTY_CHOICES
+        ],
+        'times': [(value, label, facets['time'][value]) for value, label in TIME_CHOICES],
+        'selected_tags': filters.tags,
+        'selected_user': selected_user,
+        'selected_date': filters.date,
+        'selected_time': filters.time_required,
+        'selected_difficulty': filters.difficulty,
+        'popular': popular,
     })
 
-def filter_by_popularity(queryset):
-    queryset = queryset.annotate(favourite_count=Count('favourites'))
-    return queryset.order_by('-favourite_count', '-publication_date')
@@ -1,6 +1,7 @@
 from django.shortcuts import redirect, get_object_or_404
 from recipes.models import Recipe
 from recipes.models.comment import Notification
+from recipes.notifications import notify
 from recipes.forms.comment_form import CommentForm
 from django.contrib.auth.decorators import login_required
 
@@ -9,7 +10,7 @@ def recipe_comment(request, recipe_id):
     """
     Allows the user to comment on recipes
     """
-    recipe = get_object_or_404(Recipe, id=recipe_id)
+    recipe = get_object_or_404(Recipe.objects.visible_to(request.user), id=recipe_id)
 
     if request.method == "POST":
         form = CommentForm(request.POST)
@@ -19,13 +20,8 @@ def recipe_comment(request, recipe_id):
             comment.user = request.user
             comment.save()
 
-            # Create notification if not commenting on your own recipe
-            if recipe.user != request.user:
-                Notification.objects.create(
-                    user=recipe.user,
-                    text=f"{request.user.username} commented on your recipe '{recipe.title}'",
-                    link=f"/recipe/{recipe.id}/"
-                )
+            # Notify the author, unless commenting on your own recipe
+            notify(Notification.COMMENT, recipe, request.user)
 
     return redirect('view_recipe', pk=recipe_id)
     
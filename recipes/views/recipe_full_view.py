@@ -1,30 +1,145 @@
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.generic import DetailView
 from recipes.forms.comment_form import CommentForm
 from recipes.models.comment import Comment
 from recipes.models.recipes import Recipe
+from recipes.notifications import get_notifications_version
+from recipes.pagination import CursorPaginator, InvalidCursor
+from recipes.trending import record_view
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+COMMENTS_PAGE_SIZE = 20
+COMMENT_ORDERING = ('-created_at', '-id')
+
+
+def comments_paginator(recipe):
+    """Return the paginator of the comments on `recipe`, newest first."""
+    comments = Comment.objects.filter(recipe=recipe).select_related('user')
+    return CursorPaginator(comments, COMMENT_ORDERING, COMMENTS_PAGE_SIZE)
+
+
+def comments_page(recipe, cursor=None):
+    """
+    Return a page of the comments on `recipe`, newest first.
+
+    Commenters are joined in the same query, and each page reads one index
+    range however many comments the recipe has.
+
+    Raises:
+        InvalidCursor: If `cursor` is not a cursor of this listing.
+    """
+    return comments_paginator(recipe).page(cursor)
+
+
+def recipe_page_cache_key(recipe):
+    """Return the cache key of the anonymous page of `recipe` as it is now."""
+    return f'recipe_page:{recipe.pk}:{recipe.page_version}'
 
 
 class RecipeFullView(DetailView):
+    """
+    Display a recipe with the first page of its comments.
+
+    The page is only rendered when it may have changed. Its `ETag` combines
+    `Recipe.modified_at`, bumped on edits, comments, favourites and renames
+    of the author or a commenter, with
+    the viewer's session and notification state, so a browser revalidating
+    an unchanged page gets 304 Not Modified.
+
+    Anonymous viewers of public recipes all see the same page, so it is
+    rendered once per version and served from the cache, and is sent with
+    a `Last-Modified` date as well.
+    """
+
     model = Recipe
     template_name = 'recipes/recipe_full.html'
     pk_url_kwarg = 'pk'
     context_object_name = 'recipe'
 
-    def get_object(self):
-        recipe = super().get_object()
-        return recipe
-    
+    def get_queryset(self):
+        return Recipe.objects.visible_to(self.request.user).select_related('user')
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        record_view(self.object.pk)
+        shared = self.is_shared()
+        last_modified = int(self.object.modified_at.timestamp()) if shared else None
+        etag = self.get_etag()
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.render_page(shared)
+
+        response.headers['ETag'] = etag
+        if shared:
+            response.headers['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True)
+        else:
+            patch_cache_control(response, no_cache=True, private=True)
+        return response
+
+    def is_shared(self):
+        """Return whether the page is the same for every viewer who may see it."""
+        return not self.request.user.is_authenticated and self.object.visibility == 'public'
+
+    def get_etag(self):
+        """
+        Return the page's ETag for the current viewer.
+
+        Signed-in users' pages also show their notifications, and a comment
+        form whose CSRF token changes with their session.
+        """
+        parts = [self.object.pk, self.object.page_version]
+        user = self.request.user
+        if user.is_authenticated:
+            parts += [self.request.session.session_key, get_notifications_version(user)]
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return quote_etag(digest)
+
+    def render_page(self, shared):
+        """
+        Render the page, reusing the cached copy of a shared page.
+
+        Pages with flash messages are never cached, as the messages are for
+        this viewer only.
+        """
+        if not shared or len(get_messages(self.request)):
+            return self.render_to_response(self.get_context_data(object=self.object)).render()
+
+        key = recipe_page_cache_key(self.object)
+        content = cache.get(key)
+        if content is None:
+            response = self.render_to_response(self.get_context_data(object=self.object)).render()
+            cache.set(key, response.content, PAGE_CACHE_TIMEOUT)
+            return response
+        return HttpResponse(content)
+
     def get_context_data(self, **kwargs):
         context =  super().get_context_data(**kwargs)
-        recipe = self.get_object()
+        recipe = self.object
 
-        context['comments'] = Comment.objects.filter(recipe=recipe).order_by('-created_at')
+        context['comments'] = comments_page(recipe)
         context['form'] = CommentForm()
-
-        if self.request.user.is_authenticated:
-            context['unread_count'] = self.request.user.notifications.filter(is_read=False).count()
-        else:
-            context['unread_count'] = 0
-            
         return context
-    
+
+
+def recipe_comments_view(request, pk):
+    """
+    Return the next page of a recipe's comments as an HTML fragment.
+
+    The recipe page shows the first page of comments and fetches the rest
+    from here, one page at a time, as the user asks for more.
+    """
+    recipe = get_object_or_404(Recipe.objects.visible_to(request.user).only('id'), pk=pk)
+    try:
+        comments = comments_page(recipe, request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor.')
+    return render(request, 'recipes/comments_page.html', {'recipe': recipe, 'comments': comments})
@@ -1,35 +1,61 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+from recipes.leaderboards import get_leaderboards
 from recipes.models.user import User
-from django.db.models import Count
-from django.core.paginator import Paginator
+from recipes.pagination import LookaheadPaginator
+from recipes.user_search import autocomplete_users, search_users
+
+USER_BROWSE_PAGE_SIZE = 6
+LEADERBOARD_SHOWN = 5
+
+def ranked_users(query):
+    """Return the users matching `query`, best matches first."""
+    return search_users(User.objects.all(), query).order_by('search_rank', 'username')
 
 def user_browse_view(request):
     """
-    Display a list of users based on a search query.
+    Display the users matching a search query, best matches first.
+
+    Words of the query match anywhere in usernames and names through a
+    trigram index (see `recipes.user_search`). Pages fetch one user more
+    than they show rather than counting every match. Without a query, the
+    leaderboards are shown instead (see `recipes.leaderboards`).
     """
     query = request.GET.get('q', '').strip()
 
 
     if not query:
         users = User.objects.none()
+        leaderboards = get_leaderboards(('followed', 'favourited', 'commenters'), LEADERBOARD_SHOWN)
+        top_users = leaderboards['followed']
+        top_favourited_users = leaderboards['favourited']
+        top_commenters = leaderboards['commenters']
     else:
-        users = User.objects.filter(username__icontains=query)
-
-    top_users = get_top_followed_users(5)
+        users = ranked_users(query)
+        top_users = top_favourited_users = top_commenters = []
 
-    paginate = Paginator(users, 6)
+    paginate = LookaheadPaginator(users, USER_BROWSE_PAGE_SIZE)
     page_number = request.GET.get('page')
     page_object = paginate.get_page(page_number)
 
     return render(request, 'user_browse.html', {
-        'users':users,
+        'users': page_object,
         'page_object': page_object,
         'top_users': top_users,
+        'top_favourited_users': top_favourited_users,
+        'top_commenters': top_commenters,
         'query':query,
         })
 
-def get_top_followed_users(limit = 5):
-    return (
-        User.objects.annotate(follower_count=Count('followers', distinct=True))
-        .order_by('-follower_count','username')[:limit]
-    )
\ No newline at end of file
+def user_autocomplete_view(request):
+    """
+    Return the users whose username or name starts with `q`, as JSON.
+
+    Used by the user filter of the recipe browse page in place of a list
+    of every user.
+    """
+    users = autocomplete_users(request.GET.get('q', ''))
+    return JsonResponse({'results': [
+        {'id': user.pk, 'username': user.username, 'full_name': user.full_name()}
+        for user in users
+    ]})
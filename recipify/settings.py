@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.contrib.messages import constants as messages
 
@@ -43,11 +44,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recipes.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'recipes.middleware.NotificationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,6 +67,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'recipes.context_processors.notifications',
             ],
         },
     },
@@ -83,6 +87,37 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# The cache must be shared by every server process: invalidations (friend
+# lists, the pantry index version, unread counts, cached pages) are made by
+# whichever process handled the change, and every other process has to see
+# them. Redis is used when REDIS_URL is set; otherwise the cache lives in a
+# database table, created by `migrate` (see `recipes.signals`). The database
+# cache's incr() is a read then a write, so counts kept in the cache (unread
+# notifications, trending views) can miss concurrent updates; use Redis when
+# running more than one process. Each database cache read is also a query, so
+# pages read their cache entries together (`User.cached()`, `recipes.cards`), and
+# the query budget tests run against this backend.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'recipify',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'recipify_cache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,3 +179,7 @@ MESSAGE_TAGS = {
 
 # URL to redirect after a recipe was created
 REDIRECT_URL_WHEN_RECIPE_IS_CREATED = 'feed'
+
+# Test runner that clears the cache between tests, since rolled back test
+# transactions reuse primary keys that cached entries may still refer to
+TEST_RUNNER = 'recipes.tests.runner.CacheIsolatingTestRunner'
@@ -24,12 +24,18 @@ from recipes.views.follow_view import follow_user
 from recipes.views.unfollow_view import unfollow_user
 from recipes.views.recipe_create_view import recipe_create_view
 from recipes.views.recipe_browse_view import recipe_browse_view
-from recipes.views.user_browse_view import user_browse_view
+from recipes.views.user_browse_view import user_autocomplete_view, user_browse_view
 from recipes.views.profile_display_view import profile_display_view
 from recipes.views.favourite_view import toggle_favourite
 from recipes.views.user_profile_view import user_profile_view
 from recipes.views.recipe_comment import recipe_comment
 from recipes.views.mark_notification_read import mark_notification_read
+from recipes.views.pantry_view import pantry_view
+from recipes.views.recipe_full_view import recipe_comments_view
+from recipes.views.avatar_view import avatar_view
+from recipes.views.api_views import (
+    api_feed, api_recipe, api_recipe_comments, api_recipes, api_user, api_users,
+)
 
 
 urlpatterns = [
@@ -46,18 +52,28 @@ urlpatterns = [
     path('follow/<str:username>/', follow_user, name='follow_user'),
     path('unfollow/<str:username>/', unfollow_user, name='unfollow_user'),
     path('recipes/browse/', recipe_browse_view, name='recipe_browse'),
+    path('recipes/pantry/', pantry_view, name='pantry'),
     path('recipes/delete/', views.RecipeDeleteView.as_view(), name='recipe_delete'),
     path('recipe/create/', recipe_create_view, name='recipe_create'),
     path('user_browse/', user_browse_view, name='user_browse'),
+    path('users/autocomplete/', user_autocomplete_view, name='user_autocomplete'),
+    path('avatars/<str:digest>/<int:size>.svg', avatar_view, name='avatar'),
     path('view_profile/', profile_display_view, name='view_profile'),
     path("toggle_favourite/", toggle_favourite, name="toggle_favourite"),
     path('recipe/<int:pk>/', views.RecipeFullView.as_view(), name='view_recipe'),
+    path('recipe/<int:pk>/comments/', recipe_comments_view, name='recipe_comments'),
     path("recipe/<int:recipe_id>/edit/",
          views.RecipeEditView.as_view(), name="recipe_edit"),
     path('profile/<str:username>/', user_profile_view, name='user_profile'),
     path('recipes/<int:recipe_id>/', recipe_comment, name='recipe_comment'),
     path('notification/<int:notification_id>/redirect/',
          mark_notification_read, name='notification_read'),
+    path('api/recipes/', api_recipes, name='api_recipes'),
+    path('api/recipes/<int:pk>/', api_recipe, name='api_recipe'),
+    path('api/recipes/<int:pk>/comments/', api_recipe_comments, name='api_recipe_comments'),
+    path('api/feed/', api_feed, name='api_feed'),
+    path('api/users/', api_users, name='api_users'),
+    path('api/users/<str:username>/', api_user, name='api_user'),
 
 ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)